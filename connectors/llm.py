@@ -1,9 +1,142 @@
 import os
+import json
+import time
+import atexit
+import asyncio
+import logging
+import threading
 
-from openai import OpenAI
-from typing import List, Dict
+import httpx
+import numpy as np
+import orjson
+from openai import OpenAI, AsyncOpenAI
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 from abc import ABC
 
+from connectors.semantic_cache import SemanticCache
+from connectors.response_cache import ResponseCache
+
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+
+# HTTP/2 multiplexes concurrent requests over one pooled connection; httpx
+# only supports it when the h2 package is installed (httpx[http2]).
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+logger = logging.getLogger("llm")
+
+# One pooled HTTP client for the whole process so repeated calls reuse
+# keep-alive connections instead of paying a new TCP + TLS handshake.
+_HTTPX_LIMITS = httpx.Limits(
+    max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0
+)
+# Fail fast on unreachable hosts but give slow generations time to finish.
+_HTTPX_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+_HTTPX = httpx.Client(http2=_HTTP2, limits=_HTTPX_LIMITS, timeout=_HTTPX_TIMEOUT)
+atexit.register(_HTTPX.close)
+
+# The OpenAI SDK retries connection errors, 408, 429 and 5xx responses with
+# exponential backoff, honouring Retry-After.
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+
+_SHARED_CLIENTS: Dict[Tuple[str, str], OpenAI] = {}
+
+
+class TokenBucket:
+    """
+    Proactive requests-per-minute + tokens-per-minute limiter.
+
+    Each call reserves its share of both budgets up front and sleeps for the
+    deficit, so bursts are smoothed out before the provider answers with 429s.
+    Reservations are taken under a threading.Lock and the sleep happens outside
+    it, which lets sync threads and async tasks draw from the same bucket.
+    A limit of 0 disables that budget.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, n_tokens: int) -> float:
+        """Take one request and `n_tokens` from the bucket; return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+
+            wait = 0.0
+            if self.rpm > 0:
+                self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+                self._requests -= 1
+                wait = max(wait, -self._requests * 60 / self.rpm)
+            if self.tpm > 0:
+                self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+                self._tokens -= n_tokens
+                wait = max(wait, -self._tokens * 60 / self.tpm)
+            return wait
+
+    def acquire(self, n_tokens: int = 0):
+        wait = self._reserve(n_tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, n_tokens: int = 0):
+        wait = self._reserve(n_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_LIMITER = TokenBucket(
+    rpm=int(os.getenv("LLM_RPM", "500")), tpm=int(os.getenv("LLM_TPM", "200000"))
+)
+
+
+def estimate_tokens(messages: List[Dict]) -> int:
+    """Rough prompt size in tokens (~4 characters per token)."""
+    return len(orjson.dumps(messages)) // 4
+
+
+def _sampling_params(temperature: Optional[float], max_tokens: Optional[int]) -> Dict:
+    """The sampling arguments a caller set explicitly, for completions.create."""
+    params = {}
+    if temperature is not None:
+        params["temperature"] = temperature
+    if max_tokens is not None:
+        params["max_tokens"] = max_tokens
+    return params
+
+
+# raw_decode parses from an offset without copying the JSON out of the response
+_JSON_DECODER = json.JSONDecoder()
+
+
+def decode_first_object(response: str):
+    """Decode the first JSON object in an LLM `response`, or return None."""
+    start = response.find('{')
+    if start < 0:
+        return None
+    # Usually the object is all there is between the braces, possibly wrapped
+    # in markdown, which orjson parses in one go
+    end = response.rfind('}')
+    try:
+        return orjson.loads(response[start:end + 1])
+    except orjson.JSONDecodeError:
+        pass
+    # Otherwise decode in place, ignoring whatever follows the object
+    try:
+        data, _ = _JSON_DECODER.raw_decode(response, start)
+        return data
+    except json.JSONDecodeError:
+        return None
+
 
 class LLMClient(ABC):
     def __init__(self, llm_provider: str):
@@ -13,8 +146,21 @@ class LLMClient(ABC):
 class DeepSeekClient(LLMClient):
     """Objects of this class can interact with the DeepSeek API."""
 
-    def __init__(self, api_key: str = None, model: str = "deepseek-chat"):
-        """Constructor"""
+    def __init__(
+        self,
+        api_key: str = None,
+        model: str = "deepseek-chat",
+        semantic_cache: SemanticCache = None,
+        response_cache: ResponseCache = None,
+    ):
+        """Constructor
+
+        semantic_cache: Optional cache consulted before every chat call; near
+            duplicate prompts are answered from it without hitting the API.
+        response_cache: Exact-match disk cache for deterministic calls. Defaults
+            to the shared cache under ~/.cache/marketing-agent/llm unless
+            LLM_CACHE_DISABLE=1 is set.
+        """
 
         super().__init__("DeepSeek")
         if api_key is None:
@@ -22,39 +168,109 @@ class DeepSeekClient(LLMClient):
         else:
             self.api_key = api_key
 
-        self.client = OpenAI(
-            api_key=self.api_key, base_url="https://api.deepseek.com"
-        )
+        key = (self.api_key, DEEPSEEK_BASE_URL)
+        if key not in _SHARED_CLIENTS:
+            _SHARED_CLIENTS[key] = OpenAI(
+                api_key=self.api_key,
+                base_url=DEEPSEEK_BASE_URL,
+                http_client=_HTTPX,
+                max_retries=LLM_MAX_RETRIES,
+            )
+        self.client = _SHARED_CLIENTS[key]
         self.model = model
+        self.semantic_cache = semantic_cache
+
+        if response_cache is None and os.getenv("LLM_CACHE_DISABLE") != "1":
+            response_cache = ResponseCache()
+        self.response_cache = response_cache
+
+    def _lookup_cache(
+        self, messages: List[Dict], temperature: float, max_tokens: int, cache: bool
+    ) -> Tuple[Optional[str], Optional[str], Optional[np.ndarray]]:
+        """Return (cached_response, cache_key, cache_vector) for a request."""
+        if cache is None:
+            cache = temperature == 0
+
+        cache_key = None
+        if cache and self.response_cache is not None:
+            cache_key = ResponseCache.make_key(
+                self.model, messages, temperature, max_tokens
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached, None, None
+
+        cache_vector = None
+        if self.semantic_cache is not None:
+            cache_vector = self.semantic_cache.embed_messages(messages)
+            if cache_vector is not None:
+                cached = self.semantic_cache.get(
+                    cache_vector, (self.model, temperature)
+                )
+                if cached is not None:
+                    return cached, None, None
+
+        return None, cache_key, cache_vector
+
+    def _store_cache(
+        self,
+        response_content: str,
+        temperature: float,
+        cache_key: Optional[str],
+        cache_vector: Optional[np.ndarray],
+    ):
+        if cache_key is not None:
+            self.response_cache.set(cache_key, response_content)
+        if cache_vector is not None:
+            self.semantic_cache.add(
+                cache_vector, (self.model, temperature), response_content
+            )
 
     def chat(
         self,
         messages: List[Dict],
-        temperature: float = 0.7,
-        max_tokens: int = 1500,
+        temperature: float = None,
+        max_tokens: int = None,
         timeout: int = 60,
+        cache: bool = None,
     ):
         """
         messages: List of messages in format:
             [{"role": "system", "content": "You are a helpful assistant."},
              {"role": "user", "content": "What's the weather today?"}]
+        temperature, max_tokens: Sent to the API only when given, so by
+            default the provider's own sampling and output limit apply.
+        cache: Whether to use the exact-match response cache. By default it is
+            only used for deterministic calls (temperature == 0).
         """
 
         # print(f"[{self.llm_provider}] Sending messages to OpenAI API...{messages}")
 
+        cached, cache_key, cache_vector = self._lookup_cache(
+            messages, temperature, max_tokens, cache
+        )
+        if cached is not None:
+            return cached
+
         try:
-            import time
+            _LIMITER.acquire(estimate_tokens(messages))
             start_time = time.time()
             
             response = self.client.chat.completions.create(
                 model=self.model, 
                 messages=messages,
+                **_sampling_params(temperature, max_tokens),
                 timeout=timeout
             )
 
             response_content = response.choices[0].message.content
             elapsed = time.time() - start_time
-            print(f"[{self.llm_provider}] chat responded in {elapsed:.2f}s...{response_content[:100]}...")
+            logger.debug(
+                "[%s] chat responded in %.2fs: %.100s",
+                self.llm_provider, elapsed, response_content
+            )
+
+            self._store_cache(response_content, temperature, cache_key, cache_vector)
 
             return response_content
 
@@ -62,16 +278,208 @@ class DeepSeekClient(LLMClient):
             print(f"[{self.llm_provider}] Error in chat: {e}")
             return f"Error: {e}"
 
-    def summarize(self, agent_description: str, task_description: Dict) -> str:
-        """Summarize information using the OpenAI API and return the description as string."""
+    def stream_chat(
+        self,
+        messages: List[Dict],
+        temperature: float = None,
+        max_tokens: int = None,
+        timeout: int = 60,
+        cache: bool = None,
+    ) -> Iterator[str]:
+        """
+        Streaming variant of `chat` that yields the response as it is generated.
+
+        A cached response is yielded as a single chunk. The full response is
+        cached once the stream has been consumed to the end.
+        """
 
-        # Extract the prompt from task_description
-        if isinstance(task_description, dict):
-            prompt = task_description.get("prompt", str(task_description))
-        else:
-            prompt = str(task_description)
+        cached, cache_key, cache_vector = self._lookup_cache(
+            messages, temperature, max_tokens, cache
+        )
+        if cached is not None:
+            yield cached
+            return
 
-        messages = [
+        parts = []
+        try:
+            _LIMITER.acquire(estimate_tokens(messages))
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                **_sampling_params(temperature, max_tokens),
+                timeout=timeout,
+                stream=True
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+
+        except Exception as e:
+            print(f"[{self.llm_provider}] Error in stream_chat: {e}")
+            yield f"Error: {e}"
+            return
+
+        self._store_cache("".join(parts), temperature, cache_key, cache_vector)
+
+    def _async_client(self) -> AsyncOpenAI:
+        """
+        Create an async client with its own connection pool.
+
+        httpx async pools are bound to the event loop they were first used on,
+        so the async client is scoped to one batch rather than shared globally.
+        """
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=DEEPSEEK_BASE_URL,
+            http_client=httpx.AsyncClient(limits=_HTTPX_LIMITS, timeout=_HTTPX_TIMEOUT),
+            max_retries=LLM_MAX_RETRIES,
+        )
+
+    async def achat(
+        self,
+        messages: List[Dict],
+        temperature: float = None,
+        max_tokens: int = None,
+        timeout: int = 60,
+        cache: bool = None,
+        aclient: AsyncOpenAI = None,
+    ) -> str:
+        """Async variant of `chat`; `aclient` lets a batch share one pool."""
+
+        cached, cache_key, cache_vector = await asyncio.to_thread(
+            self._lookup_cache, messages, temperature, max_tokens, cache
+        )
+        if cached is not None:
+            return cached
+
+        owns_client = aclient is None
+        if owns_client:
+            aclient = self._async_client()
+
+        try:
+            await _LIMITER.aacquire(estimate_tokens(messages))
+            response = await aclient.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                **_sampling_params(temperature, max_tokens),
+                timeout=timeout
+            )
+            response_content = response.choices[0].message.content
+            # Like the lookup, the shelve write blocks, so it stays off the loop
+            await asyncio.to_thread(
+                self._store_cache, response_content, temperature, cache_key, cache_vector
+            )
+            return response_content
+
+        except Exception as e:
+            print(f"[{self.llm_provider}] Error in achat: {e}")
+            return f"Error: {e}"
+
+        finally:
+            if owns_client:
+                await aclient.close()
+
+    async def achat_batch(
+        self, batch: List[List[Dict]], max_concurrency: int = 10, **kwargs
+    ) -> List[Union[str, BaseException]]:
+        """
+        Send many chat requests concurrently, at most `max_concurrency` at a time.
+
+        Results are returned in input order; unexpected failures are returned
+        as exception objects instead of cancelling the whole batch.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async with self._async_client() as aclient:
+
+            async def one(messages: List[Dict]) -> str:
+                async with semaphore:
+                    return await self.achat(messages, aclient=aclient, **kwargs)
+
+            return await asyncio.gather(
+                *(one(messages) for messages in batch), return_exceptions=True
+            )
+
+    def submit_batch(self, prompts: List[List[Dict]]) -> str:
+        """
+        Upload `prompts` (one messages list each) as a Batch API job.
+
+        Requires a provider that implements the OpenAI Batch API; returns the
+        batch job id to pass to `fetch_batch`.
+        """
+        lines = [
+            orjson.dumps(
+                {
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {"model": self.model, "messages": messages},
+                }
+            )
+            for i, messages in enumerate(prompts)
+        ]
+        batch_file = self.client.files.create(
+            file=("batch.jsonl", b"\n".join(lines)),
+            purpose="batch",
+        )
+        job = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        print(f"[{self.llm_provider}] Submitted batch {job.id} with {len(prompts)} requests")
+        return job.id
+
+    def fetch_batch(
+        self, job_id: str, poll_interval: float = 30, timeout: float = None
+    ) -> List[Optional[str]]:
+        """
+        Wait for a batch job to finish and return its responses in prompt order.
+
+        Requests that failed inside the batch yield None.
+        """
+        start_time = time.time()
+        while True:
+            job = self.client.batches.retrieve(job_id)
+            if job.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            if timeout is not None and time.time() - start_time > timeout:
+                raise TimeoutError(f"Batch {job_id} still {job.status} after {timeout}s")
+            time.sleep(poll_interval)
+
+        if job.status != "completed" or job.output_file_id is None:
+            raise RuntimeError(f"Batch {job_id} finished with status {job.status}")
+
+        results = [None] * job.request_counts.total
+        output = self.client.files.content(job.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            body = response["body"]
+            results[int(record["custom_id"])] = body["choices"][0]["message"]["content"]
+
+        return results
+
+    @staticmethod
+    def build_summarize_messages(agent_description: str, prompt: str) -> List[Dict]:
+        """
+        Build the system + user messages sent by `summarize`.
+
+        Providers cache prompt prefixes, so keep `agent_description` a constant
+        (no f-string interpolation in system content) and put volatile context
+        at the end of the prompt.
+        """
+        assert isinstance(prompt, str), "prompt must be a string"
+
+        return [
             {
                 "role": "system",
                 "content": agent_description,
@@ -82,9 +490,12 @@ class DeepSeekClient(LLMClient):
             },
         ]
 
-        response = self.chat(messages=messages)
+    def summarize(self, agent_description: str, prompt: str, cache: bool = None) -> str:
+        """Summarize information using the OpenAI API and return the description as string.
 
-        if isinstance(response, str):
-            return response
+        cache: Passed to `chat`; True also reuses sampled answers from the
+            exact-match response cache.
+        """
 
-        return response.choices[0].message.content
+        messages = self.build_summarize_messages(agent_description, prompt)
+        return self.chat(messages=messages, cache=cache)
@@ -0,0 +1,91 @@
+import os
+import time
+import shelve
+import hashlib
+import threading
+
+import orjson
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_CACHE_DIR = Path(os.path.expanduser("~/.cache/marketing-agent/llm"))
+
+# Every DeepSeekClient builds its own ResponseCache over the same file, so
+# the lock guarding the shelve is shared by all instances in the process.
+_LOCK = threading.Lock()
+
+# Expired entries still on disk are pruned by a write at most this often
+# (seconds); entries that are read again are deleted as soon as they expire.
+PRUNE_INTERVAL = 3600
+_last_pruned: Dict[str, float] = {}
+
+
+class ResponseCache:
+    """
+    Disk-backed exact-match cache of LLM responses.
+
+    Keys are the SHA-256 of the request parameters, so only byte-identical
+    requests share an entry. The shelve file is opened per operation under a
+    module-level lock, so instances and threads of one process can share it.
+    Separate processes are not coordinated and should not write it at the
+    same time.
+    """
+
+    def __init__(self, cache_dir: Path = None, expire: Optional[float] = 3600):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+        self.expire = expire
+
+    @property
+    def _path(self) -> str:
+        return str(Path(self.cache_dir, "responses"))
+
+    @staticmethod
+    def make_key(
+        model: str, messages: List[Dict], temperature: float, max_tokens: int
+    ) -> str:
+        payload = orjson.dumps(
+            {"m": model, "msgs": messages, "t": temperature, "mt": max_tokens},
+            option=orjson.OPT_SORT_KEYS,
+            default=str,
+        )
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.cache_dir.exists():
+            return None
+
+        with _LOCK:
+            try:
+                with shelve.open(self._path) as db:
+                    entry = db.get(key)
+                    if entry is not None and self._expired(entry, time.time()):
+                        del db[key]
+                        entry = None
+            except Exception as e:
+                print(f"⚠️ Could not read LLM response cache: {e}")
+                return None
+
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        expires_at = now + self.expire if self.expire is not None else None
+
+        with _LOCK:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                with shelve.open(self._path) as db:
+                    db[key] = (value, expires_at)
+                    if now - _last_pruned.get(self._path, 0) > PRUNE_INTERVAL:
+                        _last_pruned[self._path] = now
+                        for expired in [k for k, entry in db.items() if self._expired(entry, now)]:
+                            del db[expired]
+            except Exception as e:
+                print(f"⚠️ Could not write LLM response cache: {e}")
+
+    @staticmethod
+    def _expired(entry, now: float) -> bool:
+        expires_at = entry[1]
+        return expires_at is not None and now > expires_at
@@ -0,0 +1,94 @@
+import time
+import threading
+
+import faiss
+import numpy as np
+import openai
+import orjson
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIM = 1536
+
+
+def _openai_embedding(text: str) -> List[float]:
+    """Embed text with the same model the vector store uses."""
+    response = openai.embeddings.create(input=[text], model=EMBEDDING_MODEL)
+    return response.data[0].embedding
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache of LLM responses keyed on the embedding of the
+    serialized messages list.
+
+    Entries are partitioned by a namespace (e.g. ``(model, temperature)``) so a
+    response is only reused for the same model settings. A lookup is a hit when
+    the cosine similarity to the closest stored prompt is at least `threshold`
+    and the entry is younger than `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], List[float]] = None,
+        threshold: float = 0.92,
+        ttl: Optional[float] = 3600,
+        dim: int = EMBEDDING_DIM,
+    ):
+        self.embed = embed or _openai_embedding
+        self.threshold = threshold
+        self.ttl = ttl
+        self.dim = dim
+        self._partitions: Dict[Hashable, Tuple[faiss.IndexFlatIP, list]] = {}
+        self._lock = threading.Lock()
+
+    def embed_messages(self, messages: List[Dict]) -> Optional[np.ndarray]:
+        """Return the normalized embedding of `messages`, or None on failure."""
+        try:
+            text = orjson.dumps(messages, option=orjson.OPT_SORT_KEYS).decode()
+            vector = np.array([self.embed(text)], dtype="float32")
+        except Exception as e:
+            print(f"⚠️ Semantic cache could not embed messages: {e}")
+            return None
+
+        if vector.shape != (1, self.dim):
+            return None
+
+        faiss.normalize_L2(vector)
+        return vector
+
+    def get(self, vector: np.ndarray, namespace: Hashable) -> Optional[str]:
+        """Return the cached response closest to `vector`, if similar enough."""
+        with self._lock:
+            partition = self._partitions.get(namespace)
+            if partition is None:
+                return None
+
+            index, entries = partition
+            if index.ntotal == 0:
+                return None
+
+            scores, ids = index.search(vector, 1)
+            if scores[0, 0] < self.threshold:
+                return None
+
+            response, created_at = entries[ids[0, 0]]
+            if self.ttl is not None and time.time() - created_at > self.ttl:
+                return None
+
+            return response
+
+    def add(self, vector: np.ndarray, namespace: Hashable, response: str):
+        """Store `response` under the prompt embedding `vector`."""
+        with self._lock:
+            if namespace not in self._partitions:
+                self._partitions[namespace] = (faiss.IndexFlatIP(self.dim), [])
+
+            index, entries = self._partitions[namespace]
+            index.add(vector)
+            entries.append((response, time.time()))
+
+    def clear(self):
+        with self._lock:
+            self._partitions.clear()
@@ -1,18 +1,153 @@
 from scraper.rss_fetcher import RSSFetcher
-from scraper.parallel_rss_fetcher import ParallelRSSFetcher, ParallelArticleProcessor, ParallelStorageManager
+from scraper.parallel_rss_fetcher import ParallelRSSFetcher, ParallelArticleProcessor, ParallelStorageManager, all_stored, reuse_stored_summaries, store_in_backends
 from processor.summarizer import Summarizer
-from storage.graph_interface import GraphStorage
 from storage.knowledge_graph import KnowledgeGraph
+from storage.knowledge_graph_query import KnowledgeGraphQuery
 from storage.db_interface import MongoStorage
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Iterator, List
+import atexit
+import asyncio
+import logging
+import functools
+import itertools
+import threading
+import os
+import orjson
 
 from connectors.llm import DeepSeekClient
+from connectors.semantic_cache import SemanticCache
 from storage.vector_store import VectorStore
+import time
 import traceback
 
 
-def update_knowledge_base():
+logger = logging.getLogger(__name__)
+
+# Shared across calls so paraphrased questions can reuse earlier answers.
+_QUERY_CACHE = SemanticCache(threshold=0.92, ttl=3600)
+# Knowledge graph summaries share long prompt templates, so reuse needs a
+# stricter match than free-form questions.
+_SUMMARY_CACHE = SemanticCache(threshold=0.97, ttl=3600)
+
+# Static prompt parts go first and volatile context last, so consecutive
+# queries share a byte-identical prefix the provider can serve from its
+# prompt cache. Never interpolate anything into these.
+QUERY_SYSTEM_MESSAGE = {"role": "system", "content": "You are a marketing expert."}
+QUERY_TASK_MESSAGE = {
+    "role": "user",
+    "content": "TASK: Summarize the following information in a professionally sound manner.",
+}
+
+# Recent knowledge graph answers, keyed on the normalized question and the
+# knowledge base version. Entries expire like the semantic caches, and each
+# update bumps the version so answers computed from the old graph, including
+# ones still in flight during the update, are never served again.
+KG_QUERY_CACHE_SIZE = 256
+KG_QUERY_CACHE_TTL = 3600
+_KG_QUERY_RESULTS: "OrderedDict[tuple, tuple]" = OrderedDict()
+_KG_QUERY_RESULTS_LOCK = threading.Lock()
+_KG_VERSIONS = itertools.count(1)
+_kg_version = 0
+
+# When set to a truthy value, the knowledge graph functions answer with empty
+# results instead of calling Neo4j and the LLM, so scripts can exercise their
+# plumbing offline. Any other value, e.g. "0" or "false", queries them live.
+DRYRUN_ENV = "MARKETING_AGENT_DRYRUN"
+_DRYRUN_VALUES = frozenset({"1", "true", "yes"})
+
+
+def _dry_run() -> bool:
+    return os.environ.get(DRYRUN_ENV, "").strip().lower() in _DRYRUN_VALUES
+
+
+def _shared(factory):
+    """
+    Cache `factory()` like lru_cache(maxsize=1), but build it only once when
+    several threads ask for it at the same time; a second instance would
+    leak its connections and worker threads.
+    """
+    cached = functools.lru_cache(maxsize=1)(factory)
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def get():
+        with lock:
+            return cached()
+
+    get.cache_clear = cached.cache_clear
+    get.cache_info = cached.cache_info
+    return get
+
+
+@_shared
+def _vs() -> VectorStore:
+    return VectorStore()
+
+
+@_shared
+def _llm() -> DeepSeekClient:
+    return DeepSeekClient(semantic_cache=_QUERY_CACHE)
+
+
+@_shared
+def _kgq() -> KnowledgeGraphQuery:
+    return KnowledgeGraphQuery(semantic_cache=_SUMMARY_CACHE)
+
+
+@atexit.register
+def _close_services():
+    # Only close the Neo4j driver if a query actually opened it.
+    if _kgq.cache_info().currsize:
+        _kgq().close()
+
+
+# Above this many articles the batch path is worth the upload + polling delay.
+BATCH_API_THRESHOLD = 20
+
+
+def _summarize_with_batch_api(summarizer: Summarizer, articles: list) -> list:
+    """
+    Summarize `articles` through one Batch API job.
+
+    Returns one summary per article, None where the batch could not produce
+    one so the caller can fall back to a synchronous call.
+    """
+    llm_client = summarizer.llm_client
+    prompts = [
+        summarizer.build_messages(article["summary"] or article["title"])
+        for article in articles
+    ]
+
+    try:
+        job_id = llm_client.submit_batch(prompts)
+        print(f"⏳ Waiting for batch job {job_id}...")
+        return llm_client.fetch_batch(job_id)
+    except Exception as e:
+        print(f"⚠️ Warning: Batch summarization failed, falling back to chat: {e}")
+        return [None] * len(articles)
+
+
+def _summarize_in_groups(summarizer: Summarizer, articles: list) -> list:
+    """
+    Summarize `articles` several per LLM request.
+
+    Returns one summary per article, None where summarization failed so the
+    caller can retry it on its own.
+    """
+    try:
+        summaries = summarizer.summarize_batch(
+            [article["summary"] or article["title"] for article in articles]
+        )
+    except Exception as e:
+        print(f"⚠️ Warning: Batch summarization failed, falling back to chat: {e}")
+        return [None] * len(articles)
+
+    return [None if isinstance(summary, BaseException) else summary for summary in summaries]
+
+
+def update_knowledge_base(use_batch_api: bool = False, force: bool = False):
     """
     Ingests and updates the agent's marketing knowledge base.
 
@@ -27,6 +162,15 @@ def update_knowledge_base():
     It should be scheduled to run daily or at regular intervals as part of a
     long-running knowledge agent.
 
+    Args:
+        use_batch_api (bool): Summarize runs of more than BATCH_API_THRESHOLD
+            articles through the provider's Batch API instead of one chat call
+            per article. Cheaper for nightly jobs, but results can take hours and
+            the provider must implement the OpenAI Batch API (DeepSeek does not).
+        force (bool): Download every feed even if it has not changed since the
+            last run. By default unchanged feeds answer 304 and, when no feed
+            has new entries, the run exits before any client is created.
+
     Side effects:
     - Writes to MongoDB, Neo4j, and vector index on disk.
     - Prints log-style status messages to stdout.
@@ -34,7 +178,6 @@ def update_knowledge_base():
     Returns:
         None
     """
-    import time
     start_time = time.time()
     
     print(f"🚀 Starting Marketing Agent - {datetime.now().isoformat()}")
@@ -42,66 +185,80 @@ def update_knowledge_base():
     try:
         # Step 1: Fetch articles
         print("📡 Fetching articles from RSS feeds...")
-        fetcher = RSSFetcher()
+        fetcher = RSSFetcher(force=force)
         articles = fetcher.fetch()
         print(f"✅ Fetched {len(articles)} relevant articles.")
 
         if not articles:
             print("⚠️ No relevant articles found. Exiting.")
+            fetcher.commit_validators()
             return
 
         # Step 2: Initialize components
         print("🔧 Initializing components...")
         summarizer = Summarizer()
         db = MongoStorage()
-        graph = GraphStorage()
         kg = KnowledgeGraph()
         vs = VectorStore()
 
+        pending = reuse_stored_summaries(articles, db)
+
+        if use_batch_api and len(pending) > BATCH_API_THRESHOLD:
+            print(f"📦 Submitting {len(pending)} articles to the Batch API...")
+            batch_summaries = _summarize_with_batch_api(summarizer, pending)
+        elif pending:
+            print(f"📝 Summarizing {len(pending)} articles in batches...")
+            batch_summaries = _summarize_in_groups(summarizer, pending)
+        else:
+            batch_summaries = []
+
         # Step 3: Process articles
-        print(f"🔄 Processing {len(articles)} articles...")
-        processed_articles = []
+        print(f"🔄 Processing {len(pending)} articles...")
         
-        for i, article in enumerate(articles, 1):
+        for i, article in enumerate(pending, 1):
             try:
-                print(f"  📝 Processing article {i}/{len(articles)}: {article['title'][:50]}...")
+                logger.debug(
+                    "Processing article %d/%d: %.50s", i, len(pending), article["title"]
+                )
                 
                 # Summarize article
-                article["summary_processed"] = summarizer.summarize(
-                    article["summary"] or article["title"]
-                )
-                processed_articles.append(article)
-
-                # Store in MongoDB
-                try:
-                    db.save_article(article)
-                except Exception as e:
-                    print(f"⚠️ Warning: Failed to save to MongoDB: {e}")
-
-                # Store in Neo4j (legacy)
-                try:
-                    graph.store_article(article)
-                except Exception as e:
-                    print(f"⚠️ Warning: Failed to save to Neo4j: {e}")
-
-                # Store in Knowledge Graph
-                try:
-                    kg.store_article_with_knowledge_graph(article)
-                except Exception as e:
-                    print(f"⚠️ Warning: Failed to save to Knowledge Graph: {e}")
+                summary = batch_summaries[i - 1]
+                if summary is None:
+                    summary = summarizer.summarize(article["summary"] or article["title"])
+                article["summary_processed"] = summary
 
             except Exception as e:
                 print(f"❌ Error processing article {i}: {e}")
                 continue
 
-        # Step 4: Store in Vector Store
+        processed_articles = [article for article in articles if "summary_processed" in article]
+
+        # Step 4: Bulk-write to each storage backend concurrently
+        stored = len(processed_articles) == len(articles)
+        if processed_articles:
+            if store_in_backends(processed_articles, db, kg):
+                stored = False
+            clear_query_cache()
+
+        # Step 5: Store in Vector Store. Articles with a reused summary were
+        # embedded on an earlier run, so only the new ones are added
         print("💾 Storing articles in vector store...")
         try:
-            vs.add_documents(processed_articles)
+            summarized = [article for article in pending if "summary_processed" in article]
+            if summarized:
+                vs.add_documents(summarized)
         except Exception as e:
             print(f"⚠️ Warning: Failed to save to vector store: {e}")
+            stored = False
+
+        # Unchanged feeds are skipped next time, so only mark them as seen
+        # once every article from them is stored
+        if stored:
+            fetcher.commit_validators()
+        else:
+            print("⚠️ Warning: Not every article was stored; their feeds will be fetched again.")
         
-        # Step 5: Cleanup
+        # Step 6: Cleanup
         try:
             kg.close()
         except Exception as e:
@@ -123,7 +280,8 @@ def update_knowledge_base_parallel(
     max_fetch_workers: int = 5,
     max_process_workers: int = 3,
     max_storage_workers: int = 2,
-    use_async_fetch: bool = True
+    use_async_fetch: bool = True,
+    force: bool = False
 ):
     """
     Parallelized version of update_knowledge_base for improved performance.
@@ -134,38 +292,92 @@ def update_knowledge_base_parallel(
     - Stores articles in parallel across different storage systems
     - Provides detailed performance metrics
 
+    All stages run on a single asyncio event loop; see
+    `aupdate_knowledge_base_parallel`.
+
     Args:
         max_fetch_workers (int): Number of workers for RSS fetching
-        max_process_workers (int): Number of workers for article processing
+        max_process_workers (int): Maximum concurrent summarization requests
         max_storage_workers (int): Number of workers for storage operations
         use_async_fetch (bool): Whether to use async for RSS fetching
+        force (bool): Download every feed even if it has not changed since the
+            last run
 
     Returns:
         None
     """
-    import time
+    asyncio.run(
+        aupdate_knowledge_base_parallel(
+            max_fetch_workers=max_fetch_workers,
+            max_process_workers=max_process_workers,
+            max_storage_workers=max_storage_workers,
+            use_async_fetch=use_async_fetch,
+            force=force,
+        )
+    )
+
+
+async def aupdate_knowledge_base_parallel(
+    max_fetch_workers: int = 5,
+    max_process_workers: int = 3,
+    max_storage_workers: int = 2,
+    use_async_fetch: bool = True,
+    force: bool = False
+):
+    """
+    Async version of update_knowledge_base_parallel.
+
+    Feeds are fetched with aiohttp and summaries requested with the async LLM
+    client on the running loop. The database and vector store writes use
+    synchronous drivers, so they run in worker threads, concurrently with
+    each other.
+    """
     print(f"🚀 Starting Parallel Marketing Agent - {datetime.now().isoformat()}")
     start_time = time.time()
     
     # Step 1: Fetch articles in parallel
-    fetcher = ParallelRSSFetcher(max_workers=max_fetch_workers)
-    articles = fetcher.fetch(use_async=use_async_fetch)
+    fetcher = ParallelRSSFetcher(max_workers=max_fetch_workers, force=force)
+    if use_async_fetch:
+        print(f"🚀 Starting parallel RSS fetch with {len(fetcher.feeds)} feeds...")
+        articles = await fetcher.afetch_all_feeds()
+    else:
+        articles = await asyncio.to_thread(fetcher.fetch, use_async=False)
     
     if not articles:
         print("⚠️ No relevant articles found. Exiting.")
+        fetcher.commit_validators()
         return
     
-    # Step 2: Process articles in parallel
-    processor = ParallelArticleProcessor(max_workers=max_process_workers)
-    processed_articles = processor.process_articles_parallel(articles)
-    
-    # Step 3: Store articles in parallel
+    # Step 2: Process articles in parallel, reusing summaries already stored
     storage_manager = ParallelStorageManager(max_workers=max_storage_workers)
-    storage_results = storage_manager.store_articles_parallel(processed_articles)
+    db, _ = storage_manager.backends()
+    pending = await asyncio.to_thread(reuse_stored_summaries, articles, db)
+
+    processor = ParallelArticleProcessor(max_workers=max_process_workers)
+    processed_articles = await processor.aprocess_articles(articles)
+
+    # Articles with a reused summary were embedded on an earlier run, so only
+    # the newly summarized ones go to the vector store
+    pending_ids = {id(article) for article in pending}
+    summarized = [
+        processed for article, processed in zip(articles, processed_articles)
+        if id(article) in pending_ids and "summary_processed" in processed
+    ]
     
-    # Step 4: Store in Vector Store (this is already optimized)
+    # Step 3: Store articles and embeddings concurrently
     vs = VectorStore()
-    vs.add_documents(processed_articles)
+    storage_results, _ = await asyncio.gather(
+        asyncio.to_thread(storage_manager.store_articles_parallel, processed_articles),
+        asyncio.to_thread(vs.add_documents, summarized),
+    )
+    clear_query_cache()
+
+    # Unchanged feeds are skipped next time, so only mark them as seen once
+    # every article from them is stored
+    if all_stored(processed_articles, storage_results):
+        fetcher.commit_validators()
+    else:
+        print("⚠️ Warning: Not every article was stored; their feeds will be fetched again.")
     
     end_time = time.time()
     total_time = end_time - start_time
@@ -193,21 +405,25 @@ def query_knowledge_base(query: str) -> str:
     Returns:
         str: A synthesized and fluent answer generated by the LLM based on retrieved knowledge.
     """
-    vs = VectorStore()
-    results = vs.search(query)
+    return _llm().chat(_query_messages(query))
 
-    task_description = f"""
-    TASK: Summarize the following information in a professionally sound manner.
 
-    {results}
+def stream_knowledge_base(query: str) -> Iterator[str]:
     """
+    Streaming variant of `query_knowledge_base`.
 
-    llm_client = DeepSeekClient()
-    summary = llm_client.summarize(
-        agent_description="You are a marketing expert.",
-        task_description=task_description,
-    )
-    return summary
+    Yields the answer in chunks as the LLM generates it, so interactive callers
+    can show output before the full response is ready.
+    """
+    return _llm().stream_chat(_query_messages(query))
+
+
+def _query_messages(query: str) -> List[Dict]:
+    """Retrieve context for `query` and build the summarization messages."""
+    results = _vs().search(query)
+    # Serialize the retrieved documents once, straight into their own message.
+    context = orjson.dumps(results, default=str).decode()
+    return [QUERY_SYSTEM_MESSAGE, QUERY_TASK_MESSAGE, {"role": "user", "content": context}]
 
 
 def query_knowledge_graph(query: str) -> Dict:
@@ -224,15 +440,45 @@ def query_knowledge_graph(query: str) -> Dict:
 
     Returns:
         Dict: Structured results including summary, articles, and network data.
+            Repeated questions return the same cached dict, so treat it as
+            read-only.
     """
-    from storage.knowledge_graph_query import KnowledgeGraphQuery
-    
-    kg_query = KnowledgeGraphQuery()
-    try:
-        results = kg_query.natural_language_query(query)
-        return results
-    finally:
-        kg_query.close()
+    if _dry_run():
+        return {"query": query, "query_type": "dryrun", "articles": [], "summary": ""}
+
+    with _KG_QUERY_RESULTS_LOCK:
+        key = (" ".join(query.lower().split()), _kg_version)
+        entry = _KG_QUERY_RESULTS.get(key)
+        if entry is not None and time.monotonic() - entry[1] < KG_QUERY_CACHE_TTL:
+            _KG_QUERY_RESULTS.move_to_end(key)
+            return entry[0]
+
+    result = _kgq().natural_language_query(query)
+    with _KG_QUERY_RESULTS_LOCK:
+        if key[1] != _kg_version:
+            return result
+        _KG_QUERY_RESULTS[key] = (result, time.monotonic())
+        _KG_QUERY_RESULTS.move_to_end(key)
+        if len(_KG_QUERY_RESULTS) > KG_QUERY_CACHE_SIZE:
+            _KG_QUERY_RESULTS.popitem(last=False)
+    return result
+
+
+def clear_query_cache():
+    """Forget cached answers and the open vector store, e.g. after new articles are stored."""
+    global _kg_version
+    with _KG_QUERY_RESULTS_LOCK:
+        _kg_version = next(_KG_VERSIONS)
+        _KG_QUERY_RESULTS.clear()
+
+    # The update saved its vectors through its own VectorStore; the shared
+    # one reopens the saved files on the next search, which only maps them
+    _vs.cache_clear()
+
+    # The shared query engine keeps its own trending topics; only refresh
+    # them if it was already created
+    if _kgq.cache_info().currsize:
+        _kgq().invalidate_trending_cache()
 
 
 def get_knowledge_graph_insights() -> Dict:
@@ -242,11 +488,13 @@ def get_knowledge_graph_insights() -> Dict:
     Returns:
         Dict: Statistics and insights about the knowledge graph.
     """
-    from storage.knowledge_graph_query import KnowledgeGraphQuery
-    
-    kg_query = KnowledgeGraphQuery()
-    try:
-        insights = kg_query.get_knowledge_graph_insights()
-        return insights
-    finally:
-        kg_query.close()
+    if _dry_run():
+        return {
+            "statistics": {},
+            "trending_topics": [],
+            "total_articles": 0,
+            "total_entities": 0,
+            "total_sources": 0,
+        }
+
+    return _kgq().get_knowledge_graph_insights()
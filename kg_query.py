@@ -7,8 +7,10 @@ It supports various types of queries and provides structured results.
 """
 
 import argparse
-import json
+import logging
+import functools
 import os
+import orjson
 from typing import Dict, List
 from dotenv import load_dotenv
 
@@ -18,6 +20,11 @@ load_dotenv()
 from functions import query_knowledge_graph, get_knowledge_graph_insights
 
 
+def to_json(data: Dict) -> str:
+    """Pretty-print results as JSON; values orjson cannot encode are str()'d."""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2, default=str).decode()
+
+
 def format_article(article: Dict) -> str:
     topics = article.get('topics', [])
     if not isinstance(topics, list):
@@ -113,7 +120,8 @@ def display_insights(insights: Dict):
                 print(f"  • {source['source']}: {source['count']} articles")
 
 
-def main():
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Query the Marketing Knowledge Graph using natural language."
     )
@@ -168,48 +176,56 @@ def main():
         action="store_true",
         help="Output results in JSON format"
     )
-    
-    args = parser.parse_args()
-    
-    if args.command == 'query':
-        query_str = " ".join(args.query)
-        results = query_knowledge_graph(query_str)
-        
-        if args.json:
-            print(json.dumps(results, indent=2))
-        else:
-            display_results(results)
-    
-    elif args.command == 'insights':
-        insights = get_knowledge_graph_insights()
-        
-        if args.json:
-            print(json.dumps(insights, indent=2))
-        else:
-            display_insights(insights)
-    
-    elif args.command == 'entity':
-        query_str = f"Tell me about {args.entity}"
-        results = query_knowledge_graph(query_str)
-        
-        if args.json:
-            print(json.dumps(results, indent=2))
-        else:
-            display_results(results)
-    
-    elif args.command == 'trending':
-        # Create a trending query
-        query_str = f"What are the trending topics in the last {args.days} days?"
-        results = query_knowledge_graph(query_str)
-        
-        if args.json:
-            print(json.dumps(results, indent=2))
-        else:
-            display_results(results)
-    
+
+    return parser
+
+
+def _output(data: Dict, as_json: bool, display):
+    if as_json:
+        print(to_json(data))
     else:
+        display(data)
+
+
+def _do_query(args):
+    query_str = " ".join(args.query)
+    _output(query_knowledge_graph(query_str), args.json, display_results)
+
+
+def _do_insights(args):
+    _output(get_knowledge_graph_insights(), args.json, display_insights)
+
+
+def _do_entity(args):
+    query_str = f"Tell me about {args.entity}"
+    _output(query_knowledge_graph(query_str), args.json, display_results)
+
+
+def _do_trending(args):
+    # Create a trending query
+    query_str = f"What are the trending topics in the last {args.days} days?"
+    _output(query_knowledge_graph(query_str), args.json, display_results)
+
+
+HANDLERS = {
+    "query": _do_query,
+    "insights": _do_insights,
+    "entity": _do_entity,
+    "trending": _do_trending,
+}
+
+
+def main(argv: List[str] = None):
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    handler = HANDLERS.get(args.command)
+    if handler is None:
         parser.print_help()
+    else:
+        handler(args)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     main() 
\ No newline at end of file
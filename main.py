@@ -1,6 +1,8 @@
+import sys
 import argparse
+import logging
 from dotenv import load_dotenv
-from functions import query_knowledge_base
+from functions import stream_knowledge_base
 
 
 def main():
@@ -16,11 +18,14 @@ def main():
     args = parser.parse_args()
 
     query_str = " ".join(args.query)
-    summary = query_knowledge_base(query_str)
     print("\n📊 Answer:\n")
-    print(summary)
+    for chunk in stream_knowledge_base(query_str):
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+    print()
 
 
 if __name__ == "__main__":
     load_dotenv()
+    logging.basicConfig(level=logging.INFO)
     main()
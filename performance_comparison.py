@@ -19,7 +19,8 @@ def run_performance_test(test_name: str, test_func, *args, **kwargs) -> Dict:
     print(f"\n🧪 Running {test_name}...")
     print("=" * 50)
     
-    start_time = time.time()
+    # perf_counter is monotonic and high resolution, unlike the wall clock
+    start_ns = time.perf_counter_ns()
     
     try:
         test_func(*args, **kwargs)
@@ -28,8 +29,7 @@ def run_performance_test(test_name: str, test_func, *args, **kwargs) -> Dict:
         print(f"❌ Test failed: {e}")
         success = False
     
-    end_time = time.time()
-    duration = end_time - start_time
+    duration = (time.perf_counter_ns() - start_ns) / 1e9
     
     return {
         "test_name": test_name,
@@ -39,10 +39,22 @@ def run_performance_test(test_name: str, test_func, *args, **kwargs) -> Dict:
     }
 
 
-def run_multiple_tests(test_func, num_runs: int = 3, *args, **kwargs) -> List[Dict]:
+def run_multiple_tests(
+    test_func, num_runs: int = 3, warmup_runs: int = 1, *args, **kwargs
+) -> List[Dict]:
     """
     Run a test function multiple times and return all results.
+
+    The first `warmup_runs` calls are untimed, so one-off costs (imports,
+    connection pools, cold caches) do not land in the first measurement.
     """
+    for i in range(warmup_runs):
+        print(f"\n🔥 Warm-up run {i+1}/{warmup_runs} (not timed)")
+        try:
+            test_func(*args, **kwargs)
+        except Exception as e:
+            print(f"⚠️ Warm-up run failed: {e}")
+
     results = []
     
     for i in range(num_runs):
@@ -76,8 +88,12 @@ def analyze_results(results: List[Dict]) -> Dict:
         "failed_runs": len(results) - len(durations),
         "min_duration": min(durations),
         "max_duration": max(durations),
-        "avg_duration": statistics.mean(durations),
+        "avg_duration": statistics.fmean(durations),
         "median_duration": statistics.median(durations),
+        # LLM latency is tail-heavy, so report the 95th percentile too
+        "p95_duration": (
+            statistics.quantiles(durations, n=100)[94] if len(durations) > 1 else durations[0]
+        ),
         "std_deviation": statistics.stdev(durations) if len(durations) > 1 else 0,
         "all_durations": durations
     }
@@ -102,6 +118,7 @@ def print_analysis(analysis: Dict):
     print(f"Max duration: {analysis['max_duration']:.2f}s")
     print(f"Average duration: {analysis['avg_duration']:.2f}s")
     print(f"Median duration: {analysis['median_duration']:.2f}s")
+    print(f"P95 duration: {analysis['p95_duration']:.2f}s")
     if analysis['std_deviation'] > 0:
         print(f"Standard deviation: {analysis['std_deviation']:.2f}s")
 
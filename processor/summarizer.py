@@ -1,21 +1,224 @@
-from connectors.llm import DeepSeekClient
+import re
+import json
+import asyncio
+import hashlib
+import threading
+
+from collections import OrderedDict
+from typing import List, Optional, Union
+from connectors.llm import DeepSeekClient, decode_first_object
+
+
+AGENT_DESCRIPTION = "A marketing agent focused on learning marketing concepts."
+
+# All instructions live in the system message and the user message is only
+# the article text, so every summarization request shares a byte-identical
+# prefix that providers can serve from their prompt cache. Never interpolate
+# anything into these.
+SYSTEM_PREFIX = (
+    AGENT_DESCRIPTION + "\n\n"
+    "TASK: Summarize the text sent by the user.\n"
+    "INSTRUCTION: Extract each individual sentence from the summary as a standalone string, removing bullet points, numbering, and formatting. Output only a list of sentences, one per line, ready for embedding generation via a sentence-transformer."
+)
+
+# Same task for several numbered texts in one request; the model answers with
+# a JSON array so the summaries can be mapped back by position.
+BATCH_SYSTEM_PREFIX = (
+    AGENT_DESCRIPTION + "\n\n"
+    "TASK: Summarize each numbered text sent by the user independently.\n"
+    "INSTRUCTION: For each text, extract each individual sentence from its summary as a standalone string, removing bullet points, numbering, and formatting, with one sentence per line.\n"
+    'Return only a JSON object of the form {"summaries": ["...", "..."]} with exactly one string per text, in the same order as the texts.'
+)
+
+# Output budget of a batch request: enough for every summary of a full group,
+# within the model's output limit. Replies cut off at the limit still yield
+# the summaries before the cut; only the rest are retried one by one.
+BATCH_TOKENS_PER_SUMMARY = 250
+BATCH_MAX_TOKENS = 8192
+
+_SUMMARIES_START_RE = re.compile(r'"summaries"\s*:\s*\[\s*')
+_WHITESPACE_RE = re.compile(r"\s*")
+_JSON_DECODER = json.JSONDecoder()
+
+# Summaries kept in memory per Summarizer, so the same text showing up in
+# several feeds during one run costs a single LLM call.
+SUMMARY_CACHE_SIZE = 4096
+
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
 
 
 class Summarizer:
-    def __init__(self):
-        self.llm_client = DeepSeekClient()
-        self.agent_description = (
-            "A marketing agent focused on learning marketing concepts."
-        )
+    SYSTEM_PREFIX = SYSTEM_PREFIX
+    BATCH_SYSTEM_PREFIX = BATCH_SYSTEM_PREFIX
+
+    def __init__(self, llm_client: DeepSeekClient = None):
+        self.llm_client = llm_client if llm_client is not None else DeepSeekClient()
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _cached(self, key: bytes) -> Optional[str]:
+        with self._cache_lock:
+            summary = self._cache.get(key)
+            if summary is not None:
+                self._cache.move_to_end(key)
+            return summary
+
+    def _remember(self, key: bytes, summary):
+        # Failed calls come back as exceptions or "Error: ..." strings
+        if not isinstance(summary, str) or summary.startswith("Error:"):
+            return
+        with self._cache_lock:
+            self._cache[key] = summary
+            self._cache.move_to_end(key)
+            if len(self._cache) > SUMMARY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def build_messages(self, text: str) -> List[dict]:
+        return self.llm_client.build_summarize_messages(self.SYSTEM_PREFIX, text)
 
     def summarize(self, text: str) -> str:
+        key = _text_key(text)
+        summary = self._cached(key)
+        if summary is None:
+            summary = self.llm_client.summarize(self.SYSTEM_PREFIX, text)
+            self._remember(key, summary)
+        return summary
+
+    def summarize_many(
+        self, texts: List[str], max_concurrency: int = 10
+    ) -> List[Union[str, BaseException]]:
+        """
+        Summarize several texts with concurrent requests.
+
+        Results are in input order; a failed request yields its exception.
+        """
+        return asyncio.run(self.asummarize_many(texts, max_concurrency))
 
-        task_description = {
-            "task": "Summarize the text below.",
-            "text": text,
-            "instruction": "Extract each individual sentence from the following summary as a standalone string, removing bullet points, numbering, and formatting. Output only a list of sentences, one per line, ready for embedding generation via a sentence-transformer."
-        }
-        summary = self.llm_client.summarize(
-            self.agent_description, task_description
+    async def asummarize_many(
+        self, texts: List[str], max_concurrency: int = 10
+    ) -> List[Union[str, BaseException]]:
+        """Async variant of `summarize_many` for callers already in an event loop."""
+        batch = [self.build_messages(text) for text in texts]
+        return await self.llm_client.achat_batch(batch, max_concurrency=max_concurrency)
+
+    def _batch_prompt(self, texts: List[str]) -> str:
+        return "\n".join(f"[{i}] {text}" for i, text in enumerate(texts, 1))
+
+    @staticmethod
+    def _leading_summaries(response: str) -> List[str]:
+        """Return the complete strings at the start of a cut-off "summaries" array."""
+        match = _SUMMARIES_START_RE.search(response)
+        if not match:
+            return []
+
+        summaries = []
+        pos = match.end()
+        while True:
+            try:
+                summary, pos = _JSON_DECODER.raw_decode(response, pos)
+            except json.JSONDecodeError:
+                break
+            if not isinstance(summary, str):
+                break
+            summaries.append(summary)
+            pos = _WHITESPACE_RE.match(response, pos).end()
+            if not response.startswith(",", pos):
+                break
+            pos = _WHITESPACE_RE.match(response, pos + 1).end()
+        return summaries
+
+    @staticmethod
+    def _parse_batch(response: str, expected: int) -> Optional[List[Optional[str]]]:
+        """
+        Return the summaries in `response`, or None if it is not usable.
+
+        A reply cut off mid-array keeps the summaries it completed, padded
+        with None for the texts it did not reach.
+        """
+        if not isinstance(response, str):
+            return None
+
+        # The JSON object may be wrapped in markdown fences
+        data = decode_first_object(response)
+        if data is None:
+            summaries = Summarizer._leading_summaries(response)[:expected]
+            return summaries + [None] * (expected - len(summaries)) if summaries else None
+        if not isinstance(data, dict):
+            return None
+        summaries = data.get("summaries")
+
+        if (
+            not isinstance(summaries, list)
+            or len(summaries) != expected
+            or not all(isinstance(summary, str) for summary in summaries)
+        ):
+            return None
+        return summaries
+
+    def summarize_batch(
+        self, texts: List[str], batch_size: int = 16, max_concurrency: int = 10
+    ) -> List[Union[str, BaseException]]:
+        """
+        Summarize texts `batch_size` at a time, one LLM request per group.
+
+        Groups are sent concurrently. Texts whose group answer cannot be
+        parsed are summarized individually via `summarize_many`, so results
+        are in input order and a failed text yields its exception.
+        """
+        return asyncio.run(self.asummarize_batch(texts, batch_size, max_concurrency))
+
+    async def asummarize_batch(
+        self, texts: List[str], batch_size: int = 16, max_concurrency: int = 10
+    ) -> List[Union[str, BaseException]]:
+        """Async variant of `summarize_batch` for callers already in an event loop."""
+        keys = [_text_key(text) for text in texts]
+        known = {key: self._cached(key) for key in keys}
+
+        # Send each distinct, not yet summarized text once
+        pending = {}
+        for key, text in zip(keys, texts):
+            if known[key] is None and key not in pending:
+                pending[key] = text
+
+        if pending:
+            summaries = await self._asummarize_groups(
+                list(pending.values()), batch_size, max_concurrency
+            )
+            for key, summary in zip(pending, summaries):
+                self._remember(key, summary)
+                known[key] = summary
+
+        return [known[key] for key in keys]
+
+    async def _asummarize_groups(
+        self, texts: List[str], batch_size: int, max_concurrency: int
+    ) -> List[Union[str, BaseException]]:
+        groups = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        batch = [
+            self.llm_client.build_summarize_messages(
+                self.BATCH_SYSTEM_PREFIX, self._batch_prompt(group)
+            )
+            for group in groups
+        ]
+        max_tokens = min(BATCH_MAX_TOKENS, BATCH_TOKENS_PER_SUMMARY * max(map(len, groups)))
+        responses = await self.llm_client.achat_batch(
+            batch, max_concurrency=max_concurrency, max_tokens=max_tokens
         )
-        return summary
+
+        results: List[Union[str, BaseException, None]] = []
+        for group, response in zip(groups, responses):
+            summaries = self._parse_batch(response, len(group))
+            results.extend(summaries if summaries is not None else [None] * len(group))
+
+        missing = [i for i, summary in enumerate(results) if summary is None]
+        if missing:
+            print(f"⚠️ {len(missing)} texts could not be batch-summarized, retrying individually")
+            retried = await self.asummarize_many(
+                [texts[i] for i in missing], max_concurrency=max_concurrency
+            )
+            for i, summary in zip(missing, retried):
+                results[i] = summary
+
+        return results
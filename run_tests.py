@@ -3,56 +3,70 @@
 Test Runner for Knowledge Graph Functionality
 
 This script runs all unit tests for the knowledge graph components.
+
+Tests run under pytest, spread over one worker process per CPU when
+pytest-xdist is installed. Pass --quick to skip tests marked `integration`,
+which need API keys and running databases.
 """
 
-import unittest
 import sys
 import os
 
+import pytest
+
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-def run_all_tests():
+
+def pytest_args(quick: bool = False, dist: str = "loadfile") -> list:
+    """
+    Arguments that spread a pytest run over one worker per CPU.
+
+    The default loadfile keeps each module's tests (and their fixtures) in one
+    worker; a single module run on its own needs `dist="load"` to use more
+    than one.
+    """
+    args = []
+    try:
+        import xdist  # noqa: F401
+        args += ["-n", str(os.cpu_count() or 1), f"--dist={dist}"]
+    except ImportError:
+        pass
+    if quick:
+        args += ["-m", "not integration"]
+    return args
+
+
+def run_all_tests(quick: bool = False):
     """Run all knowledge graph tests."""
-    # Discover and run all tests
-    loader = unittest.TestLoader()
-    start_dir = 'tests'
-    suite = loader.discover(start_dir, pattern='test_*.py')
-    
-    # Create a test runner
-    runner = unittest.TextTestRunner(verbosity=2)
-    
-    # Run the tests
-    result = runner.run(suite)
-    
-    return result.wasSuccessful()
+    return pytest.main(["-v", *pytest_args(quick), "tests"]) == pytest.ExitCode.OK
 
 
-def run_specific_test(test_module):
-    """Run a specific test module."""
-    loader = unittest.TestLoader()
-    suite = loader.loadTestsFromName(f'tests.{test_module}')
-    
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    return result.wasSuccessful()
+def run_specific_test(test_module, quick: bool = False):
+    """Run a specific test module, e.g. `test_llm` or `tests.test_llm`."""
+    name = test_module.split(".")[-1]
+    path = os.path.join("tests", f"{name}.py")
+    return pytest.main(["-v", *pytest_args(quick), path]) == pytest.ExitCode.OK
 
 
 def main():
     """Main function to run tests."""
     print("🧪 Running Knowledge Graph Unit Tests")
     print("=" * 50)
+
+    argv = sys.argv[1:]
+    quick = "--quick" in argv
+    argv = [arg for arg in argv if arg != "--quick"]
     
-    if len(sys.argv) > 1:
+    if argv:
         # Run specific test module
-        test_module = sys.argv[1]
+        test_module = argv[0]
         print(f"Running specific test: {test_module}")
-        success = run_specific_test(test_module)
+        success = run_specific_test(test_module, quick)
     else:
         # Run all tests
         print("Running all knowledge graph tests...")
-        success = run_all_tests()
+        success = run_all_tests(quick)
     
     if success:
         print("\n✅ All tests passed!")
@@ -63,4 +77,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -14,12 +14,15 @@ Intended to be executed once or twice daily via:
 
 Usage:
     $ python run_daily.py
+    $ python run_daily.py --force   # re-download feeds that did not change
 """
 
 import sys
 import os
+import argparse
 import time
 import signal
+import threading
 from contextlib import contextmanager
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -35,7 +38,17 @@ class TimeoutException(Exception):
 
 @contextmanager
 def timeout(seconds):
-    """Context manager for timeout handling."""
+    """
+    Context manager for timeout handling.
+
+    SIGALRM only exists on Unix and only works in the main thread; elsewhere
+    the run is left unbounded and relies on the per-request connect/read
+    timeouts of the LLM, feed and database clients.
+    """
+    if not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
     def signal_handler(signum, frame):
         raise TimeoutException(f"Operation timed out after {seconds} seconds")
     
@@ -50,8 +63,16 @@ def timeout(seconds):
         signal.signal(signal.SIGALRM, old_handler)
 
 
-def main():
+def main(argv=None):
     """Main function with comprehensive error handling and timeouts."""
+    parser = argparse.ArgumentParser(description="Run the daily knowledge base update.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="download every feed even if it is unchanged since the last run (backfill)",
+    )
+    args = parser.parse_args(argv)
+
     load_dotenv()
 
     logging.basicConfig(
@@ -66,7 +87,7 @@ def main():
         
         # Set a timeout for the entire operation (30 minutes)
         with timeout(1800):  # 30 minutes timeout
-            update_knowledge_base()
+            update_knowledge_base(force=args.force)
         
         end_time = time.time()
         duration = end_time - start_time
@@ -0,0 +1,61 @@
+import os
+import threading
+
+import orjson
+
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_FILE = Path(os.path.expanduser("~/.cache/marketing-agent/feeds.json"))
+
+
+class FeedCache:
+    """
+    ETag / Last-Modified validators per feed URL, persisted as JSON.
+
+    Sending them back as If-None-Match / If-Modified-Since lets unchanged
+    feeds answer 304 without a body, so they are neither downloaded nor
+    parsed again.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_FILE
+        self._lock = threading.Lock()
+        self._validators: Dict[str, Dict[str, str]] = {}
+
+        try:
+            with open(self.path, "rb") as f:
+                self._validators = orjson.loads(f.read())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Could not read feed cache: {e}")
+
+    def get(self, feed_url: str) -> Dict[str, str]:
+        """Return the stored {"etag", "modified"} validators for `feed_url`."""
+        with self._lock:
+            return dict(self._validators.get(feed_url, {}))
+
+    def request_headers(self, feed_url: str) -> Dict[str, str]:
+        validators = self.get(feed_url)
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("modified"):
+            headers["If-Modified-Since"] = validators["modified"]
+        return headers
+
+    def update(self, feed_url: str, etag: Optional[str], modified: Optional[str]):
+        with self._lock:
+            self._validators[feed_url] = {
+                k: v for k, v in (("etag", etag), ("modified", modified)) if v
+            }
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "wb") as f:
+                    f.write(orjson.dumps(self._validators))
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"⚠️ Could not write feed cache: {e}")
@@ -1,12 +1,16 @@
+import os
 import asyncio
 import aiohttp
 import feedparser
 from datetime import datetime
-from typing import List, Dict, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import time
 from tqdm import tqdm
 
+from scraper.feed_cache import FeedCache
+from scraper.text_cleaner import clean_text, compile_keywords, parse_date
+
 # RSS feed URLs from the original fetcher
 RSS_FEEDS = [
     "https://blog.hubspot.com/marketing/rss.xml",
@@ -30,28 +34,81 @@ class ParallelRSSFetcher:
         feeds: List[str] = RSS_FEEDS, 
         keywords: List[str] = KEYWORDS,
         max_workers: int = 5,
-        timeout: int = 30
+        timeout: int = 30,
+        feed_cache: FeedCache = None,
+        force: bool = False
     ):
+        """
+        feed_cache: ETag / Last-Modified store used for conditional requests,
+            so unchanged feeds are skipped. Defaults to the shared cache under
+            ~/.cache/marketing-agent unless FEED_CACHE_DISABLE=1 is set.
+        force: Download every feed even if unchanged (for backfills); the
+            fresh validators are still stored on commit_validators.
+        """
         self.feeds = feeds
         self.keywords = [kw.lower() for kw in (keywords or [])]
+        self._keyword_pattern = compile_keywords(self.keywords)
         self.max_workers = max_workers
         self.timeout = timeout
+        if feed_cache is None and os.getenv("FEED_CACHE_DISABLE") != "1":
+            feed_cache = FeedCache()
+        self.feed_cache = feed_cache
+        self.force = force
+        # Validators of the feeds downloaded so far, saved to the feed cache
+        # by commit_validators once their articles are stored
+        self._validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+    def _parse_feed(self, content: bytes, feed_url: str) -> List[Dict]:
+        feed = feedparser.parse(content)
+        articles = []
+        for entry in feed.entries:
+            title = entry.get("title", "")
+            summary = entry.get("summary", "")
+            if self._is_relevant(title, summary):
+                articles.append(self._parse_entry(entry, title, summary, feed_url))
+        return articles
+
+    def _request_headers(self, feed_url: str) -> Dict[str, str]:
+        if self.feed_cache is None or self.force:
+            return {}
+        return self.feed_cache.request_headers(feed_url)
+
+    def _remember_validators(self, feed_url: str, headers):
+        self._validators[feed_url] = (headers.get("ETag"), headers.get("Last-Modified"))
+
+    def commit_validators(self):
+        """
+        Save the validators of the fetched feeds to the feed cache.
+
+        Call this only once their articles are stored: a feed whose
+        validators are saved answers 304 next time, so articles that failed
+        to store would never be fetched again.
+        """
+        if self.feed_cache is not None:
+            for feed_url, (etag, modified) in self._validators.items():
+                self.feed_cache.update(feed_url, etag, modified)
+        self._validators.clear()
 
     async def fetch_feed_async(self, session: aiohttp.ClientSession, feed_url: str) -> List[Dict]:
         """
         Fetch a single RSS feed asynchronously.
         """
         try:
-            async with session.get(feed_url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    feed = feedparser.parse(content)
-                    
-                    articles = []
-                    for entry in feed.entries:
-                        if self._is_relevant(entry):
-                            article = self._parse_entry(entry, feed_url)
-                            articles.append(article)
+            async with session.get(
+                feed_url,
+                headers=self._request_headers(feed_url),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            ) as response:
+                if response.status == 304:
+                    print(f"⏭️ Unchanged since last fetch: {feed_url}")
+                    return []
+                elif response.status == 200:
+                    # feedparser sniffs the encoding from the raw bytes
+                    content = await response.read()
+                    # Parsing is CPU-bound; keep it off the loop so the other
+                    # feeds' downloads continue meanwhile
+                    articles = await asyncio.to_thread(self._parse_feed, content, feed_url)
+                    self._remember_validators(feed_url, response.headers)
                     
                     print(f"✅ Fetched {len(articles)} articles from {feed_url}")
                     return articles
@@ -63,96 +120,113 @@ class ParallelRSSFetcher:
             print(f"❌ Error fetching {feed_url}: {e}")
             return []
 
+    async def afetch_all_feeds(self) -> List[Dict]:
+        """
+        Fetch all RSS feeds concurrently on the running event loop.
+        """
+        async with aiohttp.ClientSession() as session:
+            tasks = [self.fetch_feed_async(session, feed_url) for feed_url in self.feeds]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            
+            all_articles = []
+            for result in results:
+                if isinstance(result, list):
+                    all_articles.extend(result)
+                else:
+                    print(f"❌ Feed fetch failed: {result}")
+            
+            return all_articles
+
     def fetch_all_feeds_async(self) -> List[Dict]:
         """
         Fetch all RSS feeds concurrently using asyncio.
         """
-        async def fetch_all():
-            async with aiohttp.ClientSession() as session:
-                tasks = [self.fetch_feed_async(session, feed_url) for feed_url in self.feeds]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                all_articles = []
-                for result in results:
-                    if isinstance(result, list):
-                        all_articles.extend(result)
-                    else:
-                        print(f"❌ Feed fetch failed: {result}")
-                
-                return all_articles
-        
-        return asyncio.run(fetch_all())
+        return asyncio.run(self.afetch_all_feeds())
+
+    def __getstate__(self):
+        # Pickled into parser processes, which never touch the feed cache
+        state = self.__dict__.copy()
+        state["feed_cache"] = None
+        return state
+
+    def _download_feed(self, feed_url: str) -> Optional[Tuple[bytes, Dict]]:
+        """Return (body, headers) for a changed feed, or None."""
+        try:
+            import requests
+            response = requests.get(
+                feed_url, headers=self._request_headers(feed_url), timeout=self.timeout
+            )
+            if response.status_code == 304:
+                print(f"⏭️ Unchanged since last fetch: {feed_url}")
+                return None
+            elif response.status_code == 200:
+                return response.content, response.headers
+            else:
+                print(f"❌ Failed to fetch {feed_url}: HTTP {response.status_code}")
+                return None
+
+        except Exception as e:
+            print(f"❌ Error fetching {feed_url}: {e}")
+            return None
 
     def fetch_all_feeds_threaded(self) -> List[Dict]:
         """
         Fetch all RSS feeds using thread pool executor.
+
+        Downloads are I/O-bound and run in threads. feedparser holds the GIL
+        while parsing, so the downloaded feeds are parsed in worker processes.
         """
-        def fetch_single_feed(feed_url: str) -> List[Dict]:
-            try:
-                import requests
-                response = requests.get(feed_url, timeout=self.timeout)
-                if response.status_code == 200:
-                    feed = feedparser.parse(response.text)
-                    
-                    articles = []
-                    for entry in feed.entries:
-                        if self._is_relevant(entry):
-                            article = self._parse_entry(entry, feed_url)
-                            articles.append(article)
-                    
-                    print(f"✅ Fetched {len(articles)} articles from {feed_url}")
-                    return articles
-                else:
-                    print(f"❌ Failed to fetch {feed_url}: HTTP {response.status_code}")
-                    return []
-                    
-            except Exception as e:
-                print(f"❌ Error fetching {feed_url}: {e}")
-                return []
+        all_articles = []
+        if not self.feeds:
+            return all_articles
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_url = {executor.submit(fetch_single_feed, feed_url): feed_url 
+        parse_workers = min(len(self.feeds), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as downloads, \
+                ProcessPoolExecutor(max_workers=parse_workers) as parsers:
+            future_to_url = {downloads.submit(self._download_feed, feed_url): feed_url
                            for feed_url in self.feeds}
-            
-            all_articles = []
-            for future in tqdm(as_completed(future_to_url), total=len(self.feeds), 
-                              desc="Fetching RSS feeds"):
+
+            parse_to_url = {}
+            for future in as_completed(future_to_url):
                 url = future_to_url[future]
+                downloaded = future.result()
+                if downloaded is not None:
+                    content, headers = downloaded
+                    parse_to_url[parsers.submit(self._parse_feed, content, url)] = (url, headers)
+
+            for future in tqdm(as_completed(parse_to_url), total=len(parse_to_url),
+                              desc="Parsing RSS feeds"):
+                url, headers = parse_to_url[future]
                 try:
                     articles = future.result()
-                    all_articles.extend(articles)
                 except Exception as e:
                     print(f"❌ Exception for {url}: {e}")
-            
-            return all_articles
+                    continue
 
-    def _is_relevant(self, entry) -> bool:
+                self._remember_validators(url, headers)
+                print(f"✅ Fetched {len(articles)} articles from {url}")
+                all_articles.extend(articles)
+
+        return all_articles
+
+    def _is_relevant(self, title: str, summary: str) -> bool:
         """Check if an entry is relevant based on keywords."""
-        if not self.keywords:
+        if self._keyword_pattern is None:
             return True
-        content = (
-            f"{entry.get('title', '')} {entry.get('summary', '')}".lower()
-        )
-        return any(kw in content for kw in self.keywords)
+        content = f"{title} {summary}".lower()
+        return self._keyword_pattern.search(content) is not None
 
-    def _parse_entry(self, entry, feed_url: str) -> Dict:
+    def _parse_entry(self, entry, title: str, summary: str, feed_url: str) -> Dict:
         """Parse a feed entry into a standardized article format."""
         return {
-            "title": entry.get("title", "No Title"),
+            "title": title or "No Title",
             "link": entry.get("link", ""),
-            "published": self._parse_date(entry.get("published", "")),
-            "summary": entry.get("summary", ""),
+            "published": parse_date(entry),
+            "summary": clean_text(summary),
             "source": entry.get("source", {}).get("title", "Unknown Source"),
             "feed_url": feed_url,
         }
 
-    def _parse_date(self, date_str: str) -> str:
-        """Parse date string to ISO format."""
-        try:
-            return datetime(*entry.published_parsed[:6]).isoformat()
-        except Exception:
-            return ""
-
     def fetch(self, use_async: bool = True) -> List[Dict]:
         """
         Fetch all RSS feeds using either async or threaded approach.
@@ -182,20 +256,32 @@ class ParallelArticleProcessor:
     Process articles in parallel for summarization and storage.
     """
     
-    def __init__(self, max_workers: int = 3):
+    def __init__(self, max_workers: int = 3, batch_size: int = 16, llm_client=None):
+        """
+        llm_client: DeepSeekClient handed to the Summarizer, so callers can
+            share one configured client; a default client is created if omitted.
+        """
         self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.llm_client = llm_client
+        self._summarizer = None
+
+    @property
+    def summarizer(self):
+        """Summarizer shared by every article this processor handles."""
+        if self._summarizer is None:
+            from processor.summarizer import Summarizer
+            self._summarizer = Summarizer(llm_client=self.llm_client)
+        return self._summarizer
 
     def process_article(self, article: Dict) -> Dict:
         """
         Process a single article (summarize and prepare for storage).
         """
         try:
-            from processor.summarizer import Summarizer
-            summarizer = Summarizer()
-            
             # Create a copy to avoid modifying the original
             processed_article = article.copy()
-            processed_article["summary_processed"] = summarizer.summarize(
+            processed_article["summary_processed"] = self.summarizer.summarize(
                 article["summary"] or article["title"]
             )
             
@@ -209,23 +295,122 @@ class ParallelArticleProcessor:
     def process_articles_parallel(self, articles: List[Dict]) -> List[Dict]:
         """
         Process all articles in parallel.
+
+        Articles are summarized in groups of `batch_size` per LLM request,
+        with at most `max_workers` requests in flight at a time.
+        """
+        return asyncio.run(self.aprocess_articles(articles))
+
+    async def aprocess_articles(self, articles: List[Dict]) -> List[Dict]:
+        """
+        Async variant of `process_articles_parallel` for callers already in
+        an event loop.
         """
         print(f"🔄 Processing {len(articles)} articles in parallel...")
         start_time = time.time()
-        
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            processed_articles = list(tqdm(
-                executor.map(self.process_article, articles),
-                total=len(articles),
-                desc="Processing articles"
-            ))
-        
+
+        # Articles that already carry a stored summary are passed through
+        pending = [article for article in articles if "summary_processed" not in article]
+        try:
+            summaries = await self.summarizer.asummarize_batch(
+                [article["summary"] or article["title"] for article in pending],
+                batch_size=self.batch_size,
+                max_concurrency=self.max_workers,
+            )
+        except Exception as e:
+            print(f"❌ Error processing articles: {e}")
+            summaries = [e] * len(pending)
+
+        summaries_by_id = {id(article): summary for article, summary in zip(pending, summaries)}
+        processed_articles = []
+        for article in articles:
+            if id(article) not in summaries_by_id:
+                processed_articles.append(article)
+                continue
+
+            summary = summaries_by_id[id(article)]
+            if isinstance(summary, BaseException):
+                print(f"❌ Error processing article '{article.get('title', 'Unknown')}': {summary}")
+                # Keep original article if processing fails
+                processed_articles.append(article)
+                continue
+
+            # Create a copy to avoid modifying the original
+            processed_article = article.copy()
+            processed_article["summary_processed"] = summary
+            processed_articles.append(processed_article)
+
         end_time = time.time()
         print(f"✅ Processed {len(processed_articles)} articles in {end_time - start_time:.2f} seconds")
         
         return processed_articles
 
 
+def reuse_stored_summaries(articles: List[Dict], db) -> List[Dict]:
+    """
+    Copy `summary_processed` from MongoDB onto articles that are already stored.
+
+    Feeds repeat items across days, so this skips paying for the same summary
+    twice. Looks all links up in one query and returns the articles that
+    still need summarizing. Summaries stored from failed LLM calls
+    ("Error: ...") are not reused, so those articles are summarized again.
+    """
+    try:
+        stored = db.find_summaries([article["link"] for article in articles])
+    except Exception as e:
+        print(f"⚠️ Warning: Could not look up stored summaries: {e}")
+        stored = {}
+
+    pending = []
+    for article in articles:
+        summary = stored.get(article["link"])
+        if summary and not summary.startswith("Error:"):
+            article["summary_processed"] = summary
+        else:
+            pending.append(article)
+
+    if stored:
+        print(f"♻️ Reusing {len(articles) - len(pending)} stored summaries")
+    return pending
+
+
+def store_in_backends(articles: List[Dict], db, kg) -> Dict[str, Exception]:
+    """
+    Bulk-write `articles` to MongoDB and the Neo4j knowledge graph concurrently.
+
+    The backends are independent, so both writes are submitted before any
+    result is awaited and the phase takes as long as the slowest backend.
+    Both are idempotent per article link. The knowledge graph write also
+    creates the Article and Source nodes that GraphStorage used to write
+    separately, so Neo4j gets one node per article instead of two.
+    Returns the exception raised by each backend that failed, keyed by name.
+    """
+    writes = {
+        "MongoDB": db.save_articles,
+        "Knowledge Graph": kg.store_articles_with_knowledge_graph,
+    }
+
+    errors = {}
+    with ThreadPoolExecutor(max_workers=len(writes)) as executor:
+        futures = {name: executor.submit(write, articles) for name, write in writes.items()}
+        for name, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️ Warning: Failed to save to {name}: {e}")
+                errors[name] = e
+
+    return errors
+
+
+def all_stored(processed_articles: List[Dict], storage_results: List[Dict]) -> bool:
+    """Whether every article was summarized and stored without errors."""
+    return (
+        all("summary_processed" in article for article in processed_articles)
+        and all(result["status"] == "success" for result in storage_results)
+    )
+
+
 class ParallelStorageManager:
     """
     Store articles in parallel across different storage systems.
@@ -233,48 +418,47 @@ class ParallelStorageManager:
     
     def __init__(self, max_workers: int = 2):
         self.max_workers = max_workers
+        self._backends = None
+
+    def backends(self) -> Tuple:
+        """Return (db, kg), connecting on first use and reusing them after."""
+        if self._backends is None:
+            from storage.db_interface import MongoStorage
+            from storage.knowledge_graph import KnowledgeGraph
+
+            self._backends = (MongoStorage(), KnowledgeGraph())
+        return self._backends
 
     def store_article_parallel(self, article: Dict) -> Dict:
         """
         Store a single article across all storage systems.
         """
-        try:
-            from storage.db_interface import MongoStorage
-            from storage.graph_interface import GraphStorage
-            from storage.knowledge_graph import KnowledgeGraph
-            
-            # Store in MongoDB
-            db = MongoStorage()
-            db.save_article(article)
-            
-            # Store in Neo4j (legacy)
-            graph = GraphStorage()
-            graph.store_article(article)
-            
-            # Store in Knowledge Graph
-            kg = KnowledgeGraph()
-            kg.store_article_with_knowledge_graph(article)
-            kg.close()
-            
-            return {"status": "success", "article": article["title"]}
-            
-        except Exception as e:
-            print(f"❌ Error storing article '{article.get('title', 'Unknown')}': {e}")
-            return {"status": "error", "article": article.get("title", "Unknown"), "error": str(e)}
+        return self.store_articles_parallel([article])[0]
 
     def store_articles_parallel(self, articles: List[Dict]) -> List[Dict]:
         """
-        Store all articles in parallel.
+        Store all articles, writing to each storage system concurrently.
+
+        Each backend receives the whole list in one bulk write; `max_workers`
+        is kept for backwards compatibility.
         """
         print(f"💾 Storing {len(articles)} articles in parallel...")
         start_time = time.time()
-        
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            results = list(tqdm(
-                executor.map(self.store_article_parallel, articles),
-                total=len(articles),
-                desc="Storing articles"
-            ))
+
+        try:
+            errors = store_in_backends(articles, *self.backends())
+        except Exception as e:
+            print(f"❌ Error connecting to storage: {e}")
+            errors = {"storage": e}
+
+        if errors:
+            error = "; ".join(f"{name}: {e}" for name, e in errors.items())
+            results = [
+                {"status": "error", "article": article.get("title", "Unknown"), "error": error}
+                for article in articles
+            ]
+        else:
+            results = [{"status": "success", "article": article["title"]} for article in articles]
         
         end_time = time.time()
         print(f"✅ Stored {len(articles)} articles in {end_time - start_time:.2f} seconds")
@@ -312,6 +496,7 @@ def update_knowledge_base_parallel(
     
     if not articles:
         print("⚠️ No relevant articles found. Exiting.")
+        fetcher.commit_validators()
         return
     
     # Step 2: Process articles in parallel
@@ -326,6 +511,11 @@ def update_knowledge_base_parallel(
     from storage.vector_store import VectorStore
     vs = VectorStore()
     vs.add_documents(processed_articles)
+
+    # Unchanged feeds are skipped next time, so only mark them as seen once
+    # every article from them is stored
+    if all_stored(processed_articles, storage_results):
+        fetcher.commit_validators()
     
     end_time = time.time()
     total_time = end_time - start_time
@@ -1,6 +1,15 @@
+import os
+import logging
+import asyncio
+import aiohttp
 import feedparser
-from datetime import datetime
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional, Tuple
+
+from scraper.feed_cache import FeedCache
+from scraper.text_cleaner import clean_text, compile_keywords, parse_date
+
+
+logger = logging.getLogger(__name__)
 
 # took these RSS feed URLs from
 # https://rss.feedspot.com/marketing_rss_feeds/
@@ -16,44 +25,131 @@ KEYWORDS = ["marketing", "seo", "content", "strategy", "branding"]
 
 class RSSFetcher:
     def __init__(
-        self, feeds: List[str] = RSS_FEEDS, keywords: List[str] = KEYWORDS
+        self,
+        feeds: List[str] = RSS_FEEDS,
+        keywords: List[str] = KEYWORDS,
+        feed_cache: FeedCache = None,
+        force: bool = False,
+        max_workers: int = 4,
+        timeout: int = 15,
     ):
         self.feeds = feeds
         self.keywords = [kw.lower() for kw in (keywords or [])]
+        self._keyword_pattern = compile_keywords(self.keywords)
+        if feed_cache is None and os.getenv("FEED_CACHE_DISABLE") != "1":
+            feed_cache = FeedCache()
+        self.feed_cache = feed_cache
+        # Validators of the feeds downloaded so far, saved to the feed cache
+        # by commit_validators once their articles are stored
+        self._validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        # Re-download unchanged feeds, e.g. for a manual backfill
+        self.force = force
+        # Concurrent connections; feeds on the same host share keep-alive ones
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    async def _download(self, session: aiohttp.ClientSession, feed_url: str) -> Optional[bytes]:
+        """Return the body of a changed feed, or None."""
+        logger.debug("Fetching from: %s", feed_url)
+        headers = {}
+        if self.feed_cache is not None and not self.force:
+            headers = self.feed_cache.request_headers(feed_url)
+
+        try:
+            async with session.get(
+                feed_url, headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                if response.status == 304:
+                    print(f"⏭️ Unchanged since last fetch: {feed_url}")
+                    return None
+                if response.status != 200:
+                    print(f"❌ Failed to fetch {feed_url}: HTTP {response.status}")
+                    return None
+
+                content = await response.read()
+                self._validators[feed_url] = (
+                    response.headers.get("ETag"), response.headers.get("Last-Modified")
+                )
+                return content
+        except Exception as e:
+            print(f"❌ Error fetching {feed_url}: {e}")
+            return None
+
+    def commit_validators(self):
+        """
+        Save the validators of the downloaded feeds to the feed cache.
+
+        Call this only once their articles are stored: a feed whose
+        validators are saved answers 304 next time, so articles that failed
+        to store would never be fetched again.
+        """
+        if self.feed_cache is not None:
+            for feed_url, (etag, modified) in self._validators.items():
+                self.feed_cache.update(feed_url, etag, modified)
+        self._validators.clear()
+
+    async def _fetch_all(self) -> List[Optional[bytes]]:
+        connector = aiohttp.TCPConnector(limit=self.max_workers, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return await asyncio.gather(
+                *(self._download(session, feed_url) for feed_url in self.feeds)
+            )
 
     def fetch(self) -> List[Dict]:
-        entries = []
-        for feed_url in self.feeds:
-            print(f"Fetching from: {feed_url}")
-            feed = feedparser.parse(feed_url)
+        return list(self.iter_entries())
+
+    def iter_entries(self) -> Iterator[Dict]:
+        """
+        Yield relevant articles one at a time.
+
+        Feeds are downloaded concurrently up front; each body is then parsed
+        and released in turn, so only one parsed feed is held at a time.
+        """
+        if not self.feeds:
+            return
+
+        # Results are parsed in feed order so the output does not depend on
+        # which download finishes first
+        bodies = asyncio.run(self._fetch_all())
+
+        for i, content in enumerate(bodies):
+            if content is None:
+                continue
+            bodies[i] = None
+            # feedparser sniffs the encoding from the raw bytes
+            feed = feedparser.parse(content)
             for entry in feed.entries:
-                if self._is_relevant(entry):
-                    entries.append(self._parse_entry(entry))
-        return entries
+                title = entry.get("title", "")
+                summary = entry.get("summary", "")
+                if self._is_relevant(title, summary):
+                    yield self._parse_entry(entry, title, summary)
+
+    def fetch_batches(self, batch_size: int = 500) -> Iterator[List[Dict]]:
+        """Yield relevant articles in lists of at most `batch_size`."""
+        batch = []
+        for article in self.iter_entries():
+            batch.append(article)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
-    def _is_relevant(self, entry) -> bool:
-        if not self.keywords:
+    def _is_relevant(self, title: str, summary: str) -> bool:
+        if self._keyword_pattern is None:
             return True
-        content = (
-            f"{entry.get('title', '')} {entry.get('summary', '')}".lower()
-        )
-        return any(kw in content for kw in self.keywords)
+        content = f"{title} {summary}".lower()
+        return self._keyword_pattern.search(content) is not None
 
-    def _parse_entry(self, entry) -> Dict:
+    def _parse_entry(self, entry, title: str, summary: str) -> Dict:
         return {
-            "title": entry.get("title", "No Title"),
+            "title": title or "No Title",
             "link": entry.get("link", ""),
-            "published": self._parse_date(entry.get("published", "")),
-            "summary": entry.get("summary", ""),
+            "published": parse_date(entry),
+            "summary": clean_text(summary),
             "source": entry.get("source", {}).get("title", "Unknown Source"),
         }
 
-    def _parse_date(self, date_str: str) -> str:
-        try:
-            return datetime(*entry.published_parsed[:6]).isoformat()
-        except Exception:
-            return ""
-
 
 # Example usage
 # if __name__ == "__main__":
@@ -0,0 +1,94 @@
+import re
+import time
+
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from typing import List, Optional, Pattern
+
+
+# Feed summaries are sent to the LLM verbatim, so cap them to keep prompts
+# (and their cost) bounded.
+MAX_TEXT_CHARS = 2000
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _TextExtractor(HTMLParser):
+    """Collect the text content of an HTML fragment, skipping scripts and styles."""
+
+    _SKIP = {"script", "style"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def clean_text(raw: str, max_chars: int = MAX_TEXT_CHARS) -> str:
+    """Strip HTML from `raw`, collapse whitespace and truncate to `max_chars`."""
+    if not raw:
+        return ""
+
+    if "<" in raw or "&" in raw:
+        extractor = _TextExtractor()
+        try:
+            extractor.feed(raw)
+            extractor.close()
+            raw = " ".join(extractor.parts)
+        except Exception:
+            pass
+
+    text = _WHITESPACE.sub(" ", raw).strip()
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0]
+    return text
+
+
+def parse_date(entry) -> str:
+    """Return a feed entry's publication time in ISO format (UTC), or "" if unknown."""
+    # feedparser already parsed the date into a UTC struct_time
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if parsed:
+        return time.strftime("%Y-%m-%dT%H:%M:%S", parsed)
+
+    # Dates feedparser could not read may still be loose RFC 822
+    raw = entry.get("published") or entry.get("updated")
+    if not raw:
+        return ""
+    try:
+        published = parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return ""
+    if published.tzinfo is not None:
+        published = published.astimezone(timezone.utc)
+    return published.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def compile_keywords(keywords: List[str]) -> Optional[Pattern]:
+    """
+    Compile `keywords` into one alternation to search lowercased text with.
+
+    A single search scans the text once in C however many keywords there
+    are. The pattern is case-sensitive on purpose: lowercasing the text and
+    matching literal lowercase keywords is an order of magnitude faster in
+    `re` than an IGNORECASE alternation. Returns None when there are no
+    keywords, meaning match everything.
+    """
+    if not keywords:
+        return None
+    # Longest first, so overlapping keywords report the most specific match
+    ordered = sorted({kw.lower() for kw in keywords}, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, ordered)))
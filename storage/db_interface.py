@@ -1,20 +1,130 @@
-from pymongo import MongoClient
+import atexit
+import logging
+import threading
+
+from typing import Dict, List, Set, Tuple
+
+from pymongo import ASCENDING, MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime
 
 
+logger = logging.getLogger(__name__)
+
+
+# MongoClient is thread-safe and pools its connections, so one per URI is
+# shared by every MongoStorage in the process instead of reconnecting per
+# instance.
+_CLIENTS: Dict[str, MongoClient] = {}
+_LOCK = threading.Lock()
+
+# (uri, db_name) pairs whose indexes were already ensured by this process.
+_INDEXES_READY: Set[Tuple[str, str]] = set()
+
+# Operations per bulk_write call; keeps each request well under the 48 MB
+# message limit for large backfills.
+BULK_WRITE_BATCH_SIZE = 1000
+
+# Raised when two upserts of the same link race; the article is stored either way
+DUPLICATE_KEY_ERROR = 11000
+
+
+def get_client(uri: str) -> MongoClient:
+    with _LOCK:
+        if uri not in _CLIENTS:
+            _CLIENTS[uri] = MongoClient(uri)
+        return _CLIENTS[uri]
+
+
+@atexit.register
+def close_clients():
+    with _LOCK:
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
+
+
 class MongoStorage:
     def __init__(
         self, uri="mongodb://localhost:27017/", db_name="marketing_agent"
     ):
-        self.client = MongoClient(uri)
+        self.client = get_client(uri)
         self.db = self.client[db_name]
         self.collection = self.db["summaries"]
 
+        # Create the indexes once per database
+        if (uri, db_name) not in _INDEXES_READY:
+            self._initialize_indexes()
+            _INDEXES_READY.add((uri, db_name))
+
+    def _initialize_indexes(self):
+        """Index `link`, the key every upsert and summary lookup filters on."""
+        try:
+            self.collection.create_index([("link", ASCENDING)], unique=True)
+        except Exception as e:
+            # e.g. a collection that already holds duplicate links
+            print(f"⚠️ Warning: Could not create unique index on link: {e}")
+
     def save_article(self, article):
         # Use link as unique identifier to avoid duplicates
-        if self.collection.find_one({"link": article["link"]}):
-            print(f"🔁 Already stored: {article['title']}")
-            return
-        article["saved_at"] = datetime.utcnow().isoformat()
-        self.collection.insert_one(article)
-        print(f"💾 Stored: {article['title']}")
+        self.save_articles([article])
+
+    def find_summaries(self, links: List[str]) -> Dict[str, str]:
+        """Return {link: summary_processed} for the given links already stored."""
+        cursor = self.collection.find(
+            {"link": {"$in": list(set(links))}, "summary_processed": {"$exists": True}},
+            {"link": 1, "summary_processed": 1, "_id": 0},
+        )
+        return {doc["link"]: doc["summary_processed"] for doc in cursor}
+
+    def save_articles(
+        self, articles: List[Dict], batch_size: int = BULK_WRITE_BATCH_SIZE
+    ) -> int:
+        """
+        Store many articles with idempotent bulk writes of `batch_size` each.
+
+        Each article is upserted by link with $setOnInsert, so articles that
+        are already stored are left untouched, except for summary_processed:
+        it is always set, so a stored summary from a failed LLM call is
+        replaced once the article is summarized again.
+        Returns the number of newly inserted articles. Duplicate-key errors
+        from concurrent upserts of the same link are benign; any other write
+        error is raised once every batch was attempted, so the caller does
+        not treat the articles as stored.
+        """
+        saved_at = datetime.utcnow().isoformat()
+        operations = []
+        for article in articles:
+            article["saved_at"] = saved_at
+            document = {k: v for k, v in article.items() if k not in ("_id", "summary_processed")}
+            update = {"$setOnInsert": document}
+            if "summary_processed" in article:
+                update["$set"] = {"summary_processed": article["summary_processed"]}
+            operations.append(UpdateOne({"link": article["link"]}, update, upsert=True))
+
+        if not operations:
+            return 0
+
+        inserted = 0
+        failure = None
+        for i in range(0, len(operations), batch_size):
+            # ordered=False keeps writing past individual failures
+            try:
+                result = self.collection.bulk_write(operations[i:i + batch_size], ordered=False)
+                inserted += result.upserted_count
+            except BulkWriteError as e:
+                inserted += e.details.get("nUpserted", 0)
+                errors = [
+                    error for error in e.details.get("writeErrors", [])
+                    if error.get("code") != DUPLICATE_KEY_ERROR
+                ]
+                if errors or e.details.get("writeConcernErrors"):
+                    print(f"⚠️ Warning: Failed to store {len(errors)} articles")
+                    for error in errors:
+                        logger.debug("Failed to store article: %s", error.get("errmsg"))
+                    failure = failure or e
+
+        print(f"💾 Stored {inserted} new of {len(operations)} articles")
+        if failure is not None:
+            raise failure
+        return inserted
@@ -1,6 +1,9 @@
 import os
 
-from neo4j import GraphDatabase
+from typing import Dict, List
+from neo4j import Driver
+from storage.knowledge_graph import article_id
+from storage.neo4j_driver import get_driver, run_unwind
 
 
 class GraphStorage:
@@ -9,6 +12,7 @@ class GraphStorage:
         uri="bolt://localhost:7687",
         user: str = None,
         password: str = None,
+        driver: Driver = None,
     ):
         self.user = user
         if self.user is None:
@@ -18,28 +22,48 @@ class GraphStorage:
         if self.password is None:
             self.password = os.getenv("NEO4J_PASSWORD")
 
-        self.driver = GraphDatabase.driver(
-            uri, auth=(self.user, self.password)
-        )
+        # An injected driver is used as is; otherwise the process-wide one
+        # for these credentials, so its connection pool stays warm
+        self.driver = driver if driver is not None else get_driver(uri, self.user, self.password)
 
     def close(self):
-        self.driver.close()
+        # The driver is shared process-wide and closed at exit.
+        pass
 
     def store_article(self, article):
-        with self.driver.session() as session:
-            session.run(
-                """
-                MERGE (source:Source {name: $source})
-                MERGE (article:Article {title: $title, link: $link})
-                SET article.summary = $summary, article.published = $published
-                MERGE (source)-[:PUBLISHES]->(article)
-                """,
-                {
-                    "source": article.get("source", "Unknown"),
-                    "title": article["title"],
-                    "link": article["link"],
-                    "summary": article["summary_processed"],
-                    "published": article["published"],
-                },
-            )
-            print(f"🌐 Added to graph: {article['title']}")
+        self.store_articles([article])
+
+    def store_articles(self, articles: List[Dict]):
+        """
+        Store many articles with UNWIND queries of up to UNWIND_BATCH_SIZE rows.
+
+        Articles are merged on the id derived from their link, which the
+        knowledge graph schema constrains, so the merge is an index lookup and
+        a retitled article updates its node instead of creating a second one.
+        """
+        rows = [
+            {
+                "article_id": article_id(article["link"]),
+                "source": article.get("source", "Unknown"),
+                "title": article["title"],
+                "link": article["link"],
+                "summary": article["summary_processed"],
+                "published": article["published"],
+            }
+            for article in articles
+        ]
+        run_unwind(
+            self.driver,
+            """
+            UNWIND $rows AS row
+            MERGE (source:Source {name: row.source})
+            MERGE (article:Article {id: row.article_id})
+            SET article.link = row.link,
+                article.title = row.title,
+                article.summary = row.summary,
+                article.published = row.published
+            MERGE (source)-[:PUBLISHES]->(article)
+            """,
+            rows,
+        )
+        print(f"🌐 Added {len(rows)} articles to graph")
@@ -1,9 +1,181 @@
 import os
 import re
+import asyncio
+import logging
+import hashlib
+import threading
+
+import orjson
+
 from typing import List, Dict, Set, Tuple, Optional
-from datetime import datetime
-from neo4j import GraphDatabase
-from connectors.llm import DeepSeekClient
+from datetime import datetime, timedelta, timezone
+from connectors.llm import DeepSeekClient, decode_first_object
+from neo4j import Driver
+from storage.neo4j_driver import get_driver, run_read, run_unwind, write_session
+
+
+logger = logging.getLogger(__name__)
+
+
+COMPANY_NAMES = [
+    "Google", "Facebook", "Meta", "Twitter", "LinkedIn", "Instagram", "TikTok", "YouTube",
+    "HubSpot", "Mailchimp", "Salesforce", "Adobe", "Microsoft", "Apple", "Amazon",
+    "WordPress", "Shopify", "WooCommerce", "Squarespace", "Wix", "Canva", "Figma",
+    "Slack", "Zoom", "Trello", "Asana"
+]
+
+TOPIC_KEYWORDS = [
+    "SEO", "content marketing", "social media", "email marketing", "PPC", "analytics",
+    "conversion", "lead generation", "branding", "customer experience", "automation"
+]
+
+# Compiled once at import for the keyword fallback in _basic_entity_extraction.
+# Topics are matched as substrings of the lowercased text, without IGNORECASE.
+_COMPANY_RE = re.compile(r"\b(?:" + "|".join(COMPANY_NAMES) + r")\b", re.IGNORECASE)
+_TOPIC_RE = re.compile("|".join(re.escape(topic.lower()) for topic in TOPIC_KEYWORDS))
+
+# Fields of an extraction that must be lists when present
+_EXTRACTION_LIST_FIELDS = ("entities", "relationships", "topics", "insights", "trends")
+
+
+# Constant system prompt, so every extraction request shares a cacheable prefix
+_EXTRACTION_ROLE = (
+    "You are an expert at analyzing marketing content and extracting structured information."
+)
+
+
+SCHEMA_QUERIES = (
+    "CREATE CONSTRAINT article_id IF NOT EXISTS FOR (a:Article) REQUIRE a.id IS UNIQUE",
+    "CREATE CONSTRAINT source_name IF NOT EXISTS FOR (s:Source) REQUIRE s.name IS UNIQUE",
+    "CREATE CONSTRAINT topic_name IF NOT EXISTS FOR (t:Topic) REQUIRE t.name IS UNIQUE",
+    "CREATE CONSTRAINT entity_name IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE",
+    "CREATE INDEX article_title IF NOT EXISTS FOR (a:Article) ON (a.title)",
+    "CREATE INDEX article_published IF NOT EXISTS FOR (a:Article) ON (a.published)",
+    "CREATE FULLTEXT INDEX article_text IF NOT EXISTS FOR (a:Article) ON EACH [a.title, a.summary]",
+)
+
+# One-off data migrations, run after SCHEMA_QUERIES in a transaction of
+# their own and skipped like them once the version is recorded. They must be
+# idempotent, since a database may be set up again from an older version.
+SCHEMA_BACKFILL_QUERIES = (
+    # Trending topics read TAGGED edges, which only newer writes create;
+    # articles stored before then carry their topics as a list property
+    """
+    MATCH (article:Article)
+    WHERE article.topics IS NOT NULL
+    UNWIND article.topics AS name
+    MERGE (topic:Topic {name: name})
+    MERGE (article)-[:TAGGED]->(topic)
+    """,
+)
+
+# Bump whenever SCHEMA_QUERIES or SCHEMA_BACKFILL_QUERIES change. A
+# SchemaVersion node records the version the database was set up with, so
+# later processes check it in one read instead of re-running every statement.
+SCHEMA_VERSION = 2
+_SCHEMA_VERSION_QUERY = "MATCH (v:SchemaVersion {version: $version}) RETURN count(v) > 0 AS ready"
+
+# Characters with a meaning in Lucene query syntax
+_LUCENE_SPECIAL_RE = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+
+def _lucene_escape(text: str) -> str:
+    """Escape `text` so the fulltext index searches for it literally."""
+    return _LUCENE_SPECIAL_RE.sub(r"\\\1", text)
+
+
+def _fulltext_search(query: str) -> str:
+    """Fulltext index search string for `query`, or "" if there is nothing to search."""
+    # Words longer than 2 characters are OR-ed by the fulltext index
+    terms = [_lucene_escape(word) for word in query.lower().split() if len(word) > 2]
+    return " ".join(terms) or _lucene_escape(query.lower().strip())
+
+# One fixed query text per supported depth. Variable-length bounds cannot be
+# parameters in Cypher, so these constant strings are what let the server reuse
+# a cached plan for each depth.
+_ENTITY_NETWORK_QUERIES = {
+    max_depth: f"""
+        MATCH path = (start:Entity {{name: $entity_name}})-[*1..{max_depth}]-(connected)
+        WHERE connected:Entity OR connected:Article
+        RETURN path
+        LIMIT 100
+        """
+    for max_depth in (1, 2, 3, 5)
+}
+
+# The same per depth for several entities in one round trip; the subquery
+# keeps the 100 path limit per entity rather than for the whole batch
+_ENTITY_NETWORKS_QUERIES = {
+    max_depth: f"""
+        UNWIND $names AS name
+        CALL {{
+            WITH name
+            MATCH path = (start:Entity {{name: name}})-[*1..{max_depth}]-(connected)
+            WHERE connected:Entity OR connected:Article
+            RETURN path
+            LIMIT 100
+        }}
+        RETURN name, path
+        """
+    for max_depth in (1, 2, 3, 5)
+}
+
+# Read queries used by the insight methods. Values are always passed as
+# parameters, never interpolated, so each text is planned once by the server.
+_TRENDING_TOPICS_QUERY = """
+    MATCH (article:Article)-[:TAGGED]->(t:Topic)
+    WHERE article.published >= $since
+    RETURN t.name as topic, count(article) as frequency
+    ORDER BY frequency DESC
+    LIMIT $limit
+    """
+
+# One pattern from the indexed title out to the co-mentioning articles;
+# excluding the start node by identity rather than by title saves a
+# property read on every row a popular entity fans out to
+_RELATED_ARTICLES_QUERY = """
+    MATCH (article:Article {title: $title})-[:MENTIONS]->(entity:Entity)<-[:MENTIONS]-(other:Article)
+    WHERE other <> article
+    WITH other, count(DISTINCT entity) as shared_entities
+    ORDER BY shared_entities DESC
+    LIMIT $limit
+    RETURN other.title as title,
+           other.link as link,
+           other.summary as summary,
+           shared_entities
+    """
+
+# All graph statistics in one round trip; each independent count runs in its
+# own subquery and comes back as a single list
+_STATS_QUERY = """
+    CALL {
+        MATCH (n) WHERE NOT n:SchemaVersion
+        WITH labels(n)[0] as type, count(*) as count
+        RETURN collect({type: type, count: count}) as nodes
+    }
+    CALL {
+        MATCH ()-[r]->()
+        WITH type(r) as type, count(*) as count
+        RETURN collect({type: type, count: count}) as relationships
+    }
+    CALL {
+        MATCH (source:Source)-[:PUBLISHES]->(article:Article)
+        WITH source.name as source, count(*) as count
+        ORDER BY count DESC
+        RETURN collect({source: source, count: count}) as articles_by_source
+    }
+    RETURN nodes, relationships, articles_by_source
+    """
+
+# Databases whose constraints and indexes were already created by this process.
+_SCHEMA_READY: Set[str] = set()
+_SCHEMA_LOCK = threading.Lock()
+
+
+def article_id(link: str) -> str:
+    """Stable node id for the article at `link`, the same in every process."""
+    # The builtin hash is salted per interpreter, so it cannot identify nodes across runs
+    return f"article_{hashlib.blake2b(link.encode(), digest_size=8).hexdigest()}"
 
 
 class KnowledgeGraph:
@@ -12,6 +184,7 @@ class KnowledgeGraph:
         uri="bolt://localhost:7687",
         user: str = None,
         password: str = None,
+        driver: Driver = None,
     ):
         self.user = user
         if self.user is None:
@@ -21,36 +194,56 @@ class KnowledgeGraph:
         if self.password is None:
             self.password = os.getenv("NEO4J_PASSWORD")
 
-        self.driver = GraphDatabase.driver(
-            uri, auth=(self.user, self.password)
-        )
+        # An injected driver is used as is; otherwise the process-wide one
+        # for these credentials, so its connection pool stays warm
+        self.driver = driver if driver is not None else get_driver(uri, self.user, self.password)
         # Initialize LLM client with explicit API key
         api_key = os.getenv("DEEPSEEK_API_KEY")
         if not api_key:
             raise ValueError("DEEPSEEK_API_KEY environment variable is required")
         self.llm_client = DeepSeekClient(api_key=api_key)
         
-        # Initialize the graph schema
-        self._initialize_schema()
+        # Initialize the graph schema once per database; workers starting
+        # together wait for the first one instead of racing it
+        with _SCHEMA_LOCK:
+            if uri not in _SCHEMA_READY:
+                self._initialize_schema()
+                _SCHEMA_READY.add(uri)
 
     def close(self):
-        self.driver.close()
+        # The driver is shared process-wide and closed at exit.
+        pass
 
     def _initialize_schema(self):
         """Initialize the knowledge graph schema with constraints and indexes."""
-        with self.driver.session() as session:
-            # Create constraints and indexes for better performance
-            session.run("CREATE CONSTRAINT article_id IF NOT EXISTS FOR (a:Article) REQUIRE a.id IS UNIQUE")
-            session.run("CREATE CONSTRAINT source_name IF NOT EXISTS FOR (s:Source) REQUIRE s.name IS UNIQUE")
-            session.run("CREATE CONSTRAINT topic_name IF NOT EXISTS FOR (t:Topic) REQUIRE t.name IS UNIQUE")
-            session.run("CREATE CONSTRAINT entity_name IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE")
-            session.run("CREATE INDEX article_title IF NOT EXISTS FOR (a:Article) ON (a.title)")
-            session.run("CREATE INDEX article_published IF NOT EXISTS FOR (a:Article) ON (a.published)")
+        ready = run_read(
+            self.driver, _SCHEMA_VERSION_QUERY, {"version": SCHEMA_VERSION}, transform=lambda record: record["ready"]
+        )
+        if ready == [True]:
+            return
 
-    def extract_entities_and_relationships(self, article: Dict) -> Dict:
-        """
-        Extract entities and relationships from an article using LLM.
-        """
+        def create_schema(tx):
+            for query in SCHEMA_QUERIES:
+                tx.run(query)
+
+        def backfill(tx):
+            for query in SCHEMA_BACKFILL_QUERIES:
+                tx.run(query)
+
+        def mark_schema(tx):
+            tx.run("MERGE (:SchemaVersion {version: $version})", {"version": SCHEMA_VERSION})
+
+        # Create constraints and indexes for better performance, in one
+        # transaction; the backfill and the marker are data, so they need
+        # transactions of their own, the marker last so a failed backfill
+        # is retried by the next process
+        with write_session(self.driver) as session:
+            session.execute_write(create_schema)
+            session.execute_write(backfill)
+            session.execute_write(mark_schema)
+
+    @staticmethod
+    def _extraction_prompt(article: Dict) -> str:
         text = f"Title: {article['title']}\nSummary: {article.get('summary_processed', article.get('summary', ''))}"
         
         prompt = f"""
@@ -76,31 +269,65 @@ class KnowledgeGraph:
             "trends": ["trend1", "trend2"]
         }}
         """
-        
+        return prompt
+
+    def _parse_extraction(self, response: str, article: Dict) -> Dict:
+        """Decode the LLM's extraction, falling back to keyword matching."""
+        data = decode_first_object(response)
+        if isinstance(data, dict) and all(
+            isinstance(data.get(field, []), list) for field in _EXTRACTION_LIST_FIELDS
+        ):
+            return data
+        # Fallback to basic extraction
+        return self._basic_entity_extraction(article)
+
+    def extract_entities_and_relationships(self, article: Dict) -> Dict:
+        """
+        Extract entities and relationships from an article using LLM.
+        """
         try:
-            task_description = {
-                "task": "Analyze the marketing article and extract structured information",
-                "prompt": prompt,
-                "format": "JSON"
-            }
+            # The prompt embeds the article text, so the exact-match response
+            # cache answers re-runs over an unchanged article without a call
             response = self.llm_client.summarize(
-                agent_description="You are an expert at analyzing marketing content and extracting structured information.",
-                task_description=task_description
+                agent_description=_EXTRACTION_ROLE,
+                prompt=self._extraction_prompt(article),
+                cache=True
             )
-            
-            # Try to parse JSON from response
-            import json
-            # Extract JSON from the response (it might be wrapped in markdown)
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                # Fallback to basic extraction
-                return self._basic_entity_extraction(article)
+            return self._parse_extraction(response, article)
         except Exception as e:
-            print(f"❌ Failed to extract entities with LLM: {e}")
+            logger.warning("Failed to extract entities with LLM: %s", e)
             return self._basic_entity_extraction(article)
 
+    def extract_entities_and_relationships_many(
+        self, articles: List[Dict], max_concurrency: int = 10
+    ) -> List[Dict]:
+        """
+        Extract entities and relationships from many articles concurrently.
+
+        Results are in input order; an article whose request fails falls back
+        to keyword extraction like `extract_entities_and_relationships`.
+        """
+        return asyncio.run(self.aextract_entities_and_relationships_many(articles, max_concurrency))
+
+    async def aextract_entities_and_relationships_many(
+        self, articles: List[Dict], max_concurrency: int = 10
+    ) -> List[Dict]:
+        """Async variant of `extract_entities_and_relationships_many`."""
+        batch = [
+            self.llm_client.build_summarize_messages(_EXTRACTION_ROLE, self._extraction_prompt(article))
+            for article in articles
+        ]
+        responses = await self.llm_client.achat_batch(batch, max_concurrency, cache=True)
+
+        results = []
+        for article, response in zip(articles, responses):
+            if isinstance(response, BaseException):
+                logger.warning("Failed to extract entities with LLM: %s", response)
+                results.append(self._basic_entity_extraction(article))
+            else:
+                results.append(self._parse_extraction(response, article))
+        return results
+
     def _basic_entity_extraction(self, article: Dict) -> Dict:
         """
         Basic entity extraction using keyword matching when LLM fails.
@@ -112,25 +339,14 @@ class KnowledgeGraph:
         relationships = []
         topics = []
         
-        # Extract companies and tools
-        company_patterns = [
-            r'\b(Google|Facebook|Meta|Twitter|LinkedIn|Instagram|TikTok|YouTube|HubSpot|Mailchimp|Salesforce|Adobe|Microsoft|Apple|Amazon)\b',
-            r'\b(WordPress|Shopify|WooCommerce|Squarespace|Wix|Canva|Figma|Slack|Zoom|Trello|Asana)\b'
-        ]
-        
-        for pattern in company_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entities.append({"name": match, "type": "COMPANY"})
-        
-        # Extract topics
-        topic_keywords = [
-            "SEO", "content marketing", "social media", "email marketing", "PPC", "analytics",
-            "conversion", "lead generation", "branding", "customer experience", "automation"
-        ]
+        # Extract companies and tools, once each in order of first mention
+        for name in dict.fromkeys(_COMPANY_RE.findall(text)):
+            entities.append({"name": name, "type": "COMPANY"})
         
-        for topic in topic_keywords:
-            if topic.lower() in text.lower():
+        # Extract topics, in TOPIC_KEYWORDS order
+        found = {match.group(0) for match in _TOPIC_RE.finditer(text.lower())}
+        for topic in TOPIC_KEYWORDS:
+            if topic.lower() in found:
                 topics.append(topic)
                 entities.append({"name": topic, "type": "TOPIC"})
         
@@ -142,241 +358,302 @@ class KnowledgeGraph:
             "trends": []
         }
 
+    @staticmethod
+    def _entity_name(entity_rows: Dict[str, Dict], name: str) -> str:
+        """Return the spelling `name` was folded onto, or `name` if unseen."""
+        row = entity_rows.get(name.lower())
+        return row["name"] if row else name
+
     def store_article_with_knowledge_graph(self, article: Dict):
         """
         Store an article and build its knowledge graph representation.
         """
-        # Extract entities and relationships
-        extracted_data = self.extract_entities_and_relationships(article)
-        
-        with self.driver.session() as session:
-            # Create article node
-            article_id = f"article_{hash(article['link'])}"
-            
-            session.run("""
-                MERGE (article:Article {id: $article_id})
-                SET article.title = $title,
-                    article.link = $link,
-                    article.summary = $summary,
-                    article.published = $published,
-                    article.topics = $topics,
-                    article.insights = $insights,
-                    article.trends = $trends
-                """, {
-                    "article_id": article_id,
-                    "title": article["title"],
-                    "link": article["link"],
-                    "summary": article.get("summary_processed", article.get("summary", "")),
-                    "published": article.get("published", ""),
-                    "topics": extracted_data.get("topics", []),
-                    "insights": extracted_data.get("insights", []),
-                    "trends": extracted_data.get("trends", [])
-                })
-            
-            # Create source node and relationship
-            session.run("""
-                MERGE (source:Source {name: $source})
-                MERGE (source)-[:PUBLISHES]->(article)
-                """, {
-                    "source": article.get("source", "Unknown")
-                })
-            
-            # Create entity nodes and relationships
+        self.store_articles_with_knowledge_graph([article])
+
+    def store_articles_with_knowledge_graph(self, articles: List[Dict]):
+        """
+        Store many articles and their knowledge graph with batched UNWIND queries.
+
+        Each article becomes one Article node, keyed by a stable id derived
+        from its link and linked to its Source, so re-running is idempotent.
+        Entities are extracted for all articles concurrently before the writes.
+        """
+        article_rows, relationship_rows = [], []
+        # One row per distinct entity carrying every article that mentions it,
+        # so a recurring name (Google, SEO, ...) is merged once per batch
+        # instead of once per mention. MENTIONS edges are created rather than
+        # merged, so each (article, entity) pair must be sent only once.
+        # Names are folded case-insensitively onto the first spelling seen, so
+        # "HubSpot" and "Hubspot" become one row and one Entity node.
+        entity_rows: Dict[str, Dict] = {}
+        mentioned: Set[Tuple[str, str]] = set()
+        described: Set[Tuple[str, str, str, str]] = set()
+
+        # The LLM requests are sent concurrently, so extraction takes about
+        # as long as the slowest article instead of the sum of all of them
+        extractions = self.extract_entities_and_relationships_many(articles) if articles else []
+        for article, extracted_data in zip(articles, extractions):
+            node_id = article_id(article["link"])
+
+            article_rows.append({
+                "article_id": node_id,
+                "title": article["title"],
+                "link": article["link"],
+                "summary": article.get("summary_processed", article.get("summary", "")),
+                "published": article.get("published", ""),
+                "source": article.get("source", "Unknown"),
+                "topics": list(dict.fromkeys(extracted_data.get("topics", []))),
+                "insights": extracted_data.get("insights", []),
+                "trends": extracted_data.get("trends", [])
+            })
             for entity in extracted_data.get("entities", []):
-                try:
-                    session.run("""
-                        MERGE (entity:Entity {name: $name})
-                        ON CREATE SET entity.type = $type
-                        ON MATCH SET entity.type = CASE 
-                            WHEN entity.type IS NULL THEN $type 
-                            ELSE entity.type 
-                        END
-                        MERGE (article)-[:MENTIONS]->(entity)
-                        """, {
-                            "name": entity["name"],
-                            "type": entity["type"]
-                        })
-                except Exception as e:
-                    print(f"⚠️ Warning: Could not create entity {entity['name']}: {e}")
-                    continue
-            
-            # Create relationship nodes
+                if "name" in entity and "type" in entity:
+                    key = entity["name"].lower()
+                    if (node_id, key) in mentioned:
+                        continue
+                    mentioned.add((node_id, key))
+                    entity_rows.setdefault(key, {
+                        "name": entity["name"],
+                        "type": entity["type"],
+                        "article_ids": []
+                    })["article_ids"].append(node_id)
             for rel in extracted_data.get("relationships", []):
-                try:
-                    session.run("""
-                        MERGE (from:Entity {name: $from_name})
-                        MERGE (to:Entity {name: $to_name})
-                        MERGE (from)-[r:RELATES_TO {type: $rel_type, description: $description}]->(to)
-                        MERGE (article)-[:DESCRIBES_RELATIONSHIP]->(from)
-                        MERGE (article)-[:DESCRIBES_RELATIONSHIP]->(to)
-                        """, {
-                            "from_name": rel["from"],
-                            "to_name": rel["to"],
-                            "rel_type": rel["relationship"],
-                            "description": rel.get("description", "")
-                        })
-                except Exception as e:
-                    print(f"⚠️ Warning: Could not create relationship {rel['from']} -> {rel['to']}: {e}")
-                    continue
-            
-            print(f"🌐 Added to knowledge graph: {article['title']}")
+                if "from" in rel and "to" in rel and "relationship" in rel:
+                    from_name = self._entity_name(entity_rows, rel["from"])
+                    to_name = self._entity_name(entity_rows, rel["to"])
+                    triple = (node_id, from_name, to_name, rel["relationship"])
+                    if triple in described:
+                        continue
+                    described.add(triple)
+                    relationship_rows.append({
+                        "article_id": node_id,
+                        "from_name": from_name,
+                        "to_name": to_name,
+                        "rel_type": rel["relationship"],
+                        "description": rel.get("description", "")
+                    })
+
+        run_unwind(self.driver, """
+            UNWIND $rows AS row
+            MERGE (article:Article {id: row.article_id})
+            SET article.title = row.title,
+                article.link = row.link,
+                article.summary = row.summary,
+                article.published = row.published,
+                article.topics = row.topics,
+                article.insights = row.insights,
+                article.trends = row.trends
+            MERGE (source:Source {name: row.source})
+            MERGE (source)-[:PUBLISHES]->(article)
+            FOREACH (name IN row.topics |
+                MERGE (topic:Topic {name: name})
+                MERGE (article)-[:TAGGED]->(topic))
+            """, article_rows)
+
+        if entity_rows:
+            run_unwind(self.driver, """
+                UNWIND $rows AS row
+                MERGE (entity:Entity {name: row.name})
+                ON CREATE SET entity.type = row.type
+                ON MATCH SET entity.type = coalesce(entity.type, row.type)
+                WITH entity, row
+                UNWIND row.article_ids AS article_id
+                MATCH (article:Article {id: article_id})
+                WITH article, entity
+                WHERE NOT (article)-[:MENTIONS]->(entity)
+                CREATE (article)-[:MENTIONS]->(entity)
+                """, list(entity_rows.values()))
+
+        if relationship_rows:
+            run_unwind(self.driver, """
+                UNWIND $rows AS row
+                MATCH (article:Article {id: row.article_id})
+                MERGE (from:Entity {name: row.from_name})
+                MERGE (to:Entity {name: row.to_name})
+                MERGE (from)-[r:RELATES_TO {type: row.rel_type, description: row.description}]->(to)
+                MERGE (article)-[:DESCRIBES_RELATIONSHIP]->(from)
+                MERGE (article)-[:DESCRIBES_RELATIONSHIP]->(to)
+                """, relationship_rows)
+
+        print(f"🌐 Added {len(article_rows)} articles to knowledge graph")
 
     def query_knowledge_graph(self, query: str, limit: int = 10) -> List[Dict]:
         """
         Query the knowledge graph for relevant information.
         """
-        with self.driver.session() as session:
-            # Split query into words for more flexible matching
-            query_words = query.lower().split()
-            
-            # Build dynamic query conditions
-            conditions = []
-            for word in query_words:
-                if len(word) > 2:  # Only use words longer than 2 characters
-                    conditions.append(f"toLower(article.title) CONTAINS '{word}'")
-                    conditions.append(f"toLower(article.summary) CONTAINS '{word}'")
-                    conditions.append(f"any(topic IN article.topics WHERE toLower(topic) CONTAINS '{word}')")
-            
-            # If no conditions, use original query
-            if not conditions:
-                conditions = [
-                    f"toLower(article.title) CONTAINS toLower('{query}')",
-                    f"toLower(article.summary) CONTAINS toLower('{query}')",
-                    f"any(topic IN article.topics WHERE toLower(topic) CONTAINS toLower('{query}'))"
-                ]
-            
-            where_clause = " OR ".join(conditions)
-            
-            cypher_query = f"""
-                MATCH (article:Article)
-                WHERE {where_clause}
+        search = _fulltext_search(query)
+        if not search:
+            return []
+
+        # Limit the best matches first and aggregate entities and the source
+        # per article in subqueries, so only $limit articles are expanded
+        # and entities are not multiplied by sources before the collect
+        cypher_query = """
+            CALL db.index.fulltext.queryNodes("article_text", $search)
+            YIELD node AS article, score
+            WITH article, score
+            ORDER BY score DESC
+            LIMIT $limit
+            CALL {
+                WITH article
                 OPTIONAL MATCH (article)-[:MENTIONS]->(entity:Entity)
+                RETURN collect(DISTINCT entity.name) AS entities
+            }
+            CALL {
+                WITH article
                 OPTIONAL MATCH (source:Source)-[:PUBLISHES]->(article)
-                RETURN DISTINCT article.title as title,
-                       article.link as link,
-                       article.summary as summary,
-                       article.published as published,
-                       article.topics as topics,
-                       source.name as source,
-                       collect(DISTINCT entity.name) as entities
-                ORDER BY article.published DESC
-                LIMIT $limit
-                """
-            
-            result = session.run(cypher_query, {"limit": limit})
+                RETURN source.name AS source
+                LIMIT 1
+            }
+            RETURN article.title as title,
+                   article.link as link,
+                   article.summary as summary,
+                   article.published as published,
+                   article.topics as topics,
+                   source,
+                   entities,
+                   score
+            ORDER BY score DESC
+            """
             
-            return [dict(record) for record in result]
+        return run_read(self.driver, cypher_query, {"search": search, "limit": limit}, transform=dict)
+
+    def query_knowledge_graph_batch(self, queries: List[str], limit: int = 10) -> List[List[Dict]]:
+        """
+        Query the knowledge graph for several queries in one round trip.
+
+        Returns one result list per query, in order, each ranked and limited
+        like query_knowledge_graph.
+        """
+        rows = [
+            {"i": i, "search": search}
+            for i, search in enumerate(map(_fulltext_search, queries))
+            if search
+        ]
+        results: List[List[Dict]] = [[] for _ in queries]
+        if not rows:
+            return results
+
+        cypher_query = """
+            UNWIND $rows AS row
+            CALL {
+                WITH row
+                CALL db.index.fulltext.queryNodes("article_text", row.search)
+                YIELD node AS article, score
+                RETURN article, score
+                ORDER BY score DESC
+                LIMIT $limit
+            }
+            CALL {
+                WITH article
+                OPTIONAL MATCH (article)-[:MENTIONS]->(entity:Entity)
+                RETURN collect(DISTINCT entity.name) AS entities
+            }
+            CALL {
+                WITH article
+                OPTIONAL MATCH (source:Source)-[:PUBLISHES]->(article)
+                RETURN source.name AS source
+                LIMIT 1
+            }
+            RETURN row.i AS i,
+                   article.title as title,
+                   article.link as link,
+                   article.summary as summary,
+                   article.published as published,
+                   article.topics as topics,
+                   source,
+                   entities,
+                   score
+            ORDER BY i, score DESC
+            """
+
+        for article in run_read(self.driver, cypher_query, {"rows": rows, "limit": limit}, transform=dict):
+            results[article.pop("i")].append(article)
+
+        return results
+
+    @staticmethod
+    def _network_from_paths(entity_name: str, paths) -> Dict:
+        """Collect the distinct nodes and relationships along `paths`."""
+        nodes = set()
+        relationships = set()
+
+        for path in paths:
+            for node in path.nodes:
+                # Convert frozenset to list and get first label
+                node_type = list(node.labels)[0] if node.labels else "Unknown"
+                nodes.add((node_type, node.get("name", node.get("title", "Unknown"))))
+            for rel in path.relationships:
+                relationships.add((rel.start_node.get("name", "Unknown"),
+                               rel.end_node.get("name", "Unknown"),
+                               rel.type))
+
+        return {
+            "entity": entity_name,
+            "nodes": [{"type": node_type, "name": name} for node_type, name in nodes],
+            "relationships": [{"from": f, "to": t, "type": r} for f, t, r in relationships]
+        }
 
     def get_entity_network(self, entity_name: str, depth: int = 2) -> Dict:
         """
         Get the network of relationships around a specific entity.
         """
-        with self.driver.session() as session:
-            # Build the relationship pattern based on depth
-            if depth == 1:
-                rel_pattern = "*1"
-            elif depth == 2:
-                rel_pattern = "*1..2"
-            elif depth == 3:
-                rel_pattern = "*1..3"
-            else:
-                rel_pattern = "*1..5"  # Cap at 5 for performance
-            
-            query = f"""
-                MATCH path = (start:Entity {{name: $entity_name}})-[{rel_pattern}]-(connected)
-                WHERE connected:Entity OR connected:Article
-                RETURN path
-                LIMIT 100
-                """
-            
-            result = session.run(query, {"entity_name": entity_name})
-            
-            # Process the path results
-            nodes = set()
-            relationships = set()
+        # Depths beyond 3 are capped at 5 for performance
+        query = _ENTITY_NETWORK_QUERIES.get(depth, _ENTITY_NETWORK_QUERIES[5])
             
-            for record in result:
-                path = record["path"]
-                for node in path.nodes:
-                    # Convert frozenset to list and get first label
-                    node_type = list(node.labels)[0] if node.labels else "Unknown"
-                    nodes.add((node_type, node.get("name", node.get("title", "Unknown"))))
-                for rel in path.relationships:
-                    relationships.add((rel.start_node.get("name", "Unknown"), 
-                                   rel.end_node.get("name", "Unknown"), 
-                                   rel.type))
+        result = run_read(self.driver, query, {"entity_name": entity_name})
             
-            return {
-                "entity": entity_name,
-                "nodes": [{"type": node_type, "name": name} for node_type, name in nodes],
-                "relationships": [{"from": f, "to": t, "type": r} for f, t, r in relationships]
-            }
+        return self._network_from_paths(entity_name, (record["path"] for record in result))
+
+    def get_entity_networks(self, entity_names: List[str], depth: int = 2) -> Dict[str, Dict]:
+        """
+        Get the networks around several entities in one query.
 
-    def get_trending_topics(self, days: int = 30) -> List[Dict]:
+        Returns a network like get_entity_network for each name, keyed by name.
+        """
+        if not entity_names:
+            return {}
+
+        query = _ENTITY_NETWORKS_QUERIES.get(depth, _ENTITY_NETWORKS_QUERIES[5])
+        result = run_read(self.driver, query, {"names": list(entity_names)})
+
+        paths: Dict[str, list] = {name: [] for name in entity_names}
+        for record in result:
+            paths[record["name"]].append(record["path"])
+        return {name: self._network_from_paths(name, name_paths) for name, name_paths in paths.items()}
+
+    def get_trending_topics(self, days: int = 30, limit: int = 20) -> List[Dict]:
         """
         Get trending topics based on recent articles.
         """
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (article:Article)
-                WHERE article.published >= datetime() - duration({days: $days})
-                UNWIND article.topics as topic
-                RETURN topic, count(*) as frequency
-                ORDER BY frequency DESC
-                LIMIT 20
-                """, {"days": days})
-            
-            return [{"topic": record["topic"], "frequency": record["frequency"]} 
-                   for record in result]
+        # published is stored as a UTC ISO string, so the window start is one
+        # too; the comparison can then range-seek the article_published index
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%S")
+
+        return run_read(
+            self.driver, _TRENDING_TOPICS_QUERY, {"since": since, "limit": limit}, transform=dict
+        )
 
     def get_related_articles(self, article_title: str, limit: int = 5) -> List[Dict]:
         """
         Find articles related to a specific article based on shared entities and topics.
         """
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (article:Article {title: $title})-[:MENTIONS]->(entity:Entity)
-                MATCH (other:Article)-[:MENTIONS]->(entity)
-                WHERE other.title <> $title
-                WITH other, count(DISTINCT entity) as shared_entities
-                ORDER BY shared_entities DESC
-                LIMIT $limit
-                RETURN other.title as title,
-                       other.link as link,
-                       other.summary as summary,
-                       shared_entities
-                """, {"title": article_title, "limit": limit})
-            
-            return [dict(record) for record in result]
+        return run_read(
+            self.driver, _RELATED_ARTICLES_QUERY, {"title": article_title, "limit": limit}, transform=dict
+        )
 
     def get_knowledge_graph_stats(self) -> Dict:
         """
         Get statistics about the knowledge graph.
         """
-        with self.driver.session() as session:
-            stats = {}
-            
+        records = run_read(self.driver, _STATS_QUERY, transform=dict)
+
+        row = records[0] if records else {}
+        return {
             # Count nodes by type
-            result = session.run("""
-                MATCH (n)
-                RETURN labels(n)[0] as type, count(*) as count
-                """)
-            stats["nodes"] = {record["type"]: record["count"] for record in result}
-            
+            "nodes": {item["type"]: item["count"] for item in row.get("nodes", [])},
             # Count relationships by type
-            result = session.run("""
-                MATCH ()-[r]->()
-                RETURN type(r) as type, count(*) as count
-                """)
-            stats["relationships"] = {record["type"]: record["count"] for record in result}
-            
+            "relationships": {item["type"]: item["count"] for item in row.get("relationships", [])},
             # Count articles by source
-            result = session.run("""
-                MATCH (source:Source)-[:PUBLISHES]->(article:Article)
-                RETURN source.name as source, count(*) as count
-                ORDER BY count DESC
-                """)
-            stats["articles_by_source"] = [{"source": record["source"], "count": record["count"]} 
-                                         for record in result]
-            
-            return stats 
\ No newline at end of file
+            "articles_by_source": list(row.get("articles_by_source", [])),
+        }
@@ -1,43 +1,252 @@
-from typing import List, Dict, Optional
-from storage.knowledge_graph import KnowledgeGraph
+import re
+import time
+import threading
+
+from string import Template
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Pattern, Tuple
+from storage.knowledge_graph import COMPANY_NAMES, KnowledgeGraph
 from connectors.llm import DeepSeekClient
+from connectors.semantic_cache import SemanticCache
+
+
+# Trending topics are served from memory for up to TRENDING_TTL seconds
+# instead of re-aggregating the graph for every query. Updates in this process
+# invalidate them right away (functions.clear_query_cache); ingestion by
+# another process, e.g. the daily run, shows up once the TTL expires.
+TRENDING_TTL = 300
+TRENDING_DAYS = 30
+
+# Graph lookups a single query may run at once; the Neo4j driver pools its
+# connections, so independent lookups overlap instead of queueing.
+QUERY_WORKERS = 8
+
+# System prompts, one constant per query type. They open every request, so
+# keeping them byte-identical lets the provider reuse its cached prompt prefix
+# and keys the semantic cache consistently.
+_CLASSIFIER_ROLE = "You are an expert at classifying queries."
+_ENTITY_ROLE = "You are a marketing expert providing insights about companies and tools."
+_TOPIC_ROLE = "You are a marketing expert providing insights about marketing topics."
+_TRENDING_ROLE = "You are a marketing expert analyzing trends and developments."
+_RELATIONSHIP_ROLE = "You are a marketing expert analyzing relationships between companies and tools."
+_GENERAL_ROLE = "You are a marketing expert providing comprehensive answers to queries."
+
+# Summary prompt bodies, parsed once at import. $context is the bulleted
+# article and graph listing each _generate_*_summary assembles.
+_ENTITY_PROMPT = Template("""Based on the following information about $entity, provide a concise summary of:
+1. What $entity is known for in marketing
+2. Recent developments or mentions
+3. Key relationships with other entities
+
+Information:
+$context
+
+Provide a professional, informative summary in 2-3 paragraphs.""")
+_TOPIC_PROMPT = Template("""Based on the following information about $topic, provide a concise summary of:
+1. Current state and importance of $topic in marketing
+2. Recent developments and trends
+3. Key insights and best practices
+
+Information:
+$context
+
+Provide a professional, informative summary in 2-3 paragraphs.""")
+_TRENDING_PROMPT = Template("""Based on the following trending topics and recent articles, provide a summary of:
+1. Current marketing trends and hot topics
+2. What's gaining attention in the marketing world
+3. Key insights about recent developments
+
+Information:
+$context
+
+Provide a professional, informative summary in 2-3 paragraphs.""")
+_RELATIONSHIP_PROMPT = Template("""Based on the following information about $entities, provide a summary of:
+1. How these entities relate to each other in marketing
+2. Their roles and interactions
+3. Key insights about their relationship
+
+Information:
+$context
+
+Provide a professional, informative summary in 2-3 paragraphs.""")
+_GENERAL_PROMPT = Template("""Based on the following articles, provide a comprehensive answer to: "$query"
+
+Articles:
+$context
+
+Provide a professional, informative answer that directly addresses the query.""")
+
+# Common marketing topics and terms
+MARKETING_TERMS = [
+    "A/B testing", "AB testing", "split testing", "conversion optimization",
+    "email marketing", "social media", "content marketing", "SEO", "PPC",
+    "lead generation", "customer acquisition", "branding", "analytics",
+    "automation", "personalization", "retargeting", "influencer marketing",
+    "video marketing", "mobile marketing", "local SEO", "voice search",
+    "chatbots", "AI marketing", "machine learning", "data-driven",
+    "customer experience", "user experience", "conversion rate",
+    "click-through rate", "bounce rate", "engagement", "ROI"
+]
+
+_STOP_WORDS = {
+    'what', 'can', 'you', 'tell', 'me', 'about', 'and', 'its', 'in', 'the', 'a', 'an',
+    'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do',
+    'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'shall'
+}
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Cue words for classifying unambiguous queries without the LLM
+_TREND_RE = re.compile(r"\b(?:trend\w*|popular|latest|recent\w*|emerging)\b")
+_RELATIONSHIP_RE = re.compile(
+    r"\b(?:compar\w*|vs|versus|relat\w*|compet\w*|between|connect\w*|differ\w*)\b"
+)
+
+
+def _compile_terms(terms: List[str]) -> Pattern:
+    """
+    Compile `terms` into one pattern that finds every occurrence in lowercased text.
+
+    The alternation sits in a lookahead, so the scan tries every position and
+    overlapping terms such as "local seo" and "seo" are both reported. Terms
+    only match as whole words, so "metadata" does not mention Meta; telling
+    the company from the word "meta" is left to the caller. Word boundaries are written as lookarounds because `\b` would not match
+    after terms ending in punctuation.
+    """
+    alternation = "|".join(re.escape(term.lower()) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(f"(?=(?<!\\w)({alternation})(?!\\w))")
+
+
+def _index_terms(terms: List[str]) -> Dict[str, Tuple[int, str]]:
+    """Map each lowercased term to its (position, canonical spelling) in `terms`."""
+    return {term.lower(): (position, term) for position, term in enumerate(terms)}
+
+
+def _find_terms(pattern: Pattern, terms: Dict[str, Tuple[int, str]], text: str) -> List[str]:
+    """
+    Return the terms contained in `text`, ignoring case, in their list order.
+
+    `terms` comes from `_index_terms`, so only the matched terms are looked
+    up and sorted, however long the term list is.
+    """
+    found = set(pattern.findall(text.lower()))
+    return [term for _, term in sorted(terms[lower] for lower in found)]
+
+
+_ENTITY_RE = _compile_terms(COMPANY_NAMES)
+_ENTITY_NAMES_LOWER = _index_terms(COMPANY_NAMES)
+_MARKETING_TERM_RE = _compile_terms(MARKETING_TERMS)
+_MARKETING_TERMS_LOWER = _index_terms(MARKETING_TERMS)
 
 
 class KnowledgeGraphQuery:
-    def __init__(self):
+    # Handler for each query type _classify_query can return. Methods are
+    # named rather than bound so they resolve per instance at dispatch time.
+    _HANDLERS = {
+        "entity_search": "_handle_entity_search",
+        "topic_search": "_handle_topic_search",
+        "trending": "_handle_trending_search",
+        "relationship_search": "_handle_relationship_search",
+        "general_search": "_handle_general_search",
+    }
+
+    def __init__(self, llm_client: DeepSeekClient = None, semantic_cache: SemanticCache = None):
+        """Constructor
+
+        semantic_cache: Optional cache of generated summaries; a summary prompt
+            close enough to an earlier one reuses its answer. Identical prompts,
+            including query classification, are always served from the
+            client's exact-match response cache.
+        """
         self.kg = KnowledgeGraph()
-        # Initialize LLM client with explicit API key
-        import os
-        api_key = os.getenv("DEEPSEEK_API_KEY")
-        if not api_key:
-            raise ValueError("DEEPSEEK_API_KEY environment variable is required")
-        self.llm_client = DeepSeekClient(api_key=api_key)
+        if llm_client is None:
+            # Initialize LLM client with explicit API key
+            import os
+            api_key = os.getenv("DEEPSEEK_API_KEY")
+            if not api_key:
+                raise ValueError("DEEPSEEK_API_KEY environment variable is required")
+            llm_client = DeepSeekClient(api_key=api_key)
+        self.llm_client = llm_client
+        self.semantic_cache = semantic_cache
+        self._trending: Optional[Tuple[float, List[Dict]]] = None
+        self._trending_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="kg-query")
 
     def close(self):
+        self._executor.shutdown(wait=False)
         self.kg.close()
 
+    def _get_trending_topics(self) -> List[Dict]:
+        """Return the trending topics of the last TRENDING_DAYS, cached for TRENDING_TTL."""
+        with self._trending_lock:
+            now = time.monotonic()
+            if self._trending is None or now - self._trending[0] > TRENDING_TTL:
+                self._trending = (now, self.kg.get_trending_topics(days=TRENDING_DAYS))
+            return self._trending[1]
+
+    def invalidate_trending_cache(self):
+        """Forget the cached trending topics, e.g. after new articles are stored."""
+        with self._trending_lock:
+            self._trending = None
+
+    def _summarize(self, agent_description: str, prompt: str) -> str:
+        """Summarize through the semantic cache, falling back to the LLM."""
+        vector = None
+        if self.semantic_cache is not None:
+            messages = DeepSeekClient.build_summarize_messages(agent_description, prompt)
+            vector = self.semantic_cache.embed_messages(messages)
+            if vector is not None:
+                cached = self.semantic_cache.get(vector, agent_description)
+                if cached is not None:
+                    return cached
+
+        response = self.llm_client.summarize(
+            agent_description=agent_description, prompt=prompt, cache=True
+        )
+        if vector is not None and not response.startswith("Error"):
+            self.semantic_cache.add(vector, agent_description, response)
+        return response
+
     def natural_language_query(self, query: str) -> Dict:
         """
         Process a natural language query and return structured results.
         """
         # First, try to understand the query type
         query_type = self._classify_query(query)
-        
-        if query_type == "entity_search":
-            return self._handle_entity_search(query)
-        elif query_type == "topic_search":
-            return self._handle_topic_search(query)
-        elif query_type == "trending":
-            return self._handle_trending_search(query)
-        elif query_type == "relationship_search":
-            return self._handle_relationship_search(query)
-        else:
-            return self._handle_general_search(query)
+        handler = self._HANDLERS.get(query_type, "_handle_general_search")
+        return getattr(self, handler)(query)
+
+    def _classify_locally(self, query: str) -> Optional[str]:
+        """
+        Classify `query` by keyword rules, or return None if it is ambiguous.
+
+        Only queries with a single clear cue are answered; anything mixing
+        entities, marketing terms and trend or comparison words is left to
+        the LLM.
+        """
+        lowered = query.lower()
+        entities = self._extract_entities_from_query(query)
+        terms = _find_terms(_MARKETING_TERM_RE, _MARKETING_TERMS_LOWER, query)
+        trend = _TREND_RE.search(lowered) is not None
+        relationship = _RELATIONSHIP_RE.search(lowered) is not None
+
+        if len(entities) >= 2 and relationship and not trend:
+            return "relationship_search"
+        if len(entities) == 1 and not (terms or trend or relationship):
+            return "entity_search"
+        if trend and not (entities or terms or relationship):
+            return "trending"
+        return None
 
     def _classify_query(self, query: str) -> str:
         """
         Classify the type of query being asked.
         """
+        query_type = self._classify_locally(query)
+        if query_type is not None:
+            return query_type
+
+        # The query goes last so the static instructions form a cacheable prefix.
         classification_prompt = f"""
         Classify this marketing knowledge base query into one of these categories:
         - entity_search: Looking for information about a specific company, tool, or platform
@@ -46,20 +255,18 @@ class KnowledgeGraphQuery:
         - relationship_search: Asking about relationships between entities or how things connect
         - general_search: General information search
         
-        Query: "{query}"
-        
         Return only the category name.
+        
+        Query: "{query}"
         """
         
         try:
-            task_description = {
-                "task": "Classify the query type",
-                "prompt": classification_prompt,
-                "format": "category"
-            }
+            # Only identical queries are reused: classification prompts differ in
+            # a few words, too little to tell them apart by embedding
             response = self.llm_client.summarize(
-                agent_description="You are an expert at classifying queries.",
-                task_description=task_description
+                agent_description=_CLASSIFIER_ROLE,
+                prompt=classification_prompt,
+                cache=True
             )
             return response.strip().lower()
         except:
@@ -73,11 +280,11 @@ class KnowledgeGraphQuery:
         entity_name = self._extract_entity_name(query)
         
         if entity_name:
-            # Get entity network
-            network = self.kg.get_entity_network(entity_name)
-            
-            # Get articles mentioning this entity
-            articles = self.kg.query_knowledge_graph(entity_name, limit=10)
+            # Get the entity network and the articles mentioning it concurrently
+            network_future = self._executor.submit(self.kg.get_entity_network, entity_name)
+            articles_future = self._executor.submit(self.kg.query_knowledge_graph, entity_name, limit=10)
+            network = network_future.result()
+            articles = articles_future.result()
             
             # Generate summary
             summary = self._generate_entity_summary(entity_name, articles, network)
@@ -99,22 +306,24 @@ class KnowledgeGraphQuery:
         # Extract key terms from the query
         key_terms = self._extract_key_terms(query)
         
-        # Search for articles using key terms
-        articles = []
-        for term in key_terms:
-            term_articles = self.kg.query_knowledge_graph(term, limit=10)
-            articles.extend(term_articles)
+        # Search for articles using all key terms in one batched lookup, while
+        # the trending topics are fetched
+        trending_future = self._executor.submit(self._get_trending_topics)
+        articles = [
+            article
+            for term_articles in self.kg.query_knowledge_graph_batch(key_terms, limit=10)
+            for article in term_articles
+        ]
         
-        # Remove duplicates based on title
-        seen_titles = set()
-        unique_articles = []
+        # Remove duplicates based on title, keeping the first occurrence; a
+        # title found by several terms is the same article node
+        by_title = {}
         for article in articles:
-            if article.get('title') not in seen_titles:
-                seen_titles.add(article.get('title'))
-                unique_articles.append(article)
+            by_title.setdefault(article.get('title'), article)
+        unique_articles = list(by_title.values())
         
         # Get trending topics related to the query
-        trending = self.kg.get_trending_topics(days=30)
+        trending = trending_future.result()
         
         # Generate summary
         summary = self._generate_topic_summary(query, unique_articles, trending)
@@ -132,8 +341,9 @@ class KnowledgeGraphQuery:
         """
         Handle queries about trends and recent developments.
         """
-        trending_topics = self.kg.get_trending_topics(days=30)
-        recent_articles = self.kg.query_knowledge_graph("trend", limit=10)
+        articles_future = self._executor.submit(self.kg.query_knowledge_graph, "trend", limit=10)
+        trending_topics = self._get_trending_topics()
+        recent_articles = articles_future.result()
         
         summary = self._generate_trending_summary(trending_topics, recent_articles)
         
@@ -153,12 +363,14 @@ class KnowledgeGraphQuery:
         
         if len(entities) >= 2:
             # Find articles that mention both entities
-            articles = self.kg.query_knowledge_graph(f"{entities[0]} {entities[1]}", limit=10)
+            articles_future = self._executor.submit(
+                self.kg.query_knowledge_graph, f"{entities[0]} {entities[1]}", limit=10
+            )
             
-            # Get networks for both entities
-            networks = {}
-            for entity in entities[:2]:  # Limit to first 2 entities
-                networks[entity] = self.kg.get_entity_network(entity, depth=1)
+            # Get networks for both entities in one query, concurrently with
+            # the articles
+            networks = self.kg.get_entity_networks(entities[:2], depth=1)  # Limit to first 2 entities
+            articles = articles_future.result()
             
             summary = self._generate_relationship_summary(entities, articles, networks)
             
@@ -176,10 +388,11 @@ class KnowledgeGraphQuery:
         """
         Handle general information searches.
         """
-        articles = self.kg.query_knowledge_graph(query, limit=10)
+        articles_future = self._executor.submit(self.kg.query_knowledge_graph, query, limit=10)
         
         # Get knowledge graph stats
         stats = self.kg.get_knowledge_graph_stats()
+        articles = articles_future.result()
         
         summary = self._generate_general_summary(query, articles)
         
@@ -194,71 +407,33 @@ class KnowledgeGraphQuery:
         """
         Extract entity name from a query.
         """
-        # Common marketing entities
-        entities = [
-            "Google", "Facebook", "Meta", "Twitter", "LinkedIn", "Instagram", "TikTok",
-            "YouTube", "HubSpot", "Mailchimp", "Salesforce", "Adobe", "Microsoft",
-            "Apple", "Amazon", "WordPress", "Shopify", "WooCommerce", "Squarespace",
-            "Wix", "Canva", "Figma", "Slack", "Zoom", "Trello", "Asana"
-        ]
-        
-        query_lower = query.lower()
-        for entity in entities:
-            if entity.lower() in query_lower:
-                return entity
-        
-        return None
+        entities = self._extract_entities_from_query(query)
+        return entities[0] if entities else None
 
     def _extract_entities_from_query(self, query: str) -> List[str]:
         """
         Extract multiple entities from a query.
+
+        Entity names count only when capitalized as proper nouns, since
+        several are also common words ("meta description").
         """
-        entities = [
-            "Google", "Facebook", "Meta", "Twitter", "LinkedIn", "Instagram", "TikTok",
-            "YouTube", "HubSpot", "Mailchimp", "Salesforce", "Adobe", "Microsoft",
-            "Apple", "Amazon", "WordPress", "Shopify", "WooCommerce", "Squarespace",
-            "Wix", "Canva", "Figma", "Slack", "Zoom", "Trello", "Asana"
+        return [
+            name for name in _find_terms(_ENTITY_RE, _ENTITY_NAMES_LOWER, query)
+            if re.search(rf"(?<!\w){re.escape(name)}(?!\w)", query)
         ]
-        
-        found_entities = []
-        query_lower = query.lower()
-        for entity in entities:
-            if entity.lower() in query_lower:
-                found_entities.append(entity)
-        
-        return found_entities
 
     def _extract_key_terms(self, query: str) -> List[str]:
         """
         Extract key terms from a natural language query for topic search.
         """
-        # Common marketing topics and terms
-        marketing_terms = [
-            "A/B testing", "AB testing", "split testing", "conversion optimization",
-            "email marketing", "social media", "content marketing", "SEO", "PPC",
-            "lead generation", "customer acquisition", "branding", "analytics",
-            "automation", "personalization", "retargeting", "influencer marketing",
-            "video marketing", "mobile marketing", "local SEO", "voice search",
-            "chatbots", "AI marketing", "machine learning", "data-driven",
-            "customer experience", "user experience", "conversion rate",
-            "click-through rate", "bounce rate", "engagement", "ROI"
-        ]
-        
         # Extract terms that appear in the query
-        found_terms = []
-        query_lower = query.lower()
-        
-        for term in marketing_terms:
-            if term.lower() in query_lower:
-                found_terms.append(term)
+        found_terms = _find_terms(_MARKETING_TERM_RE, _MARKETING_TERMS_LOWER, query)
         
         # If no specific terms found, try to extract general words
         if not found_terms:
             # Remove common words and extract meaningful terms
-            import re
-            words = re.findall(r'\b\w+\b', query.lower())
-            stop_words = {'what', 'can', 'you', 'tell', 'me', 'about', 'and', 'its', 'in', 'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'shall'}
-            meaningful_words = [word for word in words if word not in stop_words and len(word) > 2]
+            words = _WORD_RE.findall(query.lower())
+            meaningful_words = [word for word in words if word not in _STOP_WORDS and len(word) > 2]
             found_terms = meaningful_words[:5]  # Limit to 5 most relevant words
         
         return found_terms
@@ -271,35 +446,19 @@ class KnowledgeGraphQuery:
             return f"No information found about {entity} in the knowledge base."
         
         # Prepare context for LLM
-        context = f"Entity: {entity}\n\n"
-        context += "Recent articles:\n"
-        for article in articles[:5]:
-            context += f"- {article['title']}\n"
+        lines = [f"Entity: {entity}", "", "Recent articles:"]
+        lines.extend(f"- {article['title']}" for article in articles[:5])
         
         if network.get("nodes"):
-            context += f"\nRelated entities: {', '.join([n['name'] for n in network['nodes'][:5]])}\n"
-        
-        prompt = f"""
-        Based on the following information about {entity}, provide a concise summary of:
-        1. What {entity} is known for in marketing
-        2. Recent developments or mentions
-        3. Key relationships with other entities
-        
-        Information:
-        {context}
+            lines += ["", f"Related entities: {', '.join(n['name'] for n in network['nodes'][:5])}"]
+        context = "\n".join(lines)
         
-        Provide a professional, informative summary in 2-3 paragraphs.
-        """
+        prompt = _ENTITY_PROMPT.substitute(entity=entity, context=context)
         
         try:
-            task_description = {
-                "task": "Generate entity summary",
-                "prompt": prompt,
-                "format": "markdown"
-            }
-            return self.llm_client.summarize(
-                agent_description="You are a marketing expert providing insights about companies and tools.",
-                task_description=task_description
+            return self._summarize(
+                agent_description=_ENTITY_ROLE,
+                prompt=prompt
             )
         except:
             return f"Found {len(articles)} articles about {entity} in the knowledge base."
@@ -311,35 +470,19 @@ class KnowledgeGraphQuery:
         if not articles:
             return f"No information found about {topic} in the knowledge base."
         
-        context = f"Topic: {topic}\n\n"
-        context += "Recent articles:\n"
-        for article in articles[:5]:
-            context += f"- {article['title']}\n"
+        lines = [f"Topic: {topic}", "", "Recent articles:"]
+        lines.extend(f"- {article['title']}" for article in articles[:5])
         
         if trending:
-            context += f"\nTrending topics: {', '.join([t['topic'] for t in trending[:5]])}\n"
-        
-        prompt = f"""
-        Based on the following information about {topic}, provide a concise summary of:
-        1. Current state and importance of {topic} in marketing
-        2. Recent developments and trends
-        3. Key insights and best practices
+            lines += ["", f"Trending topics: {', '.join(t['topic'] for t in trending[:5])}"]
+        context = "\n".join(lines)
         
-        Information:
-        {context}
-        
-        Provide a professional, informative summary in 2-3 paragraphs.
-        """
+        prompt = _TOPIC_PROMPT.substitute(topic=topic, context=context)
         
         try:
-            task_description = {
-                "task": "Generate topic summary",
-                "prompt": prompt,
-                "format": "markdown"
-            }
-            return self.llm_client.summarize(
-                agent_description="You are a marketing expert providing insights about marketing topics.",
-                task_description=task_description
+            return self._summarize(
+                agent_description=_TOPIC_ROLE,
+                prompt=prompt
             )
         except:
             return f"Found {len(articles)} articles about {topic} in the knowledge base."
@@ -351,35 +494,21 @@ class KnowledgeGraphQuery:
         if not trending:
             return "No trending topics found in the recent data."
         
-        context = "Top trending topics:\n"
-        for topic in trending[:10]:
-            context += f"- {topic['topic']} (mentioned {topic['frequency']} times)\n"
+        lines = ["Top trending topics:"]
+        lines.extend(
+            f"- {topic['topic']} (mentioned {topic['frequency']} times)" for topic in trending[:10]
+        )
         
-        context += "\nRecent articles:\n"
-        for article in articles[:5]:
-            context += f"- {article['title']}\n"
+        lines += ["", "Recent articles:"]
+        lines.extend(f"- {article['title']}" for article in articles[:5])
+        context = "\n".join(lines)
         
-        prompt = f"""
-        Based on the following trending topics and recent articles, provide a summary of:
-        1. Current marketing trends and hot topics
-        2. What's gaining attention in the marketing world
-        3. Key insights about recent developments
-        
-        Information:
-        {context}
-        
-        Provide a professional, informative summary in 2-3 paragraphs.
-        """
+        prompt = _TRENDING_PROMPT.substitute(context=context)
         
         try:
-            task_description = {
-                "task": "Generate trending summary",
-                "prompt": prompt,
-                "format": "markdown"
-            }
-            return self.llm_client.summarize(
-                agent_description="You are a marketing expert analyzing trends and developments.",
-                task_description=task_description
+            return self._summarize(
+                agent_description=_TRENDING_ROLE,
+                prompt=prompt
             )
         except:
             return f"Found {len(trending)} trending topics in the recent data."
@@ -391,37 +520,21 @@ class KnowledgeGraphQuery:
         if not articles:
             return f"No information found about the relationship between {', '.join(entities)}."
         
-        context = f"Entities: {', '.join(entities)}\n\n"
-        context += "Related articles:\n"
-        for article in articles[:5]:
-            context += f"- {article['title']}\n"
+        lines = [f"Entities: {', '.join(entities)}", "", "Related articles:"]
+        lines.extend(f"- {article['title']}" for article in articles[:5])
         
-        context += "\nEntity networks:\n"
+        lines += ["", "Entity networks:"]
         for entity, network in networks.items():
             if network.get("nodes"):
-                context += f"{entity} connects to: {', '.join([n['name'] for n in network['nodes'][:3]])}\n"
-        
-        prompt = f"""
-        Based on the following information about {', '.join(entities)}, provide a summary of:
-        1. How these entities relate to each other in marketing
-        2. Their roles and interactions
-        3. Key insights about their relationship
+                lines.append(f"{entity} connects to: {', '.join(n['name'] for n in network['nodes'][:3])}")
+        context = "\n".join(lines)
         
-        Information:
-        {context}
-        
-        Provide a professional, informative summary in 2-3 paragraphs.
-        """
+        prompt = _RELATIONSHIP_PROMPT.substitute(entities=', '.join(entities), context=context)
         
         try:
-            task_description = {
-                "task": "Generate relationship summary",
-                "prompt": prompt,
-                "format": "markdown"
-            }
-            return self.llm_client.summarize(
-                agent_description="You are a marketing expert analyzing relationships between companies and tools.",
-                task_description=task_description
+            return self._summarize(
+                agent_description=_RELATIONSHIP_ROLE,
+                prompt=prompt
             )
         except:
             return f"Found {len(articles)} articles about the relationship between {', '.join(entities)}."
@@ -433,29 +546,16 @@ class KnowledgeGraphQuery:
         if not articles:
             return f"No information found about '{query}' in the knowledge base."
         
-        context = f"Query: {query}\n\n"
-        context += "Relevant articles:\n"
-        for article in articles[:5]:
-            context += f"- {article['title']}\n"
-        
-        prompt = f"""
-        Based on the following articles, provide a comprehensive answer to: "{query}"
+        lines = [f"Query: {query}", "", "Relevant articles:"]
+        lines.extend(f"- {article['title']}" for article in articles[:5])
+        context = "\n".join(lines)
         
-        Articles:
-        {context}
-        
-        Provide a professional, informative answer that directly addresses the query.
-        """
+        prompt = _GENERAL_PROMPT.substitute(query=query, context=context)
         
         try:
-            task_description = {
-                "task": "Generate general summary",
-                "prompt": prompt,
-                "format": "markdown"
-            }
-            return self.llm_client.summarize(
-                agent_description="You are a marketing expert providing comprehensive answers to queries.",
-                task_description=task_description
+            return self._summarize(
+                agent_description=_GENERAL_ROLE,
+                prompt=prompt
             )
         except:
             return f"Found {len(articles)} articles related to '{query}' in the knowledge base."
@@ -465,7 +565,7 @@ class KnowledgeGraphQuery:
         Get insights and analytics from the knowledge graph.
         """
         stats = self.kg.get_knowledge_graph_stats()
-        trending = self.kg.get_trending_topics(days=30)
+        trending = self._get_trending_topics()
         
         return {
             "statistics": stats,
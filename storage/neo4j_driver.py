@@ -0,0 +1,91 @@
+import os
+import atexit
+import threading
+
+from typing import Any, Callable, Dict, List, Tuple
+from neo4j import WRITE_ACCESS, Driver, GraphDatabase, Record, Result, ResultSummary, RoutingControl, Session
+
+
+# Drivers are thread-safe and hold their own connection pool, so one per
+# (uri, user) is shared by every KnowledgeGraph, KnowledgeGraphQuery and
+# GraphStorage in the process instead of reconnecting per instance.
+_DRIVERS: Dict[Tuple[str, str, str], Driver] = {}
+_LOCK = threading.Lock()
+
+# Rows per UNWIND transaction; keeps a large ingestion run from building one
+# huge transaction in server memory.
+UNWIND_BATCH_SIZE = 1000
+
+# Naming the database saves the driver a home database lookup per query;
+# the routing mode lets a cluster send reads to its followers.
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+
+
+def get_driver(uri: str, user: str, password: str) -> Driver:
+    key = (uri, user, password)
+    with _LOCK:
+        if key not in _DRIVERS:
+            _DRIVERS[key] = GraphDatabase.driver(
+                uri,
+                auth=(user, password),
+                max_connection_pool_size=50,
+                connection_acquisition_timeout=30,
+                keep_alive=True,
+            )
+        return _DRIVERS[key]
+
+
+def write_session(driver: Driver) -> Session:
+    return driver.session(database=NEO4J_DATABASE, default_access_mode=WRITE_ACCESS)
+
+
+def _consume(result: Result) -> ResultSummary:
+    return result.consume()
+
+
+def run_unwind(driver: Driver, query: str, rows: List[Dict], batch_size: int = UNWIND_BATCH_SIZE):
+    """Run an `UNWIND $rows AS row ...` query over `rows` in batch_size chunks."""
+    # execute_query retries each chunk on transient errors such as deadlocks
+    # between concurrent writers, and its bookmarks make every chunk see the
+    # ones written before it
+    for i in range(0, len(rows), batch_size):
+        driver.execute_query(
+            query,
+            {"rows": rows[i:i + batch_size]},
+            database_=NEO4J_DATABASE,
+            routing_=RoutingControl.WRITE,
+            result_transformer_=_consume,
+        )
+
+
+def run_read(
+    driver: Driver, query: str, params: Dict = None, transform: Callable[[Record], Any] = None
+) -> List:
+    """
+    Run a read-only query in a retried transaction and return its records.
+
+    `transform` (e.g. `dict`) is applied to each record as it streams off the
+    cursor, so the rows are materialized once, in their final form. Results
+    cannot outlive the transaction, which may be retried, so they are always
+    returned as a list.
+    """
+    transform = transform or _identity
+    return driver.execute_query(
+        query,
+        params or {},
+        database_=NEO4J_DATABASE,
+        routing_=RoutingControl.READ,
+        result_transformer_=lambda result: [transform(record) for record in result],
+    )
+
+
+def _identity(record: Record) -> Record:
+    return record
+
+
+@atexit.register
+def close_drivers():
+    with _LOCK:
+        for driver in _DRIVERS.values():
+            driver.close()
+        _DRIVERS.clear()
@@ -1,16 +1,84 @@
+import base64
+import faiss
 import numpy as np
+import orjson
 import os
 import pickle
+import asyncio
+import threading
 import openai
-from typing import List, Dict
-from sklearn.neighbors import NearestNeighbors
+from openai import AsyncOpenAI
+from collections import OrderedDict
+from typing import List, Dict, Optional
 from pathlib import Path
 
+from connectors.llm import LLM_MAX_RETRIES
+
+
+EMBEDDING_DIM = 1536
+
+# Recent search queries whose embeddings are kept in memory; repeated
+# questions in a session skip the embeddings round trip.
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+
+# HNSW graph parameters: neighbours per node, and candidate list sizes used
+# while inserting and searching. Higher ef values trade speed for recall.
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Quantized stores of SQ_MIN_TRAIN vectors or more keep the HNSW graph but
+# store 8-bit codes per dimension, half of fp16, trained on the stored
+# vectors. The trained range is widened by SQ_RANGE_MARGIN on each side so
+# vectors added later are rarely clipped.
+SQ_MIN_TRAIN = 1000
+SQ_RANGE_MARGIN = 0.1
+
+# IVF-PQ parameters for quantized stores: coarse cells, cells probed per
+# search, and 64 sub-quantizers of 8 bits, i.e. 64 bytes per vector instead
+# of 6 KB. Training needs a few dozen vectors per cell, so smaller stores
+# keep the exact HNSW index until they reach IVF_MIN_TRAIN vectors.
+IVF_NLIST = 256
+IVF_NPROBE = 8
+PQ_M = 64
+PQ_NBITS = 8
+IVF_MIN_TRAIN = IVF_NLIST * 39
+
+# The embeddings endpoint accepts up to 2048 inputs per request.
+EMBEDDING_BATCH_SIZE = 512
+
+# Vectors are kept and saved as half precision: it halves the index on disk
+# and the memory a search scans, and the embeddings are unit-norm, so the
+# rounding does not change which neighbours are closest in practice.
+VECTOR_DTYPE = np.float16
+
+
+def _decode_embedding(data: str) -> np.ndarray:
+    """Decode a base64 embedding straight into a float32 array."""
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32)
+
 
 class VectorStore:
     def __init__(
-        self, index_path: Path = None, model="text-embedding-3-small"
+        self,
+        index_path: Path = None,
+        model="text-embedding-3-small",
+        mmap: bool = None,
+        quantized: bool = None,
     ):
+        """
+        mmap: Memory-map the saved vectors read-only instead of reading them
+            into memory, so processes share the OS page cache and only touch
+            the pages a search needs. Defaults to VECTOR_STORE_MMAP (on unless
+            set to 0). This applies to the saved search index as well. Added
+            documents are kept in memory until the next save.
+        quantized: Store 8-bit codes in the HNSW index once the store holds
+            SQ_MIN_TRAIN vectors, and search a product-quantized IVF index
+            from IVF_MIN_TRAIN vectors, trading some recall for a much
+            smaller and faster index. Defaults to VECTOR_STORE_QUANTIZED (off
+            unless set to 1). The full vectors are still saved, so the index
+            can be rebuilt either way.
+        """
 
         self.index_path = index_path
         if self.index_path is None:
@@ -19,31 +87,278 @@ class VectorStore:
             )
 
         self.model = model
-        self.vectors = np.array([]).reshape(0, 1536)  # 1536 dims for text-embedding-3-small
+        if mmap is None:
+            mmap = os.getenv("VECTOR_STORE_MMAP", "1") != "0"
+        self.mmap = mmap
+        if quantized is None:
+            quantized = os.getenv("VECTOR_STORE_QUANTIZED") == "1"
+        self.quantized = quantized
+        self.vectors = np.empty((0, 1536), dtype=VECTOR_DTYPE)  # 1536 dims for text-embedding-3-small
         self.metadata = []
-        self.nn = NearestNeighbors(n_neighbors=5, metric='euclidean')
+        self.index = self._new_index()
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
+        # The existing index is loaded on first use, so processes that never
+        # search or add documents don't pay for reading it
+        self._loaded = False
+        self._loading = False
+        self._load_lock = threading.RLock()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            # _load reads the properties below; those reads see the state
+            # being loaded instead of starting another load
+            if self._loading:
+                return
+            self._loading = True
+            try:
+                self._load()
+            finally:
+                self._loaded = True
+
+    @property
+    def metadata(self) -> List[Dict]:
+        self._ensure_loaded()
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, metadata: List[Dict]):
+        self._metadata = metadata
+
+    @property
+    def index(self) -> faiss.Index:
+        self._ensure_loaded()
+        return self._index
 
-        # Load existing index if available
-        self._load()
+    @index.setter
+    def index(self, index: faiss.Index):
+        self._index = index
 
-    def get_embedding(self, text: str) -> List[float]:
+    @property
+    def vectors(self) -> np.ndarray:
+        """The stored vectors, a view of the filled rows of the buffer."""
+        self._ensure_loaded()
+        return self._buffer[:self._size]
+
+    @vectors.setter
+    def vectors(self, vectors: np.ndarray):
+        self._buffer = vectors
+        self._size = len(vectors)
+
+    def _ensure_capacity(self, n: int):
+        """
+        Make room for `n` more vectors, doubling the buffer when it is full.
+
+        Growing geometrically copies each vector O(1) times on average, where
+        stacking every batch onto the existing array copied all of them on
+        every insert. A memory-mapped or full precision buffer is replaced on
+        its first update, since it can't be written to in place.
+        """
+        capacity = len(self._buffer)
+        if (
+            self._size + n <= capacity
+            and self._buffer.dtype == VECTOR_DTYPE
+            and self._buffer.flags.writeable
+        ):
+            return
+
+        buffer = np.empty(
+            (max(2 * capacity, self._size + n), EMBEDDING_DIM), dtype=VECTOR_DTYPE
+        )
+        buffer[:self._size] = self._buffer[:self._size]
+        self._buffer = buffer
+
+    @staticmethod
+    def _new_index() -> faiss.Index:
+        """
+        Empty approximate nearest neighbour index over half precision vectors.
+
+        Searching an HNSW graph visits O(log N) vectors instead of scanning all
+        of them, and new vectors are inserted without rebuilding. Vectors are
+        normalized before they are added or searched, so the inner product is
+        their cosine similarity.
+        """
+        index = faiss.IndexHNSWSQ(
+            EMBEDDING_DIM, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
+
+    @staticmethod
+    def _new_sq8_index() -> faiss.Index:
+        """Untrained HNSW index over 8-bit codes, searched like the fp16 one."""
+        index = faiss.IndexHNSWSQ(
+            EMBEDDING_DIM, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        sq = faiss.downcast_index(index.storage).sq
+        sq.rangestat = faiss.ScalarQuantizer.RS_minmax
+        sq.rangestat_arg = SQ_RANGE_MARGIN
+        return index
+
+    @staticmethod
+    def _new_quantized_index() -> faiss.Index:
+        """Untrained IVF-PQ index, searched by inner product like the HNSW one."""
+        quantizer = faiss.IndexFlatIP(EMBEDDING_DIM)
+        index = faiss.IndexIVFPQ(
+            quantizer, EMBEDDING_DIM, IVF_NLIST, PQ_M, PQ_NBITS, faiss.METRIC_INNER_PRODUCT
+        )
+        index.nprobe = IVF_NPROBE
+        return index
+
+    @staticmethod
+    def _index_kind(index: faiss.Index) -> str:
+        """Return "ivfpq", "sq8" or "fp16" for the kind of search index `index` is."""
+        if isinstance(index, faiss.IndexIVFPQ):
+            return "ivfpq"
+        storage = faiss.downcast_index(index.storage) if isinstance(index, faiss.IndexHNSW) else None
+        if isinstance(storage, faiss.IndexScalarQuantizer) and storage.sq.qtype == faiss.ScalarQuantizer.QT_8bit:
+            return "sq8"
+        return "fp16"
+
+    def _wanted_index_kind(self) -> str:
+        """The kind of search index this store should have at its current size."""
+        if self.quantized and len(self.vectors) >= IVF_MIN_TRAIN:
+            return "ivfpq"
+        if self.quantized and len(self.vectors) >= SQ_MIN_TRAIN:
+            return "sq8"
+        return "fp16"
+
+    def _build_index(self) -> faiss.Index:
+        """Build the search index over all stored vectors."""
+        vectors = np.array(self.vectors, dtype=np.float32)
+        faiss.normalize_L2(vectors)
+
+        kind = self._wanted_index_kind()
+        if kind == "ivfpq":
+            index = self._new_quantized_index()
+            index.train(vectors)
+        elif kind == "sq8":
+            index = self._new_sq8_index()
+            index.train(vectors)
+        else:
+            index = self._new_index()
+        if len(vectors) > 0:
+            index.add(vectors)
+        return index
+
+    def get_embedding(self, text: str) -> np.ndarray:
         try:
-            response = openai.embeddings.create(input=[text], model=self.model)
-            embedding = response.data[0].embedding
+            # Embeddings are requested as base64 and decoded into an array
+            # directly, skipping a Python list of 1536 floats per text
+            response = openai.embeddings.create(
+                input=[text], model=self.model, encoding_format="base64"
+            )
+            embedding = _decode_embedding(response.data[0].embedding)
             if len(embedding) != 1536:
                 raise ValueError("Unexpected embedding size.")
             return embedding
         except Exception as e:
             print(f"❌ Failed to embed: {text[:60]}... — {e}")
-            return []
+            return np.empty(0, dtype=np.float32)
+
+    def get_query_embedding(self, query: str) -> np.ndarray:
+        """Embed a search query, reusing the embedding of a recent identical query."""
+        with self._query_cache_lock:
+            embedding = self._query_cache.get(query)
+            if embedding is not None:
+                self._query_cache.move_to_end(query)
+                return embedding
+
+        embedding = self.get_embedding(query)
+        self._remember_query_embedding(query, embedding)
+        return embedding
+
+    def get_query_embeddings(self, queries: List[str]) -> List[np.ndarray]:
+        """Embed several search queries, requesting the uncached ones in one batch."""
+        with self._query_cache_lock:
+            embeddings = {
+                query: self._query_cache[query] for query in queries if query in self._query_cache
+            }
+            for query in embeddings:
+                self._query_cache.move_to_end(query)
+
+        missing = [query for query in dict.fromkeys(queries) if query not in embeddings]
+        if missing:
+            for query, embedding in zip(missing, self.get_embeddings(missing)):
+                self._remember_query_embedding(query, embedding)
+                embeddings[query] = embedding
+        return [embeddings[query] for query in queries]
+
+    def _remember_query_embedding(self, query: str, embedding: np.ndarray):
+        # Failed calls come back empty and are retried next time
+        if len(embedding):
+            with self._query_cache_lock:
+                self._query_cache[query] = embedding
+                if len(self._query_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+
+    def get_embeddings(
+        self, texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE
+    ) -> List[np.ndarray]:
+        """
+        Embed many texts with one request per `batch_size` texts.
+
+        Batches are sent concurrently. A batch that fails is retried one text
+        at a time, so a single bad input only loses its own embedding.
+        """
+        batches = [
+            texts[i:i + batch_size]
+            for i in range(0, len(texts), batch_size)
+        ]
+        try:
+            results = asyncio.run(self._aembed_batches(batches))
+        except Exception as e:
+            results = [e] * len(batches)
+
+        embeddings = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                print(f"⚠️ Batch embedding failed, embedding one by one: {result}")
+                embeddings.extend(self.get_embedding(text) for text in batch)
+            else:
+                embeddings.extend(result)
+        return embeddings
+
+    async def _aembed_batches(self, batches: List[List[str]]) -> list:
+        # Concurrent batches are the calls most likely to hit 429s; the SDK
+        # backs off and retries them before a batch falls back to single texts
+        async with AsyncOpenAI(max_retries=LLM_MAX_RETRIES) as client:
+
+            async def embed(batch: List[str]) -> List[np.ndarray]:
+                response = await client.embeddings.create(
+                    input=batch, model=self.model, encoding_format="base64"
+                )
+                return [
+                    _decode_embedding(d.embedding)
+                    for d in sorted(response.data, key=lambda d: d.index)
+                ]
 
-    def add_documents(self, docs: List[Dict]):
+            return await asyncio.gather(
+                *(embed(batch) for batch in batches), return_exceptions=True
+            )
+
+    def add_documents(self, docs: List[Dict], batch_size: int = EMBEDDING_BATCH_SIZE):
+        self._ensure_loaded()
         vectors = []
         clean_metadata = []
 
-        for doc in docs:
-            emb = self.get_embedding(doc["summary_processed"])
+        # The API rejects empty inputs, which would fail a whole batch
+        docs = [doc for doc in docs if doc.get("summary_processed")]
+        # Identical summaries, e.g. a story syndicated by several feeds, are
+        # embedded once
+        unique_texts = list(dict.fromkeys(doc["summary_processed"] for doc in docs))
+        unique_embeddings = dict(zip(
+            unique_texts, self.get_embeddings(unique_texts, batch_size=batch_size)
+        ))
+        embeddings = [unique_embeddings[doc["summary_processed"]] for doc in docs]
 
+        for doc, emb in zip(docs, embeddings):
             if len(emb) != 1536:
                 print(
                     f"⚠️ Skipping invalid embedding for: {doc.get('title', 'Unknown')}"
@@ -54,19 +369,20 @@ class VectorStore:
             clean_metadata.append(doc)
 
         if vectors:
-            vectors_np = np.array(vectors).astype("float32")
+            vectors_np = np.array(vectors, dtype=np.float32)
+            faiss.normalize_L2(vectors_np)
             
-            # Add to existing vectors
-            if len(self.vectors) == 0:
-                self.vectors = vectors_np
-            else:
-                self.vectors = np.vstack([self.vectors, vectors_np])
+            self._ensure_capacity(len(vectors_np))
+            self._buffer[self._size:self._size + len(vectors_np)] = vectors_np
+            self._size += len(vectors_np)
             
             self.metadata.extend(clean_metadata)
-            
-            # Retrain the nearest neighbors model
-            if len(self.vectors) > 0:
-                self.nn.fit(self.vectors)
+            if self._index_kind(self.index) != self._wanted_index_kind():
+                # Enough vectors to train the next quantizer: switch over once
+                print(f"🗜️ Training quantized index on {len(self.vectors)} vectors.")
+                self.index = self._build_index()
+            else:
+                self.index.add(vectors_np)
             
             self._save()
             print(
@@ -75,31 +391,98 @@ class VectorStore:
         else:
             print("❌ No valid embeddings to add.")
 
-    def search(self, query: str, top_k: int = 5) -> List[Dict]:
+    def _search_params(self, ef_search: Optional[int], nprobe: Optional[int]):
+        """Per-call FAISS search parameters, or None to use the index's own."""
+        if isinstance(self.index, faiss.IndexIVF):
+            return None if nprobe is None else faiss.SearchParametersIVF(nprobe=nprobe)
+        if isinstance(self.index, faiss.IndexHNSW):
+            return None if ef_search is None else faiss.SearchParametersHNSW(efSearch=ef_search)
+        return None
+
+    def search(
+        self, query: str, top_k: int = 5, ef_search: int = None, nprobe: int = None
+    ) -> List[Dict]:
+        """
+        Return the metadata of the top_k documents closest to `query`.
+
+        ef_search: HNSW candidate list size for this search; defaults to
+            HNSW_EF_SEARCH. Small top_k values keep their recall with a
+            smaller list, which visits fewer vectors.
+        nprobe: IVF cells probed for this search once the store is IVF-PQ;
+            defaults to IVF_NPROBE.
+        """
         if len(self.vectors) == 0:
             return []
         
-        q_vector = np.array([self.get_embedding(query)]).astype("float32")
-        distances, indices = self.nn.kneighbors(q_vector, n_neighbors=min(top_k, len(self.vectors)))
-        return [self.metadata[i] for i in indices[0]]
+        q_vector = np.array([self.get_query_embedding(query)], dtype=np.float32)
+        if q_vector.shape != (1, EMBEDDING_DIM):
+            return []
+        faiss.normalize_L2(q_vector)
+        distances, indices = self.index.search(
+            q_vector, min(top_k, self.index.ntotal), params=self._search_params(ef_search, nprobe)
+        )
+        return [self.metadata[i] for i in indices[0] if i >= 0]
+
+    def search_batch(
+        self, queries: List[str], top_k: int = 5, ef_search: int = None, nprobe: int = None
+    ) -> List[List[Dict]]:
+        """
+        Search for several queries with one index search.
+
+        Returns one result list per query, in order, each like search's. A
+        query whose embedding failed gets an empty list.
+        """
+        results: List[List[Dict]] = [[] for _ in queries]
+        if not queries or len(self.vectors) == 0:
+            return results
+
+        embeddings = self.get_query_embeddings(queries)
+        rows = [i for i, embedding in enumerate(embeddings) if len(embedding) == EMBEDDING_DIM]
+        if not rows:
+            return results
+
+        q_vectors = np.array([embeddings[i] for i in rows], dtype=np.float32)
+        faiss.normalize_L2(q_vectors)
+        distances, indices = self.index.search(
+            q_vectors, min(top_k, self.index.ntotal), params=self._search_params(ef_search, nprobe)
+        )
+        for i, row in zip(rows, indices):
+            results[i] = [self.metadata[j] for j in row if j >= 0]
+        return results
 
     def _save(self):
         if not self.index_path.exists():
             self.index_path.mkdir(parents=True)
 
-        # Save vectors as numpy array
-        np.save(Path(self.index_path, "vectors.npy"), self.vectors)
+        # Write to temporary files and rename them into place, so processes
+        # that have the previous vectors memory-mapped keep a valid file.
+        vectors_file = Path(self.index_path, "vectors.npy")
+        with open(vectors_file.with_suffix(".tmp"), "wb") as f:
+            np.save(f, self.vectors)
+        os.replace(vectors_file.with_suffix(".tmp"), vectors_file)
 
-        with open(Path(self.index_path, "metadata.pkl"), "wb") as f:
-            pickle.dump(self.metadata, f)
+        metadata_file = Path(self.index_path, "metadata.json")
+        with open(metadata_file.with_suffix(".tmp"), "wb") as f:
+            f.write(orjson.dumps(self.metadata, default=str))
+        os.replace(metadata_file.with_suffix(".tmp"), metadata_file)
+        # Superseded by metadata.json once the store is saved again
+        Path(self.index_path, "metadata.pkl").unlink(missing_ok=True)
+
+        # The graph is saved too, so loading does not rebuild it
+        index_file = Path(self.index_path, "index.faiss")
+        faiss.write_index(self.index, str(index_file.with_suffix(".tmp")))
+        os.replace(index_file.with_suffix(".tmp"), index_file)
 
     def _load(self):
         try:
             vectors_file = Path(self.index_path, "vectors.npy")
-            metadata_file = Path(self.index_path, "metadata.pkl")
+            metadata_file = Path(self.index_path, "metadata.json")
+            if not metadata_file.exists():
+                # Stores saved before metadata moved to JSON
+                metadata_file = Path(self.index_path, "metadata.pkl")
 
             if vectors_file.exists() and metadata_file.exists():
-                self.vectors = np.load(vectors_file)
+                self.vectors = np.load(vectors_file, mmap_mode="r" if self.mmap else None)
                 
                 # Validate that loaded vectors match expected dimension
                 if self.vectors.shape[1] != 1536:
@@ -109,17 +492,40 @@ class VectorStore:
                     print("🧹 Clearing saved index to match new model.")
                     os.remove(vectors_file)
                     os.remove(metadata_file)
+                    Path(self.index_path, "index.faiss").unlink(missing_ok=True)
                     return  # Leave self.vectors as newly initialized
                 else:
                     with open(metadata_file, "rb") as f:
-                        self.metadata = pickle.load(f)
+                        if metadata_file.suffix == ".json":
+                            self.metadata = orjson.loads(f.read())
+                        else:
+                            self.metadata = pickle.load(f)
                     
-                    # Fit the nearest neighbors model
-                    if len(self.vectors) > 0:
-                        self.nn.fit(self.vectors)
+                    self.index = self._load_index(Path(self.index_path, "index.faiss"))
                     
                     print(
                         f"📦 Loaded vector index with {len(self.metadata)} items."
                     )
         except Exception as e:
             print(f"⚠️ Could not load existing vector index: {e}")
+
+    def _load_index(self, index_file: Path) -> faiss.Index:
+        """Read the saved index, rebuilding it if it is missing or out of date."""
+        if index_file.exists():
+            # Like the vectors, a memory-mapped index is shared through the
+            # page cache by every process that serves searches from it. IVF
+            # lists can't be added to once mapped, and quantized indexes are
+            # small, so those are read into memory.
+            mmap = self.mmap and not self.quantized
+            index = faiss.read_index(str(index_file), faiss.IO_FLAG_MMAP if mmap else 0)
+            # Indexes saved before the switch to inner product, or of the
+            # other kind than this store is configured for, are rebuilt too
+            if (
+                index.ntotal == len(self.vectors)
+                and index.metric_type == faiss.METRIC_INNER_PRODUCT
+                and self._index_kind(index) == self._wanted_index_kind()
+            ):
+                return index
+            print("🧹 Saved search index is out of date, rebuilding it.")
+
+        return self._build_index()
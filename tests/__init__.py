@@ -5,6 +5,30 @@ This package contains unit tests for:
 - KnowledgeGraph class (test_knowledge_graph.py)
 - KnowledgeGraphQuery class (test_knowledge_graph_query.py)
 - Integration functions (test_functions_integration.py)
+- DeepSeekClient and its caches (test_llm.py)
+- Storage backends (test_storage.py)
+- Summarizer batching (test_summarizer.py)
+- RSS fetching and feed caching (test_rss_fetcher.py)
 """
 
+from types import MappingProxyType
+
 __version__ = "1.0.0"
+
+# Fields shared by the article dicts the knowledge graph query tests return
+_DEFAULT_ARTICLE = MappingProxyType({
+    "title": "Test Article",
+    "link": "https://example.com",
+    "summary": "Test summary",
+    "published": "2024-01-15",
+    "topics": [],
+    "source": "Marketing Blog",
+    "entities": [],
+})
+
+
+def make_article(**fields) -> dict:
+    """Return a new knowledge graph article dict, overriding the defaults with `fields`."""
+    article = dict(_DEFAULT_ARTICLE)
+    article.update(fields)
+    return article
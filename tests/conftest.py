@@ -0,0 +1,51 @@
+import os
+from types import MappingProxyType
+
+import pytest
+from dotenv import load_dotenv
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "integration: needs API keys and running services (skipped by run_tests.py --quick)"
+    )
+
+
+# The integration tests share these components for the whole session, so
+# each client is constructed once instead of once per test. The imports are
+# deferred to the fixtures, which unit-only runs never request.
+
+
+@pytest.fixture(scope="session")
+def env():
+    """Read-only snapshot of the environment, taken once after loading .env."""
+    load_dotenv()
+    return MappingProxyType(dict(os.environ))
+
+
+@pytest.fixture(scope="session")
+def llm_client(env):
+    from connectors.llm import DeepSeekClient
+
+    return DeepSeekClient()
+
+
+@pytest.fixture(scope="session")
+def summarizer(llm_client):
+    from processor.summarizer import Summarizer
+
+    return Summarizer(llm_client=llm_client)
+
+
+@pytest.fixture(scope="session")
+def rss_fetcher(env):
+    from scraper.rss_fetcher import RSSFetcher
+
+    return RSSFetcher()
+
+
+@pytest.fixture(scope="session")
+def vector_store(env):
+    from storage.vector_store import VectorStore
+
+    return VectorStore()
@@ -1,45 +1,40 @@
 import unittest
 import sys
 import os
+from unittest.mock import patch
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Imported once for the whole module; the import tests report the failure
+try:
+    from storage.knowledge_graph import KnowledgeGraph
+    from storage.knowledge_graph_query import KnowledgeGraphQuery
+    from functions import query_knowledge_graph, get_knowledge_graph_insights
+    _IMPORT_ERROR = None
+except ImportError as e:
+    _IMPORT_ERROR = e
+
 
 class TestBasicFunctionality(unittest.TestCase):
     """Basic functionality tests to ensure components can be imported and initialized."""
 
     def test_import_knowledge_graph(self):
         """Test that KnowledgeGraph can be imported."""
-        try:
-            from storage.knowledge_graph import KnowledgeGraph
-            self.assertTrue(True, "KnowledgeGraph imported successfully")
-        except ImportError as e:
-            self.fail(f"Failed to import KnowledgeGraph: {e}")
+        self.assertIsNone(_IMPORT_ERROR, f"Failed to import KnowledgeGraph: {_IMPORT_ERROR}")
 
     def test_import_knowledge_graph_query(self):
         """Test that KnowledgeGraphQuery can be imported."""
-        try:
-            from storage.knowledge_graph_query import KnowledgeGraphQuery
-            self.assertTrue(True, "KnowledgeGraphQuery imported successfully")
-        except ImportError as e:
-            self.fail(f"Failed to import KnowledgeGraphQuery: {e}")
+        self.assertIsNone(_IMPORT_ERROR, f"Failed to import KnowledgeGraphQuery: {_IMPORT_ERROR}")
 
     def test_import_functions(self):
         """Test that the new functions can be imported."""
-        try:
-            from functions import query_knowledge_graph, get_knowledge_graph_insights
-            self.assertTrue(True, "Knowledge graph functions imported successfully")
-        except ImportError as e:
-            self.fail(f"Failed to import knowledge graph functions: {e}")
+        self.assertIsNone(_IMPORT_ERROR, f"Failed to import knowledge graph functions: {_IMPORT_ERROR}")
 
     def test_knowledge_graph_initialization(self):
         """Test that KnowledgeGraph can be initialized (with mocked dependencies)."""
         try:
-            from unittest.mock import patch
-            from storage.knowledge_graph import KnowledgeGraph
-            
-            with patch('storage.knowledge_graph.GraphDatabase.driver'):
+            with patch('storage.neo4j_driver.GraphDatabase.driver'):
                 with patch('storage.knowledge_graph.DeepSeekClient'):
                     kg = KnowledgeGraph()
                     self.assertIsNotNone(kg)
@@ -50,9 +45,6 @@ class TestBasicFunctionality(unittest.TestCase):
     def test_knowledge_graph_query_initialization(self):
         """Test that KnowledgeGraphQuery can be initialized (with mocked dependencies)."""
         try:
-            from unittest.mock import patch
-            from storage.knowledge_graph_query import KnowledgeGraphQuery
-            
             with patch('storage.knowledge_graph_query.KnowledgeGraph'):
                 with patch('storage.knowledge_graph_query.DeepSeekClient'):
                     kg_query = KnowledgeGraphQuery()
@@ -64,10 +56,7 @@ class TestBasicFunctionality(unittest.TestCase):
     def test_basic_entity_extraction(self):
         """Test basic entity extraction functionality."""
         try:
-            from unittest.mock import patch
-            from storage.knowledge_graph import KnowledgeGraph
-            
-            with patch('storage.knowledge_graph.GraphDatabase.driver'):
+            with patch('storage.neo4j_driver.GraphDatabase.driver'):
                 with patch('storage.knowledge_graph.DeepSeekClient'):
                     kg = KnowledgeGraph()
                     
@@ -96,9 +85,6 @@ class TestBasicFunctionality(unittest.TestCase):
     def test_query_classification(self):
         """Test query classification functionality."""
         try:
-            from unittest.mock import patch
-            from storage.knowledge_graph_query import KnowledgeGraphQuery
-            
             with patch('storage.knowledge_graph_query.KnowledgeGraph'):
                 with patch('storage.knowledge_graph_query.DeepSeekClient'):
                     kg_query = KnowledgeGraphQuery()
@@ -119,8 +105,6 @@ class TestBasicFunctionality(unittest.TestCase):
     def test_function_imports(self):
         """Test that the new functions are available in the functions module."""
         try:
-            from functions import query_knowledge_graph, get_knowledge_graph_insights
-            
             # Check that functions are callable
             self.assertTrue(callable(query_knowledge_graph))
             self.assertTrue(callable(get_knowledge_graph_insights))
@@ -130,4 +114,7 @@ class TestBasicFunctionality(unittest.TestCase):
 
 
 if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+    import pytest
+    from run_tests import pytest_args
+    # The tests only use mocks, so they can run in parallel one by one
+    sys.exit(pytest.main([__file__, *pytest_args(dist="load")]))
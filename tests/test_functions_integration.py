@@ -1,8 +1,14 @@
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import DEFAULT, AsyncMock, Mock, create_autospec, patch, MagicMock
 import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from functions import query_knowledge_graph, get_knowledge_graph_insights, update_knowledge_base
+import functions
+from functions import query_knowledge_graph, get_knowledge_graph_insights, update_knowledge_base, update_knowledge_base_parallel
+from storage.knowledge_graph_query import KnowledgeGraphQuery
+from tests import make_article
 
 
 class TestFunctionsIntegration(unittest.TestCase):
@@ -10,17 +16,18 @@ class TestFunctionsIntegration(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures."""
-        pass
+        functions._kgq.cache_clear()
+        functions.clear_query_cache()
 
     def tearDown(self):
         """Clean up after tests."""
         pass
 
-    @patch('functions.KnowledgeGraphQuery')
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
     def test_query_knowledge_graph_function(self, mock_kg_query_class):
         """Test the query_knowledge_graph function."""
         # Mock the KnowledgeGraphQuery
-        mock_kg_query = Mock()
+        mock_kg_query = create_autospec(KnowledgeGraphQuery, instance=True)
         mock_kg_query_class.return_value = mock_kg_query
         
         # Mock the query result
@@ -29,15 +36,12 @@ class TestFunctionsIntegration(unittest.TestCase):
             "entity": "HubSpot",
             "summary": "HubSpot is a leading CRM platform",
             "articles": [
-                {
-                    "title": "HubSpot CRM Review",
-                    "link": "https://example.com",
-                    "summary": "Comprehensive review of HubSpot CRM",
-                    "published": "2024-01-15",
-                    "topics": ["CRM"],
-                    "source": "Marketing Blog",
-                    "entities": ["HubSpot", "CRM"]
-                }
+                make_article(
+                    title="HubSpot CRM Review",
+                    summary="Comprehensive review of HubSpot CRM",
+                    topics=["CRM"],
+                    entities=["HubSpot", "CRM"],
+                )
             ],
             "network": {
                 "entity": "HubSpot",
@@ -51,19 +55,105 @@ class TestFunctionsIntegration(unittest.TestCase):
         result = query_knowledge_graph("Tell me about HubSpot")
         
         # Verify the result
-        self.assertEqual(result, expected_result)
+        self.assertIs(result, expected_result)
         
         # Verify that the query was called correctly
         mock_kg_query.natural_language_query.assert_called_once_with("Tell me about HubSpot")
         
-        # Verify that close was called
-        mock_kg_query.close.assert_called_once()
+        # The shared connection stays open for the next query
+        mock_kg_query.close.assert_not_called()
+
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
+    def test_repeated_query_is_answered_from_cache(self, mock_kg_query_class):
+        """Test that the same question, up to case and spacing, is answered once."""
+        mock_kg_query = mock_kg_query_class.return_value
+        mock_kg_query.natural_language_query.return_value = {"query_type": "trending"}
+
+        first = query_knowledge_graph("What's trending?")
+        second = query_knowledge_graph("  what's   TRENDING? ")
+
+        self.assertIs(first, second)
+        mock_kg_query.natural_language_query.assert_called_once_with("What's trending?")
+
+        functions.clear_query_cache()
+        query_knowledge_graph("What's trending?")
+        self.assertEqual(mock_kg_query.natural_language_query.call_count, 2)
+
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
+    def test_answer_computed_during_update_is_not_cached(self, mock_kg_query_class):
+        """Test that a query racing an update does not leave a stale answer behind."""
+        def answer_during_update(query):
+            functions.clear_query_cache()
+            return {"query_type": "stale"}
+        mock_kg_query = mock_kg_query_class.return_value
+        mock_kg_query.natural_language_query.side_effect = answer_during_update
+
+        query_knowledge_graph("What's trending?")
+        mock_kg_query.natural_language_query.side_effect = None
+        mock_kg_query.natural_language_query.return_value = {"query_type": "fresh"}
+
+        self.assertEqual(query_knowledge_graph("What's trending?")["query_type"], "fresh")
+
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
+    def test_clearing_query_cache_refreshes_trending_topics(self, mock_kg_query_class):
+        """Test that an update also drops the shared engine's trending topics."""
+        functions.clear_query_cache()
+        mock_kg_query_class.assert_not_called()
+
+        query_knowledge_graph("What's trending?")
+        functions.clear_query_cache()
+
+        mock_kg_query_class.return_value.invalidate_trending_cache.assert_called_once()
+
+    @patch('functions.VectorStore')
+    def test_clearing_query_cache_reopens_vector_store(self, mock_vector_store):
+        """Test that searches after an update use a store that sees the new vectors."""
+        self.addCleanup(functions._vs.cache_clear)
+        self.assertIs(functions._vs(), functions._vs())
+        functions.clear_query_cache()
+        functions._vs()
+
+        self.assertEqual(mock_vector_store.call_count, 2)
+
+    @patch.dict('os.environ', {'MARKETING_AGENT_DRYRUN': '1'})
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
+    def test_dry_run_skips_knowledge_graph(self, mock_kg_query_class):
+        """Test that dry runs answer without constructing a KnowledgeGraphQuery."""
+        result = query_knowledge_graph("What's trending?")
+        insights = get_knowledge_graph_insights()
+
+        self.assertEqual(result["query_type"], "dryrun")
+        self.assertEqual(result["articles"], [])
+        self.assertEqual(insights["total_articles"], 0)
+        mock_kg_query_class.assert_not_called()
+
+    def test_dry_run_accepts_only_truthy_values(self):
+        """Test that MARKETING_AGENT_DRYRUN=0 or false queries live."""
+        for value, expected in [("1", True), ("True", True), ("yes", True),
+                                ("0", False), ("false", False), ("", False)]:
+            with self.subTest(value=value), patch.dict('os.environ', {'MARKETING_AGENT_DRYRUN': value}):
+                self.assertEqual(functions._dry_run(), expected)
 
-    @patch('functions.KnowledgeGraphQuery')
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
+    def test_concurrent_queries_share_one_instance(self, mock_kg_query_class):
+        """Test that threads racing on the first query construct one KnowledgeGraphQuery."""
+        def slow_construct(**kwargs):
+            time.sleep(0.05)
+            kg_query = create_autospec(KnowledgeGraphQuery, instance=True)
+            kg_query.natural_language_query.side_effect = lambda query: {"query": query}
+            return kg_query
+        mock_kg_query_class.side_effect = slow_construct
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(query_knowledge_graph, ["a", "b", "c", "d"]))
+
+        mock_kg_query_class.assert_called_once()
+
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
     def test_query_knowledge_graph_function_with_exception(self, mock_kg_query_class):
         """Test the query_knowledge_graph function with exception handling."""
         # Mock the KnowledgeGraphQuery to raise an exception
-        mock_kg_query = Mock()
+        mock_kg_query = create_autospec(KnowledgeGraphQuery, instance=True)
         mock_kg_query_class.return_value = mock_kg_query
         mock_kg_query.natural_language_query.side_effect = Exception("Database error")
         
@@ -71,14 +161,14 @@ class TestFunctionsIntegration(unittest.TestCase):
         with self.assertRaises(Exception):
             query_knowledge_graph("Tell me about HubSpot")
         
-        # Verify that close was still called
-        mock_kg_query.close.assert_called_once()
+        # The shared connection stays open for the next query
+        mock_kg_query.close.assert_not_called()
 
-    @patch('functions.KnowledgeGraphQuery')
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
     def test_get_knowledge_graph_insights_function(self, mock_kg_query_class):
         """Test the get_knowledge_graph_insights function."""
         # Mock the KnowledgeGraphQuery
-        mock_kg_query = Mock()
+        mock_kg_query = create_autospec(KnowledgeGraphQuery, instance=True)
         mock_kg_query_class.return_value = mock_kg_query
         
         # Mock the insights result
@@ -102,19 +192,19 @@ class TestFunctionsIntegration(unittest.TestCase):
         result = get_knowledge_graph_insights()
         
         # Verify the result
-        self.assertEqual(result, expected_insights)
+        self.assertIs(result, expected_insights)
         
         # Verify that the insights were retrieved correctly
         mock_kg_query.get_knowledge_graph_insights.assert_called_once()
         
-        # Verify that close was called
-        mock_kg_query.close.assert_called_once()
+        # The shared connection stays open for the next query
+        mock_kg_query.close.assert_not_called()
 
-    @patch('functions.KnowledgeGraphQuery')
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
     def test_get_knowledge_graph_insights_function_with_exception(self, mock_kg_query_class):
         """Test the get_knowledge_graph_insights function with exception handling."""
         # Mock the KnowledgeGraphQuery to raise an exception
-        mock_kg_query = Mock()
+        mock_kg_query = create_autospec(KnowledgeGraphQuery, instance=True)
         mock_kg_query_class.return_value = mock_kg_query
         mock_kg_query.get_knowledge_graph_insights.side_effect = Exception("Database error")
         
@@ -122,21 +212,106 @@ class TestFunctionsIntegration(unittest.TestCase):
         with self.assertRaises(Exception):
             get_knowledge_graph_insights()
         
-        # Verify that close was still called
-        mock_kg_query.close.assert_called_once()
-
-    @patch('functions.RSSFetcher')
-    @patch('functions.Summarizer')
-    @patch('functions.MongoStorage')
-    @patch('functions.GraphStorage')
-    @patch('functions.KnowledgeGraph')
+        # The shared connection stays open for the next query
+        mock_kg_query.close.assert_not_called()
+
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
+    def test_knowledge_graph_query_is_reused(self, mock_kg_query_class):
+        """Test that repeated queries share one KnowledgeGraphQuery instance."""
+        query_knowledge_graph("Tell me about HubSpot")
+        get_knowledge_graph_insights()
+
+        mock_kg_query_class.assert_called_once()
+
+    @patch('functions._llm')
+    @patch('functions._vs')
+    def test_query_knowledge_base_sends_context_last(self, mock_vs, mock_llm):
+        """Test that retrieved documents follow the static prompt messages."""
+        mock_vs.return_value.search.return_value = [{"title": "SEO Trends 2024"}]
+        mock_llm.return_value.chat.return_value = "SEO answer"
+
+        from functions import query_knowledge_base, QUERY_SYSTEM_MESSAGE, QUERY_TASK_MESSAGE
+        result = query_knowledge_base("What are SEO trends?")
+
+        self.assertEqual(result, "SEO answer")
+        messages = mock_llm.return_value.chat.call_args[0][0]
+        self.assertEqual(messages[:2], [QUERY_SYSTEM_MESSAGE, QUERY_TASK_MESSAGE])
+        self.assertEqual(json.loads(messages[2]["content"]), [{"title": "SEO Trends 2024"}])
+
+    @patch('functions.VectorStore')
+    @patch('functions.ParallelStorageManager')
+    @patch('functions.ParallelArticleProcessor')
+    @patch('functions.ParallelRSSFetcher')
+    def test_update_knowledge_base_parallel_runs_on_one_loop(self, mock_fetcher, mock_processor, mock_storage, mock_vector_store):
+        """Test that the parallel pipeline awaits each async stage and stores everything."""
+        articles = [{"title": "Test Article", "link": "https://example.com", "summary": "Test summary"}]
+        processed = [dict(articles[0], summary_processed="Processed summary")]
+        mock_fetcher.return_value.afetch_all_feeds = AsyncMock(return_value=articles)
+        mock_processor.return_value.aprocess_articles = AsyncMock(return_value=processed)
+        mock_storage.return_value.store_articles_parallel.return_value = [
+            {"status": "success", "article": "Test Article"}
+        ]
+        mock_db = Mock()
+        mock_db.find_summaries.return_value = {}
+        mock_storage.return_value.backends.return_value = (mock_db, Mock())
+
+        update_knowledge_base_parallel()
+
+        mock_fetcher.return_value.afetch_all_feeds.assert_awaited_once()
+        mock_processor.return_value.aprocess_articles.assert_awaited_once_with(articles)
+        mock_storage.return_value.store_articles_parallel.assert_called_once_with(processed)
+        mock_vector_store.return_value.add_documents.assert_called_once_with(processed)
+        mock_fetcher.return_value.commit_validators.assert_called_once()
+
     @patch('functions.VectorStore')
-    def test_update_knowledge_base_with_knowledge_graph(self, mock_vector_store, mock_kg, mock_graph, mock_db, mock_summarizer, mock_fetcher):
+    @patch('functions.ParallelStorageManager')
+    @patch('functions.ParallelArticleProcessor')
+    @patch('functions.ParallelRSSFetcher')
+    def test_parallel_update_keeps_feeds_unseen_when_storage_fails(self, mock_fetcher, mock_processor, mock_storage, mock_vector_store):
+        """Test that feed validators are kept back if the articles could not be stored."""
+        articles = [{"title": "Test Article", "link": "https://example.com", "summary": "Test summary"}]
+        mock_fetcher.return_value.afetch_all_feeds = AsyncMock(return_value=articles)
+        mock_processor.return_value.aprocess_articles = AsyncMock(
+            return_value=[dict(articles[0], summary_processed="Processed summary")]
+        )
+        mock_storage.return_value.store_articles_parallel.return_value = [
+            {"status": "error", "article": "Test Article", "error": "MongoDB: down"}
+        ]
+        mock_db = Mock()
+        mock_db.find_summaries.return_value = {}
+        mock_storage.return_value.backends.return_value = (mock_db, Mock())
+
+        update_knowledge_base_parallel()
+
+        mock_fetcher.return_value.commit_validators.assert_not_called()
+
+
+class TestUpdateKnowledgeBase(unittest.TestCase):
+    """Tests for the sequential update_knowledge_base pipeline."""
+
+    def setUp(self):
+        """Patch every pipeline component once for all tests."""
+        patcher = patch.multiple(
+            'functions',
+            RSSFetcher=DEFAULT,
+            Summarizer=DEFAULT,
+            MongoStorage=DEFAULT,
+            KnowledgeGraph=DEFAULT,
+            VectorStore=DEFAULT,
+        )
+        mocks = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.fetcher = mocks['RSSFetcher'].return_value
+        self.summarizer = mocks['Summarizer'].return_value
+        self.db = mocks['MongoStorage'].return_value
+        self.db.find_summaries.return_value = {}
+        self.kg = mocks['KnowledgeGraph'].return_value
+        self.vector_store = mocks['VectorStore'].return_value
+
+    def test_update_knowledge_base_with_knowledge_graph(self):
         """Test that update_knowledge_base integrates the knowledge graph."""
-        # Mock the RSS fetcher
-        mock_fetcher_instance = Mock()
-        mock_fetcher.return_value = mock_fetcher_instance
-        mock_fetcher_instance.fetch.return_value = [
+        self.fetcher.fetch.return_value = [
             {
                 "title": "Test Article",
                 "link": "https://example.com",
@@ -145,93 +320,104 @@ class TestFunctionsIntegration(unittest.TestCase):
                 "source": "Test Source"
             }
         ]
-        
-        # Mock the summarizer
-        mock_summarizer_instance = Mock()
-        mock_summarizer.return_value = mock_summarizer_instance
-        mock_summarizer_instance.summarize.return_value = "Processed summary"
-        
-        # Mock the database
-        mock_db_instance = Mock()
-        mock_db.return_value = mock_db_instance
-        
-        # Mock the graph storage
-        mock_graph_instance = Mock()
-        mock_graph.return_value = mock_graph_instance
-        
-        # Mock the knowledge graph
-        mock_kg_instance = Mock()
-        mock_kg.return_value = mock_kg_instance
-        
-        # Mock the vector store
-        mock_vector_store_instance = Mock()
-        mock_vector_store.return_value = mock_vector_store_instance
+        self.summarizer.summarize_batch.return_value = ["Processed summary"]
         
         # Test the function
         update_knowledge_base()
         
         # Verify that all components were called
-        mock_fetcher_instance.fetch.assert_called_once()
-        mock_summarizer_instance.summarize.assert_called_once()
-        mock_db_instance.save_article.assert_called_once()
-        mock_graph_instance.store_article.assert_called_once()
-        mock_kg_instance.store_article_with_knowledge_graph.assert_called_once()
-        mock_vector_store_instance.add_documents.assert_called_once()
-        mock_kg_instance.close.assert_called_once()
-
-    @patch('functions.RSSFetcher')
-    @patch('functions.Summarizer')
-    @patch('functions.MongoStorage')
-    @patch('functions.GraphStorage')
-    @patch('functions.KnowledgeGraph')
-    @patch('functions.VectorStore')
-    def test_update_knowledge_base_no_articles(self, mock_vector_store, mock_kg, mock_graph, mock_db, mock_summarizer, mock_fetcher):
+        self.fetcher.fetch.assert_called_once()
+        self.summarizer.summarize_batch.assert_called_once()
+        self.summarizer.summarize.assert_not_called()
+        self.kg.close.assert_called_once()
+
+        # Every storage backend receives the whole batch in a single call
+        stored = self.fetcher.fetch.return_value
+        self.assertEqual(stored[0]["summary_processed"], "Processed summary")
+        self.db.save_articles.assert_called_once_with(stored)
+        self.kg.store_articles_with_knowledge_graph.assert_called_once_with(stored)
+        self.vector_store.add_documents.assert_called_once_with(stored)
+        self.fetcher.commit_validators.assert_called_once()
+
+    def test_feeds_are_not_marked_seen_when_storage_fails(self):
+        """Test that feed validators are kept back if a backend fails to store the articles."""
+        self.fetcher.fetch.return_value = [
+            {"title": "Test Article", "link": "https://example.com", "summary": "Test summary"}
+        ]
+        self.summarizer.summarize_batch.return_value = ["Processed summary"]
+        self.kg.store_articles_with_knowledge_graph.side_effect = Exception("Neo4j down")
+
+        update_knowledge_base()
+
+        self.fetcher.commit_validators.assert_not_called()
+
+    def test_update_knowledge_base_no_articles(self):
         """Test update_knowledge_base when no articles are found."""
-        # Mock the RSS fetcher to return no articles
-        mock_fetcher_instance = Mock()
-        mock_fetcher.return_value = mock_fetcher_instance
-        mock_fetcher_instance.fetch.return_value = []
+        self.fetcher.fetch.return_value = []
         
         # Test the function
         update_knowledge_base()
         
         # Verify that no processing was done
-        mock_fetcher_instance.fetch.assert_called_once()
-        # Other components should not be called since there are no articles
-
-    @patch('functions.RSSFetcher')
-    @patch('functions.Summarizer')
-    @patch('functions.MongoStorage')
-    @patch('functions.GraphStorage')
-    @patch('functions.KnowledgeGraph')
-    @patch('functions.VectorStore')
-    def test_update_knowledge_base_with_exception(self, mock_vector_store, mock_kg, mock_graph, mock_db, mock_summarizer, mock_fetcher):
+        self.fetcher.fetch.assert_called_once()
+        self.summarizer.summarize_batch.assert_not_called()
+        self.db.save_articles.assert_not_called()
+
+    def test_update_knowledge_base_with_exception(self):
         """Test update_knowledge_base with exception handling."""
-        # Mock the RSS fetcher to raise an exception
-        mock_fetcher_instance = Mock()
-        mock_fetcher.return_value = mock_fetcher_instance
-        mock_fetcher_instance.fetch.side_effect = Exception("Network error")
+        self.fetcher.fetch.side_effect = Exception("Network error")
         
         # Test that the function handles exceptions gracefully
         with self.assertRaises(Exception):
             update_knowledge_base()
 
+    def test_update_knowledge_base_reuses_stored_summaries(self):
+        """Test that articles already in MongoDB are not summarized again."""
+        self.fetcher.fetch.return_value = [
+            {"title": "Old", "link": "https://example.com/old", "summary": "Old summary"},
+            {"title": "New", "link": "https://example.com/new", "summary": "New summary"},
+        ]
+        self.db.find_summaries.return_value = {"https://example.com/old": "Stored"}
+        self.summarizer.summarize_batch.return_value = ["Fresh"]
+
+        update_knowledge_base()
+
+        self.summarizer.summarize_batch.assert_called_once_with(["New summary"])
+        stored = self.db.save_articles.call_args[0][0]
+        self.assertEqual([a["summary_processed"] for a in stored], ["Stored", "Fresh"])
+        # The old article was embedded when it was first stored
+        self.vector_store.add_documents.assert_called_once_with([stored[1]])
+
+    def test_update_knowledge_base_resummarizes_stored_errors(self):
+        """Test that a summary stored from a failed LLM call is not reused."""
+        self.fetcher.fetch.return_value = [
+            {"title": "Old", "link": "https://example.com/old", "summary": "Old summary"},
+        ]
+        self.db.find_summaries.return_value = {"https://example.com/old": "Error: timeout"}
+        self.summarizer.summarize_batch.return_value = ["Fresh"]
+
+        update_knowledge_base()
+
+        self.summarizer.summarize_batch.assert_called_once_with(["Old summary"])
+        self.assertEqual(self.fetcher.fetch.return_value[0]["summary_processed"], "Fresh")
+
 
 class TestKnowledgeGraphIntegration(unittest.TestCase):
     """Integration tests for knowledge graph functionality."""
 
     def setUp(self):
         """Set up test fixtures."""
-        pass
+        functions._kgq.cache_clear()
+        functions.clear_query_cache()
 
     def tearDown(self):
         """Clean up after tests."""
         pass
 
-    @patch('functions.KnowledgeGraphQuery')
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
     def test_entity_search_integration(self, mock_kg_query_class):
         """Test entity search integration."""
-        mock_kg_query = Mock()
+        mock_kg_query = create_autospec(KnowledgeGraphQuery, instance=True)
         mock_kg_query_class.return_value = mock_kg_query
         
         # Mock entity search result
@@ -240,15 +426,12 @@ class TestKnowledgeGraphIntegration(unittest.TestCase):
             "entity": "Google",
             "summary": "Google is a leading technology company",
             "articles": [
-                {
-                    "title": "Google Analytics Guide",
-                    "link": "https://example.com",
-                    "summary": "Complete guide to Google Analytics",
-                    "published": "2024-01-15",
-                    "topics": ["Analytics"],
-                    "source": "Marketing Blog",
-                    "entities": ["Google", "Analytics"]
-                }
+                make_article(
+                    title="Google Analytics Guide",
+                    summary="Complete guide to Google Analytics",
+                    topics=["Analytics"],
+                    entities=["Google", "Analytics"],
+                )
             ],
             "network": {
                 "entity": "Google",
@@ -266,10 +449,10 @@ class TestKnowledgeGraphIntegration(unittest.TestCase):
         self.assertIn('articles', result)
         self.assertIn('network', result)
 
-    @patch('functions.KnowledgeGraphQuery')
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
     def test_topic_search_integration(self, mock_kg_query_class):
         """Test topic search integration."""
-        mock_kg_query = Mock()
+        mock_kg_query = create_autospec(KnowledgeGraphQuery, instance=True)
         mock_kg_query_class.return_value = mock_kg_query
         
         # Mock topic search result
@@ -278,15 +461,12 @@ class TestKnowledgeGraphIntegration(unittest.TestCase):
             "topic": "SEO",
             "summary": "SEO is important for digital marketing",
             "articles": [
-                {
-                    "title": "SEO Best Practices",
-                    "link": "https://example.com",
-                    "summary": "Latest SEO strategies",
-                    "published": "2024-01-15",
-                    "topics": ["SEO"],
-                    "source": "Marketing Blog",
-                    "entities": ["Google", "SEO"]
-                }
+                make_article(
+                    title="SEO Best Practices",
+                    summary="Latest SEO strategies",
+                    topics=["SEO"],
+                    entities=["Google", "SEO"],
+                )
             ],
             "trending_topics": [
                 {"topic": "SEO", "frequency": 10},
@@ -303,10 +483,10 @@ class TestKnowledgeGraphIntegration(unittest.TestCase):
         self.assertIn('articles', result)
         self.assertIn('trending_topics', result)
 
-    @patch('functions.KnowledgeGraphQuery')
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
     def test_relationship_search_integration(self, mock_kg_query_class):
         """Test relationship search integration."""
-        mock_kg_query = Mock()
+        mock_kg_query = create_autospec(KnowledgeGraphQuery, instance=True)
         mock_kg_query_class.return_value = mock_kg_query
         
         # Mock relationship search result
@@ -315,15 +495,12 @@ class TestKnowledgeGraphIntegration(unittest.TestCase):
             "entities": ["Google", "Facebook"],
             "summary": "Google and Facebook compete in digital advertising",
             "articles": [
-                {
-                    "title": "Google vs Facebook Advertising",
-                    "link": "https://example.com",
-                    "summary": "Comparison of advertising platforms",
-                    "published": "2024-01-15",
-                    "topics": ["Advertising"],
-                    "source": "Marketing Blog",
-                    "entities": ["Google", "Facebook"]
-                }
+                make_article(
+                    title="Google vs Facebook Advertising",
+                    summary="Comparison of advertising platforms",
+                    topics=["Advertising"],
+                    entities=["Google", "Facebook"],
+                )
             ],
             "networks": {
                 "Google": {"nodes": [{"name": "Advertising", "type": "CONCEPT"}]},
@@ -341,10 +518,10 @@ class TestKnowledgeGraphIntegration(unittest.TestCase):
         self.assertIn('articles', result)
         self.assertIn('networks', result)
 
-    @patch('functions.KnowledgeGraphQuery')
+    @patch('functions.KnowledgeGraphQuery', autospec=True)
     def test_trending_search_integration(self, mock_kg_query_class):
         """Test trending search integration."""
-        mock_kg_query = Mock()
+        mock_kg_query = create_autospec(KnowledgeGraphQuery, instance=True)
         mock_kg_query_class.return_value = mock_kg_query
         
         # Mock trending search result
@@ -356,15 +533,12 @@ class TestKnowledgeGraphIntegration(unittest.TestCase):
                 {"topic": "Video Content", "frequency": 12}
             ],
             "recent_articles": [
-                {
-                    "title": "AI in Marketing",
-                    "link": "https://example.com",
-                    "summary": "How AI is changing marketing",
-                    "published": "2024-01-15",
-                    "topics": ["AI", "Marketing"],
-                    "source": "Marketing Blog",
-                    "entities": ["AI", "Marketing"]
-                }
+                make_article(
+                    title="AI in Marketing",
+                    summary="How AI is changing marketing",
+                    topics=["AI", "Marketing"],
+                    entities=["AI", "Marketing"],
+                )
             ]
         }
         mock_kg_query.natural_language_query.return_value = trending_result
@@ -379,4 +553,7 @@ class TestKnowledgeGraphIntegration(unittest.TestCase):
 
 
 if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+    import pytest
+    from run_tests import pytest_args
+    # The tests only use mocks, so they can run in parallel one by one
+    sys.exit(pytest.main([__file__, *pytest_args(dist="load")]))
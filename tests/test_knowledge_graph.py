@@ -8,16 +8,94 @@ of how to use the system.
 
 import json
 import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from functions import query_knowledge_graph, get_knowledge_graph_insights, update_knowledge_base
+from functions import DRYRUN_ENV, _dry_run, query_knowledge_graph, get_knowledge_graph_insights, update_knowledge_base
+from storage.knowledge_graph_query import KnowledgeGraphQuery
 
+# (label, prompt) pairs, formatted once at import
+_ENTITY_PROMPTS = tuple(
+    (entity, f"Tell me about {entity}")
+    for entity in ("Google", "HubSpot", "Facebook", "SEO")
+)
+_TOPIC_PROMPTS = tuple(
+    (topic, f"What are the latest trends in {topic}?")
+    for topic in ("email marketing", "social media", "content marketing", "analytics")
+)
+_RELATIONSHIP_PROMPTS = tuple(
+    (rel, f"How do {rel} relate to each other?")
+    for rel in ("Google and Facebook", "HubSpot and email marketing", "SEO and content marketing")
+)
+_TRENDING_PROMPT = "What are the current trending topics in marketing?"
 
-def test_knowledge_graph():
+_DEMO_QUERIES = (
+    {
+        "type": "Entity Search",
+        "query": "What is HubSpot known for in marketing?",
+        "description": "Searching for information about a specific company"
+    },
+    {
+        "type": "Topic Search", 
+        "query": "What are the latest SEO trends?",
+        "description": "Searching for information about a marketing topic"
+    },
+    {
+        "type": "Trending",
+        "query": "What's trending in digital marketing?",
+        "description": "Searching for current trends"
+    },
+    {
+        "type": "Relationship",
+        "query": "How do Google and Facebook compete in digital advertising?",
+        "description": "Searching for relationships between entities"
+    },
+    {
+        "type": "General",
+        "query": "What are the best practices for email marketing?",
+        "description": "General information search"
+    },
+)
+
+
+def _run_query(prompt):
+    """Run one query, returning (results, error) instead of raising."""
+    try:
+        return query_knowledge_graph(prompt), None
+    except Exception as e:
+        return None, e
+
+
+def _run_searches(pool, searches):
+    """
+    Run the (label, prompt) `searches` concurrently and report them as one table.
+
+    The queries are independent and spend their time waiting on Neo4j and
+    the LLM, so the phase takes about as long as its slowest query. Rows are
+    listed in the order of `searches`, so runs can be diffed.
+    """
+    futures = [(search, pool.submit(_run_query, prompt)) for search, prompt in searches]
+    rows = []
+    for search, future in futures:
+        results, error = future.result()
+        if error is not None:
+            rows.append((search, "-", f"❌ {error}"))
+        elif results.get('articles'):
+            rows.append((search, len(results['articles']), f"✅ {results.get('summary') or '':.80}"))
+        else:
+            rows.append((search, 0, "⚠️ No articles found"))
+
+    width = max(len(search) for search, _ in searches)
+    print("\n".join(f"{search:<{width}} {count:>3}  {text}" for search, count, text in rows))
+
+
+def check_knowledge_graph():
     """Test the knowledge graph functionality."""
     print("🧪 Testing Knowledge Graph Functionality")
     print("=" * 50)
@@ -33,70 +111,62 @@ def test_knowledge_graph():
     except Exception as e:
         print(f"❌ Failed to get insights: {e}")
     
-    # Test 2: Entity search
-    print("\n2️⃣ Testing Entity Search...")
-    test_entities = ["Google", "HubSpot", "Facebook", "SEO"]
-    for entity in test_entities:
-        try:
-            print(f"\n🔍 Searching for: {entity}")
-            results = query_knowledge_graph(f"Tell me about {entity}")
-            if results.get('articles'):
-                print(f"✅ Found {len(results['articles'])} articles about {entity}")
-                if results.get('summary'):
-                    print(f"📝 Summary: {results['summary'][:100]}...")
-            else:
-                print(f"⚠️ No articles found for {entity}")
-        except Exception as e:
-            print(f"❌ Failed to search for {entity}: {e}")
-    
-    # Test 3: Topic search
-    print("\n3️⃣ Testing Topic Search...")
-    test_topics = ["email marketing", "social media", "content marketing", "analytics"]
-    for topic in test_topics:
-        try:
-            print(f"\n🔍 Searching for: {topic}")
-            results = query_knowledge_graph(f"What are the latest trends in {topic}?")
-            if results.get('articles'):
-                print(f"✅ Found {len(results['articles'])} articles about {topic}")
-                if results.get('summary'):
-                    print(f"📝 Summary: {results['summary'][:100]}...")
-            else:
-                print(f"⚠️ No articles found for {topic}")
-        except Exception as e:
-            print(f"❌ Failed to search for {topic}: {e}")
-    
-    # Test 4: Trending topics
-    print("\n4️⃣ Testing Trending Topics...")
-    try:
-        results = query_knowledge_graph("What are the current trending topics in marketing?")
-        if results.get('trending_topics'):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        # Test 2: Entity search
+        print("\n2️⃣ Testing Entity Search...")
+        _run_searches(pool, _ENTITY_PROMPTS)
+        
+        # Test 3: Topic search
+        print("\n3️⃣ Testing Topic Search...")
+        _run_searches(pool, _TOPIC_PROMPTS)
+        
+        # Test 4: Trending topics
+        print("\n4️⃣ Testing Trending Topics...")
+        results, error = _run_query(_TRENDING_PROMPT)
+        if error is not None:
+            print(f"❌ Failed to get trending topics: {error}")
+        elif results.get('trending_topics'):
             print(f"✅ Found {len(results['trending_topics'])} trending topics")
-            for i, topic in enumerate(results['trending_topics'][:5], 1):
+            for i, topic in enumerate(islice(results['trending_topics'], 5), 1):
                 print(f"  {i}. {topic['topic']} ({topic['frequency']} mentions)")
         else:
             print("⚠️ No trending topics found")
-    except Exception as e:
-        print(f"❌ Failed to get trending topics: {e}")
-    
-    # Test 5: Relationship search
-    print("\n5️⃣ Testing Relationship Search...")
-    test_relationships = [
-        "Google and Facebook",
-        "HubSpot and email marketing",
-        "SEO and content marketing"
-    ]
-    for rel in test_relationships:
-        try:
-            print(f"\n🔍 Searching for relationship: {rel}")
-            results = query_knowledge_graph(f"How do {rel} relate to each other?")
-            if results.get('articles'):
-                print(f"✅ Found {len(results['articles'])} articles about {rel}")
-                if results.get('summary'):
-                    print(f"📝 Summary: {results['summary'][:100]}...")
-            else:
-                print(f"⚠️ No articles found for {rel}")
-        except Exception as e:
-            print(f"❌ Failed to search for {rel}: {e}")
+        
+        # Test 5: Relationship search
+        print("\n5️⃣ Testing Relationship Search...")
+        _run_searches(pool, _RELATIONSHIP_PROMPTS)
+
+
+@unittest.skipUnless(
+    DRYRUN_ENV in os.environ and not _dry_run(),
+    f"integration test: set {DRYRUN_ENV}=0 to query Neo4j and the LLM",
+)
+class TestKnowledgeGraphQueries(unittest.TestCase):
+    """
+    Test that every sample prompt is routed to a search and answered with articles.
+
+    Only runs live, with MARKETING_AGENT_DRYRUN=0 set; the dry-run answers
+    are covered by the unit tests of functions.py.
+    """
+
+    def _check_prompts(self, prompts):
+        for label, prompt in prompts:
+            with self.subTest(search=label):
+                results = query_knowledge_graph(prompt)
+                self.assertIn(results.get('query_type'), KnowledgeGraphQuery._HANDLERS)
+                self.assertIn('articles', results)
+
+    def test_entities(self):
+        """Test the entity prompts."""
+        self._check_prompts(_ENTITY_PROMPTS)
+
+    def test_topics(self):
+        """Test the topic prompts."""
+        self._check_prompts(_TOPIC_PROMPTS)
+
+    def test_relationships(self):
+        """Test the relationship prompts."""
+        self._check_prompts(_RELATIONSHIP_PROMPTS)
 
 
 def demo_knowledge_graph_queries():
@@ -104,35 +174,7 @@ def demo_knowledge_graph_queries():
     print("\n🎯 Knowledge Graph Query Demonstrations")
     print("=" * 50)
     
-    queries = [
-        {
-            "type": "Entity Search",
-            "query": "What is HubSpot known for in marketing?",
-            "description": "Searching for information about a specific company"
-        },
-        {
-            "type": "Topic Search", 
-            "query": "What are the latest SEO trends?",
-            "description": "Searching for information about a marketing topic"
-        },
-        {
-            "type": "Trending",
-            "query": "What's trending in digital marketing?",
-            "description": "Searching for current trends"
-        },
-        {
-            "type": "Relationship",
-            "query": "How do Google and Facebook compete in digital advertising?",
-            "description": "Searching for relationships between entities"
-        },
-        {
-            "type": "General",
-            "query": "What are the best practices for email marketing?",
-            "description": "General information search"
-        }
-    ]
-    
-    for i, query_info in enumerate(queries, 1):
+    for i, query_info in enumerate(_DEMO_QUERIES, 1):
         print(f"\n{i}️⃣ {query_info['type']}")
         print(f"Query: {query_info['query']}")
         print(f"Description: {query_info['description']}")
@@ -144,7 +186,7 @@ def demo_knowledge_graph_queries():
             if results.get('articles'):
                 print(f"📰 Found {len(results['articles'])} articles")
             if results.get('summary'):
-                print(f"📝 Summary: {results['summary'][:150]}...")
+                print(f"📝 Summary: {results['summary']:.150}...")
             
         except Exception as e:
             print(f"❌ Query failed: {e}")
@@ -158,15 +200,13 @@ def update_and_test():
     print("=" * 50)
     
     try:
+        # Returns once every backend has committed its writes, so the
+        # queries below already see the new articles
         update_knowledge_base()
         print("✅ Knowledge base updated successfully!")
         
-        # Wait a moment for processing
-        import time
-        time.sleep(2)
-        
         # Now test queries
-        test_knowledge_graph()
+        check_knowledge_graph()
         
     except Exception as e:
         print(f"❌ Failed to update knowledge base: {e}")
@@ -179,11 +219,16 @@ def main():
     
     # Check if we want to update first
     import sys
+    # Without --update or --live the queries answer from canned results
+    if "--update" not in sys.argv and "--live" not in sys.argv:
+        os.environ.setdefault(DRYRUN_ENV, "1")
+        print("🧪 Dry run: pass --live to query Neo4j and the LLM")
+
     if len(sys.argv) > 1 and sys.argv[1] == "--update":
         update_and_test()
     else:
         # Just run tests
-        test_knowledge_graph()
+        check_knowledge_graph()
         demo_knowledge_graph_queries()
 
 
@@ -1,25 +1,35 @@
+import threading
 import unittest
 from unittest.mock import Mock, patch, MagicMock
 import json
-from storage.knowledge_graph_query import KnowledgeGraphQuery
+from connectors.semantic_cache import SemanticCache
+from storage.knowledge_graph_query import TRENDING_TTL, KnowledgeGraphQuery
+from tests import make_article
 
 
 class TestKnowledgeGraphQuery(unittest.TestCase):
     """Test cases for the KnowledgeGraphQuery class."""
 
-    def setUp(self):
-        """Set up test fixtures."""
+    @classmethod
+    def setUpClass(cls):
+        """Set up one query engine over a mocked KnowledgeGraph for all tests."""
         # Mock the KnowledgeGraph
-        self.mock_kg = Mock()
+        cls.mock_kg = Mock()
         
         with patch('storage.knowledge_graph_query.KnowledgeGraph') as mock_kg_class:
-            mock_kg_class.return_value = self.mock_kg
-            self.kg_query = KnowledgeGraphQuery()
+            mock_kg_class.return_value = cls.mock_kg
+            cls.kg_query = KnowledgeGraphQuery()
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Clean up after tests."""
-        if hasattr(self, 'kg_query'):
-            self.kg_query.close()
+        cls.kg_query.close()
+
+    def setUp(self):
+        """Reset the state a test may have left on the shared fixtures."""
+        self.mock_kg.reset_mock(return_value=True, side_effect=True)
+        self.kg_query.semantic_cache = None
+        self.kg_query.invalidate_trending_cache()
 
     def test_initialization(self):
         """Test knowledge graph query initialization."""
@@ -39,6 +49,35 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
             query_type = self.kg_query._classify_query("What are SEO trends?")
             self.assertEqual(query_type, "topic_search")
 
+    def test_unambiguous_queries_are_classified_without_llm(self):
+        """Test that keyword rules answer clear queries and defer mixed ones."""
+        with patch.object(self.kg_query.llm_client, 'summarize', return_value="general_search") as mock_summarize:
+            self.assertEqual(self.kg_query._classify_query("Tell me about HubSpot"), "entity_search")
+            self.assertEqual(self.kg_query._classify_query("What's trending lately?"), "trending")
+            self.assertEqual(
+                self.kg_query._classify_query("How does Google compete with Facebook?"),
+                "relationship_search",
+            )
+            mock_summarize.assert_not_called()
+
+            self.kg_query._classify_query("What are the latest SEO trends at Google?")
+            mock_summarize.assert_called_once()
+
+    def test_common_words_are_not_classified_as_entities(self):
+        """Test that entity names inside words or in lowercase are left to the LLM."""
+        with patch.object(self.kg_query.llm_client, 'summarize', return_value="topic_search") as mock_summarize:
+            for query in ["How do I write a meta description?", "Tips for metadata"]:
+                with self.subTest(query=query):
+                    self.assertEqual(self.kg_query._classify_query(query), "topic_search")
+        self.assertEqual(mock_summarize.call_count, 2)
+        self.assertEqual(self.kg_query._extract_entities_from_query("Tips for metadata"), [])
+        self.assertEqual(
+            self.kg_query._extract_entities_from_query("How do I write a meta description?"), []
+        )
+        self.assertEqual(
+            self.kg_query._extract_entities_from_query("Meta ads vs a meta description"), ["Meta"]
+        )
+
     def test_classify_query_fallback(self):
         """Test query classification fallback."""
         with patch.object(self.kg_query.llm_client, 'summarize', side_effect=Exception("Error")):
@@ -65,6 +104,14 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
         entities = self.kg_query._extract_entities_from_query("Tell me about marketing")
         self.assertEqual(len(entities), 0)
 
+    def test_extract_key_terms(self):
+        """Test key term extraction, including overlapping terms and the word fallback."""
+        terms = self.kg_query._extract_key_terms("How does local seo affect ROI?")
+        self.assertEqual(terms, ["SEO", "local SEO", "ROI"])
+
+        terms = self.kg_query._extract_key_terms("Tell me about podcast sponsorships")
+        self.assertEqual(terms, ["podcast", "sponsorships"])
+
     def test_handle_entity_search_with_entity(self):
         """Test entity search handling with found entity."""
         # Mock entity network
@@ -76,15 +123,12 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
         
         # Mock articles
         mock_articles = [
-            {
-                "title": "HubSpot CRM Review",
-                "link": "https://example.com",
-                "summary": "Comprehensive review of HubSpot CRM",
-                "published": "2024-01-15",
-                "topics": ["CRM"],
-                "source": "Marketing Blog",
-                "entities": ["HubSpot", "CRM"]
-            }
+            make_article(
+                title="HubSpot CRM Review",
+                summary="Comprehensive review of HubSpot CRM",
+                topics=["CRM"],
+                entities=["HubSpot", "CRM"],
+            )
         ]
         
         self.mock_kg.get_entity_network.return_value = mock_network
@@ -114,15 +158,12 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
         """Test topic search handling."""
         # Mock articles
         mock_articles = [
-            {
-                "title": "SEO Best Practices",
-                "link": "https://example.com",
-                "summary": "Latest SEO strategies",
-                "published": "2024-01-15",
-                "topics": ["SEO"],
-                "source": "Marketing Blog",
-                "entities": ["Google", "SEO"]
-            }
+            make_article(
+                title="SEO Best Practices",
+                summary="Latest SEO strategies",
+                topics=["SEO"],
+                entities=["Google", "SEO"],
+            )
         ]
         
         # Mock trending topics
@@ -131,7 +172,7 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
             {"topic": "Content Marketing", "frequency": 8}
         ]
         
-        self.mock_kg.query_knowledge_graph.return_value = mock_articles
+        self.mock_kg.query_knowledge_graph_batch.return_value = [mock_articles]
         self.mock_kg.get_trending_topics.return_value = mock_trending
         
         # Mock summary generation
@@ -144,6 +185,35 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
             self.assertEqual(result['articles'], mock_articles)
             self.assertEqual(result['trending_topics'], mock_trending)
 
+    def test_handle_topic_search_deduplicates_by_title(self):
+        """Test that articles found by several key terms are listed once, in order."""
+        seo = {"title": "SEO Best Practices"}
+        email = {"title": "Email Marketing Guide"}
+        results = {"SEO": [seo, email], "email marketing": [email]}
+        self.mock_kg.query_knowledge_graph_batch.side_effect = (
+            lambda terms, limit: [results[term] for term in terms]
+        )
+        self.mock_kg.get_trending_topics.return_value = []
+
+        with patch.object(self.kg_query, '_generate_topic_summary', return_value="Summary"):
+            result = self.kg_query._handle_topic_search("SEO and email marketing")
+
+        self.assertEqual(result['key_terms'], ["email marketing", "SEO"])
+        self.assertEqual(result['articles'], [email, seo])
+
+    def test_handle_topic_search_keeps_first_duplicate(self):
+        """Test that of several articles sharing a title, the first one found is kept."""
+        first = {"title": "SEO Best Practices", "link": "https://example.com/first"}
+        second = {"title": "SEO Best Practices", "link": "https://example.com/second"}
+        self.mock_kg.query_knowledge_graph_batch.return_value = [[first, second]]
+        self.mock_kg.get_trending_topics.return_value = []
+
+        with patch.object(self.kg_query, '_extract_key_terms', return_value=["SEO"]), \
+                patch.object(self.kg_query, '_generate_topic_summary', return_value="Summary"):
+            result = self.kg_query._handle_topic_search("SEO")
+
+        self.assertEqual(result['articles'], [first])
+
     def test_handle_trending_search(self):
         """Test trending search handling."""
         # Mock trending topics
@@ -154,15 +224,12 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
         
         # Mock recent articles
         mock_articles = [
-            {
-                "title": "AI in Marketing",
-                "link": "https://example.com",
-                "summary": "How AI is changing marketing",
-                "published": "2024-01-15",
-                "topics": ["AI", "Marketing"],
-                "source": "Marketing Blog",
-                "entities": ["AI", "Marketing"]
-            }
+            make_article(
+                title="AI in Marketing",
+                summary="How AI is changing marketing",
+                topics=["AI", "Marketing"],
+                entities=["AI", "Marketing"],
+            )
         ]
         
         self.mock_kg.get_trending_topics.return_value = mock_trending
@@ -181,15 +248,12 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
         """Test relationship search handling with multiple entities."""
         # Mock articles
         mock_articles = [
-            {
-                "title": "Google vs Facebook",
-                "link": "https://example.com",
-                "summary": "Comparison of advertising platforms",
-                "published": "2024-01-15",
-                "topics": ["Advertising"],
-                "source": "Marketing Blog",
-                "entities": ["Google", "Facebook"]
-            }
+            make_article(
+                title="Google vs Facebook",
+                summary="Comparison of advertising platforms",
+                topics=["Advertising"],
+                entities=["Google", "Facebook"],
+            )
         ]
         
         # Mock networks
@@ -199,7 +263,7 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
         }
         
         self.mock_kg.query_knowledge_graph.return_value = mock_articles
-        self.mock_kg.get_entity_network.side_effect = lambda entity, depth: mock_networks.get(entity, {"nodes": []})
+        self.mock_kg.get_entity_networks.return_value = mock_networks
         
         # Mock summary generation
         with patch.object(self.kg_query, '_generate_relationship_summary', return_value="Google and Facebook compete in advertising"):
@@ -211,6 +275,8 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
             self.assertEqual(result['summary'], 'Google and Facebook compete in advertising')
             self.assertEqual(result['articles'], mock_articles)
             self.assertEqual(result['networks'], mock_networks)
+            self.mock_kg.get_entity_networks.assert_called_once_with(["Google", "Facebook"], depth=1)
+            self.mock_kg.get_entity_network.assert_not_called()
 
     def test_handle_relationship_search_without_entities(self):
         """Test relationship search handling without multiple entities."""
@@ -225,15 +291,12 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
         """Test general search handling."""
         # Mock articles
         mock_articles = [
-            {
-                "title": "Marketing Best Practices",
-                "link": "https://example.com",
-                "summary": "General marketing advice",
-                "published": "2024-01-15",
-                "topics": ["Marketing"],
-                "source": "Marketing Blog",
-                "entities": ["Marketing"]
-            }
+            make_article(
+                title="Marketing Best Practices",
+                summary="General marketing advice",
+                topics=["Marketing"],
+                entities=["Marketing"],
+            )
         ]
         
         # Mock stats
@@ -258,15 +321,12 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
     def test_generate_entity_summary(self):
         """Test entity summary generation."""
         articles = [
-            {
-                "title": "HubSpot CRM Review",
-                "link": "https://example.com",
-                "summary": "Comprehensive review of HubSpot CRM",
-                "published": "2024-01-15",
-                "topics": ["CRM"],
-                "source": "Marketing Blog",
-                "entities": ["HubSpot", "CRM"]
-            }
+            make_article(
+                title="HubSpot CRM Review",
+                summary="Comprehensive review of HubSpot CRM",
+                topics=["CRM"],
+                entities=["HubSpot", "CRM"],
+            )
         ]
         
         network = {
@@ -285,15 +345,12 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
     def test_generate_topic_summary(self):
         """Test topic summary generation."""
         articles = [
-            {
-                "title": "SEO Best Practices",
-                "link": "https://example.com",
-                "summary": "Latest SEO strategies",
-                "published": "2024-01-15",
-                "topics": ["SEO"],
-                "source": "Marketing Blog",
-                "entities": ["Google", "SEO"]
-            }
+            make_article(
+                title="SEO Best Practices",
+                summary="Latest SEO strategies",
+                topics=["SEO"],
+                entities=["Google", "SEO"],
+            )
         ]
         
         trending = [{"topic": "SEO", "frequency": 10}]
@@ -310,15 +367,12 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
         ]
         
         articles = [
-            {
-                "title": "AI in Marketing",
-                "link": "https://example.com",
-                "summary": "How AI is changing marketing",
-                "published": "2024-01-15",
-                "topics": ["AI", "Marketing"],
-                "source": "Marketing Blog",
-                "entities": ["AI", "Marketing"]
-            }
+            make_article(
+                title="AI in Marketing",
+                summary="How AI is changing marketing",
+                topics=["AI", "Marketing"],
+                entities=["AI", "Marketing"],
+            )
         ]
         
         with patch.object(self.kg_query.llm_client, 'summarize', return_value="AI and video content are trending"):
@@ -329,15 +383,12 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
         """Test relationship summary generation."""
         entities = ["Google", "Facebook"]
         articles = [
-            {
-                "title": "Google vs Facebook",
-                "link": "https://example.com",
-                "summary": "Comparison of advertising platforms",
-                "published": "2024-01-15",
-                "topics": ["Advertising"],
-                "source": "Marketing Blog",
-                "entities": ["Google", "Facebook"]
-            }
+            make_article(
+                title="Google vs Facebook",
+                summary="Comparison of advertising platforms",
+                topics=["Advertising"],
+                entities=["Google", "Facebook"],
+            )
         ]
         
         networks = {
@@ -352,21 +403,42 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
     def test_generate_general_summary(self):
         """Test general summary generation."""
         articles = [
-            {
-                "title": "Marketing Best Practices",
-                "link": "https://example.com",
-                "summary": "General marketing advice",
-                "published": "2024-01-15",
-                "topics": ["Marketing"],
-                "source": "Marketing Blog",
-                "entities": ["Marketing"]
-            }
+            make_article(
+                title="Marketing Best Practices",
+                summary="General marketing advice",
+                topics=["Marketing"],
+                entities=["Marketing"],
+            )
         ]
         
         with patch.object(self.kg_query.llm_client, 'summarize', return_value="Marketing is important"):
             summary = self.kg_query._generate_general_summary("What is marketing?", articles)
             self.assertEqual(summary, "Marketing is important")
 
+    def test_summaries_are_served_from_semantic_cache(self):
+        """Test that a repeated summary prompt is answered without the LLM."""
+        self.kg_query.semantic_cache = SemanticCache(embed=lambda text: [1.0] + [0.0] * 1535)
+        articles = [{"title": "Marketing Best Practices", "link": "https://example.com"}]
+
+        with patch.object(self.kg_query.llm_client, 'summarize', return_value="Marketing is important") as mock_summarize:
+            first = self.kg_query._generate_general_summary("What is marketing?", articles)
+            second = self.kg_query._generate_general_summary("What is marketing?", articles)
+
+        self.assertEqual(first, "Marketing is important")
+        self.assertEqual(second, "Marketing is important")
+        mock_summarize.assert_called_once()
+        self.assertTrue(mock_summarize.call_args.kwargs["cache"])
+
+    def test_classification_uses_exact_match_cache_only(self):
+        """Test that query classification bypasses the semantic cache."""
+        self.kg_query.semantic_cache = Mock()
+
+        with patch.object(self.kg_query.llm_client, 'summarize', return_value="topic_search") as mock_summarize:
+            self.kg_query._classify_query("What are SEO trends?")
+
+        self.kg_query.semantic_cache.get.assert_not_called()
+        self.assertTrue(mock_summarize.call_args.kwargs["cache"])
+
     def test_natural_language_query_entity_search(self):
         """Test natural language query with entity search."""
         with patch.object(self.kg_query, '_classify_query', return_value="entity_search"):
@@ -389,6 +461,84 @@ class TestKnowledgeGraphQuery(unittest.TestCase):
                 self.assertEqual(result['query_type'], 'topic_search')
                 self.assertEqual(result['topic'], 'SEO')
 
+    def test_natural_language_query_dispatches_every_query_type(self):
+        """Test that each query type, and an unknown one, reaches its handler."""
+        cases = dict(KnowledgeGraphQuery._HANDLERS, unknown="_handle_general_search")
+        for query_type, handler in cases.items():
+            with self.subTest(query_type=query_type), \
+                    patch.object(self.kg_query, '_classify_query', return_value=query_type), \
+                    patch.object(self.kg_query, handler, return_value={"handler": handler}):
+                result = self.kg_query.natural_language_query("query")
+
+                self.assertEqual(result, {"handler": handler})
+
+    def test_relationship_search_fetches_networks_with_articles(self):
+        """Test that the batched network lookup runs alongside the article search."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def get_entity_networks(entities, depth):
+            barrier.wait()  # Raises if the lookups run one after the other
+            return {entity: {"nodes": [{"name": entity, "type": "Entity"}]} for entity in entities}
+
+        def query_knowledge_graph(query, limit):
+            barrier.wait()
+            return []
+
+        self.mock_kg.get_entity_networks.side_effect = get_entity_networks
+        self.mock_kg.query_knowledge_graph.side_effect = query_knowledge_graph
+
+        result = self.kg_query._handle_relationship_search("Compare Google and Facebook")
+
+        self.assertEqual(set(result["networks"]), {"Google", "Facebook"})
+
+    def test_multi_entity_handlers_summarize_in_one_llm_call(self):
+        """Test that relationship and trending answers cost one LLM call however many entities."""
+        self.mock_kg.get_entity_networks.side_effect = lambda entities, depth: {
+            entity: {"nodes": [{"name": entity, "type": "Entity"}]} for entity in entities
+        }
+        self.mock_kg.query_knowledge_graph.return_value = [make_article()]
+        self.mock_kg.get_trending_topics.return_value = [
+            {"topic": topic, "frequency": 3} for topic in ("SEO", "PPC", "CRM")
+        ]
+
+        for handler, query in (
+            (self.kg_query._handle_relationship_search, "Compare Google, Facebook and HubSpot"),
+            (self.kg_query._handle_trending_search, "What's trending?"),
+        ):
+            with self.subTest(query=query), \
+                    patch.object(self.kg_query.llm_client, 'summarize', return_value="Summary") as mock_summarize:
+                result = handler(query)
+
+                self.assertEqual(result["summary"], "Summary")
+                mock_summarize.assert_called_once()
+
+    def test_trending_topics_are_cached_until_ttl(self):
+        """Test that trending topics are aggregated once per TTL window."""
+        self.mock_kg.get_trending_topics.return_value = [{"topic": "SEO", "frequency": 3}]
+        self.mock_kg.query_knowledge_graph.return_value = []
+        self.mock_kg.get_knowledge_graph_stats.return_value = {}
+
+        with patch('storage.knowledge_graph_query.time.monotonic', return_value=0.0), \
+                patch.object(self.kg_query.llm_client, 'summarize', return_value="Trends"):
+            self.kg_query.get_knowledge_graph_insights()
+            self.kg_query._handle_trending_search("What's trending?")
+        self.assertEqual(self.mock_kg.get_trending_topics.call_count, 1)
+
+        with patch('storage.knowledge_graph_query.time.monotonic', return_value=TRENDING_TTL + 1):
+            self.kg_query.get_knowledge_graph_insights()
+        self.assertEqual(self.mock_kg.get_trending_topics.call_count, 2)
+
+    def test_invalidated_trending_topics_are_fetched_again(self):
+        """Test that invalidating the trending cache forces a new aggregation."""
+        self.mock_kg.get_trending_topics.return_value = [{"topic": "SEO", "frequency": 3}]
+
+        self.kg_query._get_trending_topics()
+        self.kg_query._get_trending_topics()
+        self.kg_query.invalidate_trending_cache()
+        self.kg_query._get_trending_topics()
+
+        self.assertEqual(self.mock_kg.get_trending_topics.call_count, 2)
+
     def test_get_knowledge_graph_insights(self):
         """Test getting knowledge graph insights."""
         # Mock stats
@@ -0,0 +1,309 @@
+import asyncio
+import json
+import shelve
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+from connectors.llm import DeepSeekClient, TokenBucket
+from connectors.response_cache import PRUNE_INTERVAL, ResponseCache
+from connectors.semantic_cache import SemanticCache
+
+
+def fake_embedding(text: str):
+    """Deterministic 1536-dim embedding that depends only on the text length."""
+    vector = [0.0] * 1536
+    vector[len(text) % 1536] = 1.0
+    return vector
+
+
+class TestSemanticCache(unittest.TestCase):
+    """Test cases for the SemanticCache class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.cache = SemanticCache(embed=fake_embedding, threshold=0.92, ttl=60)
+        self.messages = [{"role": "user", "content": "What are SEO trends?"}]
+
+    def test_miss_on_empty_cache(self):
+        """Test that an empty cache never returns a response."""
+        vector = self.cache.embed_messages(self.messages)
+        self.assertIsNone(self.cache.get(vector, ("deepseek-chat", 0.7)))
+
+    def test_hit_after_add(self):
+        """Test that a stored response is returned for the same prompt."""
+        vector = self.cache.embed_messages(self.messages)
+        self.cache.add(vector, ("deepseek-chat", 0.7), "SEO answer")
+
+        self.assertEqual(self.cache.get(vector, ("deepseek-chat", 0.7)), "SEO answer")
+
+    def test_namespace_isolation(self):
+        """Test that responses are not shared across model settings."""
+        vector = self.cache.embed_messages(self.messages)
+        self.cache.add(vector, ("deepseek-chat", 0.7), "SEO answer")
+
+        self.assertIsNone(self.cache.get(vector, ("deepseek-chat", 0.0)))
+
+    def test_expired_entry_is_a_miss(self):
+        """Test that entries older than the TTL are ignored."""
+        vector = self.cache.embed_messages(self.messages)
+        with patch("connectors.semantic_cache.time.time", return_value=0):
+            self.cache.add(vector, ("deepseek-chat", 0.7), "SEO answer")
+        with patch("connectors.semantic_cache.time.time", return_value=120):
+            self.assertIsNone(self.cache.get(vector, ("deepseek-chat", 0.7)))
+
+    def test_embedding_failure_disables_lookup(self):
+        """Test that embedding errors fall back to no caching."""
+        cache = SemanticCache(embed=Mock(side_effect=Exception("API error")))
+        self.assertIsNone(cache.embed_messages(self.messages))
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for the ResponseCache class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.tmp_dir.name, expire=60)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.tmp_dir.cleanup()
+
+    def test_key_is_order_independent(self):
+        """Test that dict key order does not change the cache key."""
+        messages = [{"role": "user", "content": "Hi"}]
+        reordered = [{"content": "Hi", "role": "user"}]
+
+        self.assertEqual(
+            ResponseCache.make_key("deepseek-chat", messages, 0, 100),
+            ResponseCache.make_key("deepseek-chat", reordered, 0, 100),
+        )
+        self.assertNotEqual(
+            ResponseCache.make_key("deepseek-chat", messages, 0, 100),
+            ResponseCache.make_key("deepseek-chat", messages, 0.7, 100),
+        )
+
+    def test_round_trip(self):
+        """Test that a stored value can be read back."""
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.set("key", "value")
+        self.assertEqual(self.cache.get("key"), "value")
+
+    def test_expired_entry_is_a_miss(self):
+        """Test that expired entries are ignored."""
+        with patch("connectors.response_cache.time.time", return_value=0):
+            self.cache.set("key", "value")
+        with patch("connectors.response_cache.time.time", return_value=120):
+            self.assertIsNone(self.cache.get("key"))
+
+        with shelve.open(str(Path(self.tmp_dir.name, "responses"))) as db:
+            self.assertNotIn("key", db)
+
+    def test_writes_prune_expired_entries(self):
+        """Test that a write removes entries that expired without being read again."""
+        with patch("connectors.response_cache.time.time", return_value=0):
+            self.cache.set("old", "value")
+        with patch.dict("connectors.response_cache._last_pruned", clear=True), \
+                patch("connectors.response_cache.time.time", return_value=PRUNE_INTERVAL + 120):
+            self.cache.set("new", "value")
+
+        with shelve.open(str(Path(self.tmp_dir.name, "responses"))) as db:
+            self.assertEqual(list(db), ["new"])
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for the TokenBucket rate limiter."""
+
+    @patch("connectors.llm.time.sleep")
+    def test_no_wait_within_budget(self, mock_sleep):
+        """Test that requests within the budget are not delayed."""
+        bucket = TokenBucket(rpm=60, tpm=1000)
+        for _ in range(5):
+            bucket.acquire(100)
+
+        mock_sleep.assert_not_called()
+
+    @patch("connectors.llm.time.sleep")
+    @patch("connectors.llm.time.monotonic", return_value=0.0)
+    def test_waits_for_token_deficit(self, mock_monotonic, mock_sleep):
+        """Test that exceeding the token budget sleeps for the deficit."""
+        bucket = TokenBucket(rpm=0, tpm=600)
+        bucket.acquire(600)
+        bucket.acquire(60)
+
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 6.0)
+
+
+class TestDeepSeekClient(unittest.TestCase):
+    """Test cases for the DeepSeekClient class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = SemanticCache(embed=fake_embedding)
+        self.client = DeepSeekClient(
+            api_key="test-key",
+            semantic_cache=self.cache,
+            response_cache=ResponseCache(cache_dir=self.tmp_dir.name),
+        )
+        self.client.client = Mock()
+
+        response = Mock()
+        response.choices = [Mock()]
+        response.choices[0].message.content = "Fresh answer"
+        self.client.client.chat.completions.create.return_value = response
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.tmp_dir.cleanup()
+
+    def test_clients_share_connection_pool(self):
+        """Test that instances with the same key reuse one OpenAI client."""
+        first = DeepSeekClient(api_key="shared-key")
+        second = DeepSeekClient(api_key="shared-key")
+        other = DeepSeekClient(api_key="other-key")
+
+        self.assertIs(first.client, second.client)
+        self.assertIsNot(first.client, other.client)
+
+    def test_deterministic_chat_uses_response_cache(self):
+        """Test that temperature 0 calls are served from the disk cache."""
+        self.client.semantic_cache = None
+        messages = [{"role": "user", "content": "Classify this query"}]
+
+        self.client.chat(messages, temperature=0)
+        result = self.client.chat(messages, temperature=0)
+
+        self.assertEqual(result, "Fresh answer")
+        self.client.client.chat.completions.create.assert_called_once()
+        # The cached reply must have been generated with the settings in its key
+        kwargs = self.client.client.chat.completions.create.call_args.kwargs
+        self.assertEqual(kwargs["temperature"], 0)
+        self.assertNotIn("max_tokens", kwargs)
+
+    def test_chat_leaves_unset_sampling_to_the_provider(self):
+        """Test that temperature and max_tokens are only sent when the caller sets them."""
+        self.client.semantic_cache = None
+        messages = [{"role": "user", "content": "Write a tagline"}]
+
+        self.client.chat(messages)
+        self.client.chat(messages, temperature=0.2, max_tokens=100)
+
+        first, second = (call.kwargs for call in self.client.client.chat.completions.create.call_args_list)
+        self.assertFalse({"temperature", "max_tokens"} & set(first))
+        self.assertEqual((second["temperature"], second["max_tokens"]), (0.2, 100))
+
+    def test_sampled_chat_skips_response_cache(self):
+        """Test that non-deterministic calls bypass the disk cache by default."""
+        self.client.semantic_cache = None
+        messages = [{"role": "user", "content": "Write a tagline"}]
+
+        self.client.chat(messages)
+        self.client.chat(messages)
+
+        self.assertEqual(self.client.client.chat.completions.create.call_count, 2)
+
+    def test_chat_uses_semantic_cache(self):
+        """Test that a repeated prompt is answered from the cache."""
+        messages = [{"role": "user", "content": "What are SEO trends?"}]
+
+        first = self.client.chat(messages)
+        second = self.client.chat(messages)
+
+        self.assertEqual(first, "Fresh answer")
+        self.assertEqual(second, "Fresh answer")
+        self.client.client.chat.completions.create.assert_called_once()
+
+    def test_chat_does_not_cache_errors(self):
+        """Test that failed API calls are not stored in the cache."""
+        self.client.client.chat.completions.create.side_effect = Exception("Timeout")
+        messages = [{"role": "user", "content": "What are SEO trends?"}]
+
+        self.client.chat(messages)
+        self.client.chat(messages)
+
+        self.assertEqual(self.client.client.chat.completions.create.call_count, 2)
+
+    def test_stream_chat_yields_chunks_and_caches(self):
+        """Test that streamed chunks are yielded and the joined reply is cached."""
+        chunks = []
+        for text in ["Fresh", " ", "answer"]:
+            chunk = Mock()
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = text
+            chunks.append(chunk)
+        self.client.client.chat.completions.create.return_value = iter(chunks)
+        messages = [{"role": "user", "content": "What are SEO trends?"}]
+
+        streamed = list(self.client.stream_chat(messages))
+        cached = list(self.client.stream_chat(messages))
+
+        self.assertEqual(streamed, ["Fresh", " ", "answer"])
+        self.assertEqual(cached, ["Fresh answer"])
+        self.client.client.chat.completions.create.assert_called_once()
+
+    def test_achat_batch_preserves_order(self):
+        """Test that batched async chat returns results in input order."""
+        self.client.semantic_cache = None
+
+        async def create(model, messages, **kwargs):
+            response = Mock()
+            response.choices = [Mock()]
+            response.choices[0].message.content = f"Answer to {messages[0]['content']}"
+            return response
+
+        aclient = MagicMock()
+        aclient.__aenter__ = AsyncMock(return_value=aclient)
+        aclient.__aexit__ = AsyncMock(return_value=False)
+        aclient.chat.completions.create = AsyncMock(side_effect=create)
+
+        batch = [[{"role": "user", "content": str(i)}] for i in range(5)]
+        with patch.object(self.client, "_async_client", return_value=aclient):
+            results = asyncio.run(self.client.achat_batch(batch, max_concurrency=2))
+
+        self.assertEqual(results, [f"Answer to {i}" for i in range(5)])
+        self.assertEqual(aclient.chat.completions.create.call_count, 5)
+
+    def test_achat_writes_cache_off_the_event_loop(self):
+        """Test that achat stores its reply through a worker thread."""
+        self.client.semantic_cache = None
+        aclient = MagicMock()
+        aclient.chat.completions.create = AsyncMock(
+            return_value=self.client.client.chat.completions.create.return_value
+        )
+        messages = [{"role": "user", "content": "Classify this query"}]
+
+        with patch("connectors.llm.asyncio.to_thread", wraps=asyncio.to_thread) as mock_to_thread:
+            asyncio.run(self.client.achat(messages, temperature=0, aclient=aclient))
+
+        offloaded = [call.args[0] for call in mock_to_thread.call_args_list]
+        self.assertIn(self.client._store_cache, offloaded)
+        self.assertEqual(self.client.chat(messages, temperature=0), "Fresh answer")
+        self.client.client.chat.completions.create.assert_not_called()
+
+    def test_fetch_batch_returns_results_in_prompt_order(self):
+        """Test that batch output lines are mapped back by custom_id."""
+        job = Mock(status="completed", output_file_id="file-out")
+        job.request_counts.total = 3
+        self.client.client.batches.retrieve.return_value = job
+
+        def line(custom_id, status_code, content):
+            body = {"choices": [{"message": {"content": content}}]}
+            return json.dumps(
+                {"custom_id": custom_id, "response": {"status_code": status_code, "body": body}}
+            )
+
+        self.client.client.files.content.return_value.text = "\n".join(
+            [line("2", 200, "third"), line("0", 200, "first"), line("1", 500, "failed")]
+        )
+
+        results = self.client.fetch_batch("batch-1", poll_interval=0)
+
+        self.assertEqual(results, ["first", None, "third"])
+
+
+if __name__ == '__main__':
+    unittest.main()
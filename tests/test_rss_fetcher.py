@@ -0,0 +1,191 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+from scraper.feed_cache import FeedCache
+from scraper.parallel_rss_fetcher import ParallelRSSFetcher
+from scraper.rss_fetcher import RSSFetcher
+from scraper.text_cleaner import clean_text, compile_keywords, parse_date
+
+
+RSS_BYTES = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel><title>Blog</title>
+<item><title>SEO in 2024</title><link>https://example.com/seo</link>
+<pubDate>Mon, 15 Jan 2024 10:00:00 +0200</pubDate></item>
+<item><title>Company picnic</title><link>https://example.com/picnic</link></item>
+</channel></rss>"""
+
+
+def mock_session(status, body=b"", headers=None):
+    """aiohttp-style session whose get() yields one canned response."""
+    response = MagicMock(status=status, headers=headers or {})
+    response.read = AsyncMock(return_value=body)
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=response)
+    context.__aexit__ = AsyncMock(return_value=False)
+    session = MagicMock()
+    session.get.return_value = context
+    return session
+
+
+class TestParallelRSSFetcher(unittest.TestCase):
+    """Test cases for the ParallelRSSFetcher class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = FeedCache(Path(self.tmp_dir.name, "feeds.json"))
+        self.fetcher = ParallelRSSFetcher(
+            feeds=["https://example.com/feed"], keywords=["SEO"], feed_cache=self.cache
+        )
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.tmp_dir.cleanup()
+
+    def test_is_relevant_matches_keywords_case_insensitively(self):
+        """Test that the compiled keyword pattern ignores case."""
+        self.assertTrue(self.fetcher._is_relevant("SEO tips", ""))
+        self.assertFalse(self.fetcher._is_relevant("Company picnic", "Photos"))
+
+    def test_fetch_parses_bytes_and_stores_validators(self):
+        """Test that a 200 response is parsed and its ETag saved once committed."""
+        session = mock_session(200, RSS_BYTES, {"ETag": '"abc"', "Last-Modified": "Mon"})
+
+        articles = asyncio.run(self.fetcher.fetch_feed_async(session, "https://example.com/feed"))
+
+        self.assertEqual([a["link"] for a in articles], ["https://example.com/seo"])
+        self.assertEqual(articles[0]["published"], "2024-01-15T08:00:00")
+        self.assertEqual(self.cache.get("https://example.com/feed"), {})
+
+        self.fetcher.commit_validators()
+        reloaded = FeedCache(self.cache.path)
+        self.assertEqual(reloaded.get("https://example.com/feed"), {"etag": '"abc"', "modified": "Mon"})
+
+    def test_unchanged_feed_is_skipped(self):
+        """Test that stored validators are sent and a 304 yields no articles."""
+        self.cache.update("https://example.com/feed", '"abc"', None)
+        session = mock_session(304)
+
+        articles = asyncio.run(self.fetcher.fetch_feed_async(session, "https://example.com/feed"))
+
+        self.assertEqual(articles, [])
+        headers = session.get.call_args.kwargs["headers"]
+        self.assertEqual(headers, {"If-None-Match": '"abc"'})
+
+    def test_force_skips_conditional_headers(self):
+        """Test that a forced fetch downloads feeds even if they are unchanged."""
+        self.cache.update("https://example.com/feed", '"abc"', None)
+        self.fetcher.force = True
+        session = mock_session(200, RSS_BYTES, {"ETag": '"def"'})
+
+        articles = asyncio.run(self.fetcher.fetch_feed_async(session, "https://example.com/feed"))
+
+        self.assertEqual(len(articles), 1)
+        self.assertEqual(session.get.call_args.kwargs["headers"], {})
+        self.fetcher.commit_validators()
+        self.assertEqual(self.cache.get("https://example.com/feed"), {"etag": '"def"'})
+
+    @patch('requests.get')
+    def test_threaded_fetch_parses_in_worker_processes(self, mock_get):
+        """Test that downloaded feeds are parsed and their validators stored."""
+        mock_get.return_value = MagicMock(
+            status_code=200, content=RSS_BYTES, headers={"ETag": '"abc"'}
+        )
+
+        articles = self.fetcher.fetch_all_feeds_threaded()
+        self.fetcher.commit_validators()
+
+        self.assertEqual([a["link"] for a in articles], ["https://example.com/seo"])
+        self.assertEqual(self.cache.get("https://example.com/feed"), {"etag": '"abc"'})
+
+
+class TestRSSFetcher(unittest.TestCase):
+    """Test cases for the RSSFetcher class."""
+
+    @patch('scraper.rss_fetcher.aiohttp.ClientSession')
+    def test_fetch_parses_changed_feeds_in_order(self, mock_session_class):
+        """Test that every feed is requested and unchanged feeds are skipped."""
+        responses = {
+            "https://a.example/feed": (200, RSS_BYTES),
+            "https://b.example/unchanged": (304, b""),
+        }
+
+        def get(url, headers, timeout):
+            status, body = responses[url]
+            return mock_session(status, body).get.return_value
+
+        session = MagicMock()
+        session.get.side_effect = get
+        mock_session_class.return_value.__aenter__ = AsyncMock(return_value=session)
+        mock_session_class.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = FeedCache(Path(tmp_dir, "feeds.json"))
+            fetcher = RSSFetcher(feeds=list(responses), keywords=["seo"], feed_cache=cache)
+
+            articles = fetcher.fetch()
+
+        self.assertEqual(session.get.call_count, 2)
+        self.assertEqual([a["link"] for a in articles], ["https://example.com/seo"])
+
+    def test_validators_are_saved_only_when_committed(self):
+        """Test that a fetched feed's ETag reaches the feed cache on commit, not on download."""
+        session = mock_session(200, RSS_BYTES, {"ETag": '"abc"'})
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = FeedCache(Path(tmp_dir, "feeds.json"))
+            fetcher = RSSFetcher(feeds=["https://a.example/feed"], keywords=["seo"], feed_cache=cache)
+
+            asyncio.run(fetcher._download(session, "https://a.example/feed"))
+            self.assertEqual(cache.get("https://a.example/feed"), {})
+
+            fetcher.commit_validators()
+            self.assertEqual(FeedCache(cache.path).get("https://a.example/feed"), {"etag": '"abc"'})
+
+    def test_fetch_batches_splits_articles(self):
+        """Test that streamed articles are grouped into lists of batch_size."""
+        fetcher = RSSFetcher(feeds=[], keywords=["seo"], feed_cache=Mock())
+        articles = [{"link": f"https://example.com/{i}"} for i in range(5)]
+
+        with patch.object(fetcher, "iter_entries", return_value=iter(articles)):
+            batches = list(fetcher.fetch_batches(batch_size=2))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+
+
+class TestCleanText(unittest.TestCase):
+    """Test cases for the text_cleaner helpers."""
+
+    def test_parse_date_prefers_parsed_time_and_falls_back_to_rfc822(self):
+        """Test that dates are read from feedparser's struct_time or the raw string."""
+        parsed = {"published_parsed": (2024, 1, 15, 8, 0, 0, 0, 15, 0)}
+        raw = {"published": "Mon, 15 Jan 2024 10:00:00 +0200"}
+
+        self.assertEqual(parse_date(parsed), "2024-01-15T08:00:00")
+        self.assertEqual(parse_date(raw), "2024-01-15T08:00:00")
+        self.assertEqual(parse_date({"published": "soon"}), "")
+
+    def test_strips_html_and_collapses_whitespace(self):
+        """Test that tags, scripts and entities are removed from feed summaries."""
+        raw = "<p>SEO &amp; content</p>\n\n<script>track()</script><b>tips</b>"
+        self.assertEqual(clean_text(raw), "SEO & content tips")
+
+    def test_truncates_on_word_boundary(self):
+        """Test that long texts are cut to at most max_chars."""
+        self.assertEqual(clean_text("one two three", max_chars=9), "one two")
+
+    def test_compile_keywords_matches_any_keyword(self):
+        """Test that one pattern finds any keyword, escaping regex characters."""
+        pattern = compile_keywords(["SEO", "c++", "content"])
+
+        self.assertIsNotNone(pattern.search("learning c++ for marketers"))
+        self.assertIsNotNone(pattern.search("seo tips"))
+        self.assertIsNone(pattern.search("company picnic"))
+        self.assertIsNone(compile_keywords([]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,104 +3,116 @@
 Test script for run_daily.py with improved error handling.
 
 This script tests the daily update process with better error handling,
-timeouts, and progress tracking.
+timeouts, and progress tracking. Under pytest the components come from the
+session fixtures in conftest.py, with the summarizer over a stub client; run
+directly, it builds them itself.
 """
 
+import importlib.util
 import os
 import sys
-import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+REQUIRED_VARS = [
+    'DEEPSEEK_API_KEY',
+    'NEO4J_URI',
+    'NEO4J_USER',
+    'NEO4J_PASSWORD'
+]
 
-def test_environment():
+REQUIRED_MODULES = [
+    'functions',
+    'scraper.rss_fetcher',
+    'processor.summarizer',
+    'storage.db_interface',
+    'storage.graph_interface',
+    'storage.knowledge_graph',
+    'storage.vector_store',
+]
+
+
+def missing_environment(env) -> list:
+    """Return the required environment variables that are not set."""
+    return [var for var in REQUIRED_VARS if not env.get(var)]
+
+
+@pytest.mark.integration
+def test_environment(env):
     """Test if all required environment variables are set."""
-    required_vars = [
-        'DEEPSEEK_API_KEY',
-        'NEO4J_URI',
-        'NEO4J_USER',
-        'NEO4J_PASSWORD'
-    ]
-    
-    missing_vars = []
-    for var in required_vars:
-        if not os.getenv(var):
-            missing_vars.append(var)
-    
+    missing_vars = missing_environment(env)
     if missing_vars:
-        print(f"❌ Missing environment variables: {missing_vars}")
-        print("Please check your .env file.")
-        return False
-    
-    print("✅ All required environment variables are set.")
-    return True
+        pytest.skip(f"Missing environment variables: {missing_vars}")
 
 def test_imports():
-    """Test if all required modules can be imported."""
-    try:
-        from functions import update_knowledge_base
-        from scraper.rss_fetcher import RSSFetcher
-        from processor.summarizer import Summarizer
-        from storage.db_interface import MongoStorage
-        from storage.graph_interface import GraphStorage
-        from storage.knowledge_graph import KnowledgeGraph
-        from storage.vector_store import VectorStore
-        print("✅ All modules imported successfully.")
-        return True
-    except ImportError as e:
-        print(f"❌ Import error: {e}")
-        return False
+    """Test if all required modules can be found."""
+    # Only locate the modules; the unit tests import and exercise them, so
+    # running their top-level code here again would be wasted work
+    missing = [name for name in REQUIRED_MODULES if importlib.util.find_spec(name) is None]
+    assert not missing, f"Modules not found: {missing}"
+
+@pytest.fixture
+def summarizer():
+    """Summarizer over a stub client, so the smoke test needs no API key."""
+    from connectors.llm import DeepSeekClient
+    from processor.summarizer import Summarizer
 
-def test_basic_functionality():
+    return Summarizer(llm_client=Mock(spec=DeepSeekClient))
+
+def test_basic_functionality(rss_fetcher, summarizer, vector_store):
     """Test basic functionality without running the full update."""
-    try:
-        print("🧪 Testing basic functionality...")
-        
-        # Test RSS fetcher
-        from scraper.rss_fetcher import RSSFetcher
-        fetcher = RSSFetcher()
-        print("✅ RSSFetcher initialized")
-        
-        # Test summarizer
-        from processor.summarizer import Summarizer
-        summarizer = Summarizer()
-        print("✅ Summarizer initialized")
-        
-        # Test vector store
-        from storage.vector_store import VectorStore
-        vs = VectorStore()
-        print("✅ VectorStore initialized")
-        
-        print("✅ Basic functionality test passed.")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Basic functionality test failed: {e}")
-        return False
+    assert rss_fetcher.feeds
+    assert summarizer.llm_client is not None
+    assert vector_store.index_path is not None
+
+def check_environment():
+    """Raise if a required environment variable is not set."""
+    missing_vars = missing_environment(os.environ)
+    assert not missing_vars, f"Missing environment variables: {missing_vars}. Please check your .env file."
+
+def check_basic_functionality():
+    """Build the daily update's components and check them."""
+    from scraper.rss_fetcher import RSSFetcher
+    from processor.summarizer import Summarizer
+    from storage.vector_store import VectorStore
+    test_basic_functionality(RSSFetcher(), Summarizer(), VectorStore())
+
+CHECKS = {
+    "Environment variables": check_environment,
+    "Module imports": test_imports,
+    "Basic functionality": check_basic_functionality,
+}
 
 def main():
     """Main test function."""
     print("🧪 Testing run_daily.py improvements...")
-    
-    # Test 1: Environment variables
-    if not test_environment():
-        return False
-    
-    # Test 2: Module imports
-    if not test_imports():
-        return False
-    
-    # Test 3: Basic functionality
-    if not test_basic_functionality():
+    load_dotenv()
+
+    # The checks are independent, so their imports and client setup overlap
+    # instead of running back to back; results are reported in order once
+    # all of them have finished
+    with ThreadPoolExecutor(max_workers=len(CHECKS)) as pool:
+        futures = {name: pool.submit(check) for name, check in CHECKS.items()}
+
+    passed = True
+    for name, future in futures.items():
+        error = future.exception()
+        if error is None:
+            print(f"✅ {name} check passed.")
+        else:
+            print(f"❌ {name} check failed: {error}")
+            passed = False
+    if not passed:
         return False
-    
+
     print("\n✅ All tests passed! The run_daily.py script should work properly.")
     print("\nTo run the full daily update:")
     print("python scheduler/run_daily.py")
-    
+
     return True
 
 if __name__ == "__main__":
     success = main()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+    sys.exit(0 if success else 1)
@@ -0,0 +1,956 @@
+import asyncio
+import base64
+import os
+import pickle
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+import faiss
+import numpy as np
+from neo4j import RoutingControl
+from pathlib import Path
+
+from pymongo.errors import BulkWriteError
+
+from connectors.llm import LLM_MAX_RETRIES, DeepSeekClient
+from connectors.response_cache import ResponseCache
+from scraper.parallel_rss_fetcher import store_in_backends
+from storage.db_interface import MongoStorage, close_clients
+from storage.graph_interface import GraphStorage
+from storage.knowledge_graph import SCHEMA_BACKFILL_QUERIES, SCHEMA_QUERIES, SCHEMA_VERSION, KnowledgeGraph, article_id
+from storage.neo4j_driver import NEO4J_DATABASE, close_drivers, get_driver, run_read, run_unwind
+from storage.vector_store import VectorStore
+
+
+def querying(driver):
+    """Answer `driver.execute_query` from the returned mock's `run(query, params)`."""
+    db = Mock()
+    driver.execute_query.side_effect = (
+        lambda query, params, **kwargs: kwargs["result_transformer_"](db.run(query, params))
+    )
+    return db
+
+
+def extracting(kg, extracted):
+    """Make `kg` extract `extracted` from every article without calling the LLM."""
+    kg.extract_entities_and_relationships_many = Mock(
+        side_effect=lambda articles: [extracted] * len(articles)
+    )
+
+
+class TestMongoStorage(unittest.TestCase):
+    """Test cases for the MongoStorage class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        with patch('storage.db_interface.MongoClient'):
+            self.db = MongoStorage()
+        self.db.collection = Mock()
+        self.articles = [
+            {"title": "Old", "link": "https://example.com/old"},
+            {"title": "New", "link": "https://example.com/new"},
+            {"title": "New again", "link": "https://example.com/new"},
+        ]
+
+    def tearDown(self):
+        """Clean up after tests."""
+        close_clients()
+
+    @patch('storage.db_interface.MongoClient')
+    def test_client_is_shared_per_uri(self, mock_client):
+        """Test that MongoStorage instances with the same URI reuse one client."""
+        close_clients()
+        mock_client.side_effect = lambda *args, **kwargs: MagicMock()
+
+        first = MongoStorage()
+        second = MongoStorage()
+        other = MongoStorage(uri="mongodb://other:27017/")
+
+        self.assertIs(first.client, second.client)
+        self.assertIsNot(first.client, other.client)
+
+    def test_save_articles_upserts_by_link(self):
+        """Test that articles are written in one bulk upsert keyed by link."""
+        self.db.collection.bulk_write.return_value.upserted_count = 1
+
+        inserted = self.db.save_articles(self.articles)
+
+        self.assertEqual(inserted, 1)
+        self.db.collection.bulk_write.assert_called_once()
+        operations = self.db.collection.bulk_write.call_args[0][0]
+        self.assertEqual(len(operations), 3)
+        self.assertEqual(operations[0]._filter, {"link": "https://example.com/old"})
+        self.assertIn("$setOnInsert", operations[0]._doc)
+
+    def test_save_articles_replaces_stored_summary(self):
+        """Test that a new summary overwrites the stored one while other fields stay insert-only."""
+        self.db.collection.bulk_write.return_value.upserted_count = 0
+        article = dict(self.articles[0], summary_processed="Fresh")
+
+        self.db.save_articles([article])
+
+        operation = self.db.collection.bulk_write.call_args[0][0][0]
+        self.assertEqual(operation._doc["$set"], {"summary_processed": "Fresh"})
+        self.assertNotIn("summary_processed", operation._doc["$setOnInsert"])
+
+    def test_save_articles_writes_in_batches(self):
+        """Test that large inputs are split into several bulk writes."""
+        self.db.collection.bulk_write.return_value.upserted_count = 1
+
+        inserted = self.db.save_articles(self.articles, batch_size=2)
+
+        self.assertEqual(inserted, 2)
+        batches = [call.args[0] for call in self.db.collection.bulk_write.call_args_list]
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+
+    def test_save_articles_ignores_duplicate_key_errors(self):
+        """Test that a duplicate-key bulk write error still reports the inserted count."""
+        self.db.collection.bulk_write.side_effect = BulkWriteError(
+            {"nUpserted": 1, "writeErrors": [{"code": 11000, "errmsg": "duplicate key"}]}
+        )
+
+        self.assertEqual(self.db.save_articles(self.articles[:2]), 1)
+
+    def test_save_articles_raises_other_write_errors(self):
+        """Test that a non-duplicate write error is raised after every batch was written."""
+        self.db.collection.bulk_write.side_effect = [
+            BulkWriteError({"nUpserted": 1, "writeErrors": [{"code": 121, "errmsg": "validation"}]}),
+            Mock(upserted_count=1),
+        ]
+
+        with self.assertRaises(BulkWriteError):
+            self.db.save_articles(self.articles, batch_size=2)
+        self.assertEqual(self.db.collection.bulk_write.call_count, 2)
+
+
+class TestStoreInBackends(unittest.TestCase):
+    """Test cases for the concurrent storage fan-out."""
+
+    def test_failure_in_one_backend_does_not_block_others(self):
+        """Test that every backend is written even if one of them fails."""
+        db, kg = Mock(), Mock()
+        kg.store_articles_with_knowledge_graph.side_effect = Exception("Neo4j down")
+        articles = [{"title": "New", "link": "https://example.com/new"}]
+
+        errors = store_in_backends(articles, db, kg)
+
+        self.assertEqual(list(errors), ["Knowledge Graph"])
+        db.save_articles.assert_called_once_with(articles)
+        kg.store_articles_with_knowledge_graph.assert_called_once_with(articles)
+
+
+class TestGraphStorage(unittest.TestCase):
+    """Test cases for the GraphStorage class."""
+
+    def test_store_article_uses_one_batched_query(self):
+        """Test that a single article goes through the UNWIND write path."""
+        driver = MagicMock()
+        db = querying(driver)
+        graph = GraphStorage(driver=driver)
+        article = {
+            "title": "SEO", "link": "https://example.com/seo",
+            "summary_processed": "Summary", "published": "2024-01-15T08:00:00",
+        }
+
+        graph.store_article(article)
+
+        db.run.assert_called_once()
+        query, params = db.run.call_args[0]
+        self.assertIn("MERGE (article:Article {id: row.article_id})", query)
+        self.assertEqual(params["rows"][0]["link"], article["link"])
+        self.assertEqual(params["rows"][0]["article_id"], article_id(article["link"]))
+
+
+class TestKnowledgeGraph(unittest.TestCase):
+    """Test cases for the KnowledgeGraph batch writer."""
+
+    @patch('storage.knowledge_graph.DeepSeekClient')
+    @patch('storage.knowledge_graph.get_driver')
+    def test_mentions_are_deduplicated_and_created(self, mock_get_driver, mock_llm):
+        """Test that repeated entities of an article become one guarded CREATE row."""
+        with patch.dict('os.environ', {"DEEPSEEK_API_KEY": "test-key"}):
+            kg = KnowledgeGraph(uri="bolt://test-mentions:7687")
+        db = querying(mock_get_driver.return_value)
+        entity = {"name": "Google", "type": "Company"}
+        extracting(kg, {"entities": [entity, entity]})
+
+        kg.store_articles_with_knowledge_graph([{"title": "SEO", "link": "https://example.com/seo"}])
+
+        query, params = db.run.call_args_list[-1][0]
+        self.assertIn("CREATE (article)-[:MENTIONS]->(entity)", query)
+        self.assertEqual(len(params["rows"]), 1)
+
+    @patch('storage.knowledge_graph.DeepSeekClient')
+    @patch('storage.knowledge_graph.get_driver')
+    def test_repeated_mentions_are_folded_before_the_write(self, mock_get_driver, mock_llm):
+        """Test that case variants, repeated topics and repeated triples are sent once."""
+        with patch.dict('os.environ', {"DEEPSEEK_API_KEY": "test-key"}):
+            kg = KnowledgeGraph(uri="bolt://test-folded:7687")
+        db = querying(mock_get_driver.return_value)
+        relationship = {"from": "hubspot", "to": "Google", "relationship": "partners_with"}
+        extracting(kg, {
+            "entities": [
+                {"name": "HubSpot", "type": "COMPANY"},
+                {"name": "Hubspot", "type": "COMPANY"},
+                {"name": "HUBSPOT", "type": "COMPANY"},
+                {"name": "Google", "type": "COMPANY"},
+            ],
+            "relationships": [relationship, dict(relationship, **{"from": "HubSpot"})],
+            "topics": ["CRM", "CRM"],
+        })
+
+        kg.store_article_with_knowledge_graph({"title": "CRM", "link": "https://example.com/crm"})
+
+        article_rows, entity_rows, relationship_rows = (
+            call[0][1]["rows"] for call in db.run.call_args_list
+        )
+        self.assertEqual(article_rows[0]["topics"], ["CRM"])
+        self.assertEqual([row["name"] for row in entity_rows], ["HubSpot", "Google"])
+        self.assertEqual(len(relationship_rows), 1)
+        self.assertEqual(relationship_rows[0]["from_name"], "HubSpot")
+
+    @patch('storage.knowledge_graph.DeepSeekClient')
+    @patch('storage.knowledge_graph.get_driver')
+    def test_recurring_entity_is_merged_once_per_batch(self, mock_get_driver, mock_llm):
+        """Test that an entity shared by several articles becomes a single row."""
+        with patch.dict('os.environ', {"DEEPSEEK_API_KEY": "test-key"}):
+            kg = KnowledgeGraph(uri="bolt://test-recurring:7687")
+        db = querying(mock_get_driver.return_value)
+        extracting(kg, {"entities": [{"name": "Google", "type": "Company"}]})
+        articles = [
+            {"title": "SEO", "link": "https://example.com/seo"},
+            {"title": "Ads", "link": "https://example.com/ads"},
+        ]
+
+        kg.store_articles_with_knowledge_graph(articles)
+
+        params = db.run.call_args_list[-1][0][1]
+        self.assertEqual(len(params["rows"]), 1)
+        self.assertEqual(len(params["rows"][0]["article_ids"]), 2)
+
+    @patch('storage.knowledge_graph.DeepSeekClient')
+    @patch('storage.knowledge_graph.get_driver')
+    def test_store_article_runs_one_query_per_category(self, mock_get_driver, mock_llm):
+        """Test that an article's entities, relationships and topics are written in bulk."""
+        driver = MagicMock()
+        with patch.dict('os.environ', {"DEEPSEEK_API_KEY": "test-key"}):
+            kg = KnowledgeGraph(uri="bolt://test-categories:7687", driver=driver)
+        mock_get_driver.assert_not_called()
+        db = querying(driver)
+        extracting(kg, {
+            "entities": [{"name": name, "type": "Company"} for name in ("Google", "Meta", "HubSpot")],
+            "relationships": [
+                {"from": "Google", "to": "Meta", "relationship": "competes_with"},
+                {"from": "HubSpot", "to": "Google", "relationship": "partners_with"},
+            ],
+            "topics": ["SEO", "Advertising", "CRM"],
+        })
+
+        kg.store_article_with_knowledge_graph({"title": "Ads", "link": "https://example.com/ads"})
+
+        self.assertEqual(db.run.call_count, 3)
+
+        # Every node MERGE pivots on a uniquely constrained property, so it is
+        # an index lookup rather than a label scan
+        constrained = set(re.findall(r"FOR \(\w+:(\w+)\) REQUIRE \w+\.(\w+) IS UNIQUE", " ".join(SCHEMA_QUERIES)))
+        merged = {
+            pattern
+            for call in db.run.call_args_list
+            for pattern in re.findall(r"MERGE \(\w+:(\w+) \{(\w+):", call[0][0])
+        }
+        self.assertTrue(merged)
+        self.assertLessEqual(merged, constrained)
+
+    @patch('storage.knowledge_graph.DeepSeekClient')
+    @patch('storage.knowledge_graph.get_driver')
+    def test_schema_is_created_once_per_database(self, mock_get_driver, mock_llm):
+        """Test that the schema runs in one write transaction, once per URI."""
+        session = mock_get_driver.return_value.session.return_value.__enter__.return_value
+        with patch.dict('os.environ', {"DEEPSEEK_API_KEY": "test-key"}):
+            KnowledgeGraph(uri="bolt://test-schema:7687")
+            KnowledgeGraph(uri="bolt://test-schema:7687")
+
+        create_schema, backfill, mark_schema = (call[0][0] for call in session.execute_write.call_args_list)
+        tx = Mock()
+        create_schema(tx)
+        self.assertEqual(tx.run.call_count, len(SCHEMA_QUERIES))
+        tx = Mock()
+        backfill(tx)
+        self.assertEqual([call.args[0] for call in tx.run.call_args_list], list(SCHEMA_BACKFILL_QUERIES))
+        self.assertIn("MERGE (article)-[:TAGGED]->(topic)", SCHEMA_BACKFILL_QUERIES[0])
+        tx = Mock()
+        mark_schema(tx)
+        tx.run.assert_called_once_with("MERGE (:SchemaVersion {version: $version})", {"version": SCHEMA_VERSION})
+
+    @patch('storage.knowledge_graph.DeepSeekClient')
+    @patch('storage.knowledge_graph.get_driver')
+    def test_schema_is_skipped_when_database_has_current_version(self, mock_get_driver, mock_llm):
+        """Test that a database marked with the current schema version gets no DDL."""
+        driver = mock_get_driver.return_value
+        querying(driver).run.return_value = [{"ready": True}]
+        with patch.dict('os.environ', {"DEEPSEEK_API_KEY": "test-key"}):
+            KnowledgeGraph(uri="bolt://test-schema-version:7687")
+
+        self.assertEqual(driver.execute_query.call_args[0][1], {"version": SCHEMA_VERSION})
+        driver.session.assert_not_called()
+
+    def test_article_id_is_stable_across_processes(self):
+        """Test that article ids do not depend on the interpreter's hash seed."""
+        link = "https://example.com/seo"
+        code = f"from storage.knowledge_graph import article_id; print(article_id({link!r}))"
+        root = str(Path(__file__).resolve().parent.parent)
+
+        for seed in ("1", "2"):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            output = subprocess.run(
+                [sys.executable, "-c", code], cwd=root, env=env,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+            self.assertEqual(output, article_id(link))
+
+        self.assertRegex(article_id(link), r"^article_[0-9a-f]{16}$")
+
+    def test_entity_network_reuses_fixed_query_per_depth(self):
+        """Test that each depth maps to one constant query and large depths are capped."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.driver = MagicMock()
+        db = querying(kg.driver)
+        db.run.return_value = []
+
+        kg.get_entity_network("Google", depth=2)
+        kg.get_entity_network("HubSpot", depth=2)
+        kg.get_entity_network("Google", depth=9)
+
+        queries = [call.args[0] for call in db.run.call_args_list]
+        self.assertIs(queries[0], queries[1])
+        self.assertIn("[*1..2]", queries[0])
+        self.assertIn("[*1..5]", queries[2])
+        self.assertEqual(db.run.call_args_list[1].args[1], {"entity_name": "HubSpot"})
+
+    def test_query_limits_articles_before_expanding_entities(self):
+        """Test that entities are aggregated in a subquery after the LIMIT."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.driver = MagicMock()
+        db = querying(kg.driver)
+        db.run.return_value = []
+
+        kg.query_knowledge_graph("SEO trends", limit=5)
+
+        query, params = db.run.call_args[0]
+        self.assertLess(query.index("LIMIT $limit"), query.index("MENTIONS"))
+        self.assertIn("CALL {", query)
+        self.assertEqual(params, {"search": "seo trends", "limit": 5})
+
+    def test_query_escapes_lucene_syntax(self):
+        """Test that user input is passed to the fulltext index as literal terms."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.driver = MagicMock()
+        db = querying(kg.driver)
+        db.run.return_value = []
+
+        kg.query_knowledge_graph("C++ (ads) OR a")
+
+        query, params = db.run.call_args[0]
+        self.assertIn("db.index.fulltext.queryNodes", query)
+        self.assertEqual(params["search"], r"c\+\+ \(ads\)")
+
+    def test_query_batch_groups_results_per_query(self):
+        """Test that several queries run as one read and are split back in order."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.driver = MagicMock()
+        db = querying(kg.driver)
+        db.run.return_value = [
+            {"i": 0, "title": "SEO Guide"},
+            {"i": 2, "title": "Email Tips"},
+            {"i": 2, "title": "Email Lists"},
+        ]
+
+        results = kg.query_knowledge_graph_batch(["seo", "", "email marketing"], limit=5)
+
+        db.run.assert_called_once()
+        query, params = db.run.call_args[0]
+        self.assertIn("UNWIND $rows", query)
+        self.assertEqual(
+            params["rows"], [{"i": 0, "search": "seo"}, {"i": 2, "search": "email marketing"}]
+        )
+        self.assertEqual(
+            results,
+            [[{"title": "SEO Guide"}], [], [{"title": "Email Tips"}, {"title": "Email Lists"}]],
+        )
+
+    def test_stats_are_read_in_one_query(self):
+        """Test that node, relationship and source counts come from a single read."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.driver = MagicMock()
+        db = querying(kg.driver)
+        db.run.return_value = [{
+            "nodes": [{"type": "Article", "count": 100}, {"type": "Entity", "count": 50}],
+            "relationships": [{"type": "MENTIONS", "count": 200}],
+            "articles_by_source": [{"source": "HubSpot", "count": 30}],
+        }]
+
+        stats = kg.get_knowledge_graph_stats()
+
+        db.run.assert_called_once()
+        self.assertIn("WHERE NOT n:SchemaVersion", db.run.call_args[0][0])
+        self.assertEqual(stats, {
+            "nodes": {"Article": 100, "Entity": 50},
+            "relationships": {"MENTIONS": 200},
+            "articles_by_source": [{"source": "HubSpot", "count": 30}],
+        })
+
+    def test_entity_networks_are_read_in_one_query(self):
+        """Test that several entity networks come from one read, grouped by name."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.driver = MagicMock()
+        db = querying(kg.driver)
+        google, ads = Mock(labels={"Entity"}), Mock(labels={"Topic"})
+        google.get.return_value, ads.get.return_value = "Google", "Ads"
+        path = Mock(nodes=[google, ads], relationships=[Mock(start_node=google, end_node=ads, type="RELATES_TO")])
+        db.run.return_value = [{"name": "Google", "path": path}]
+
+        networks = kg.get_entity_networks(["Google", "Meta"], depth=1)
+
+        db.run.assert_called_once()
+        query, params = db.run.call_args[0]
+        self.assertIn("UNWIND $names", query)
+        self.assertEqual(params, {"names": ["Google", "Meta"]})
+        self.assertEqual(networks["Google"]["relationships"], [{"from": "Google", "to": "Ads", "type": "RELATES_TO"}])
+        self.assertEqual(networks["Meta"], {"entity": "Meta", "nodes": [], "relationships": []})
+
+    def test_basic_entity_extraction(self):
+        """Test that the keyword fallback finds companies and topics case-insensitively."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        article = {"title": "google and HubSpot on seo", "summary": "Email Marketing tips"}
+
+        result = kg._basic_entity_extraction(article)
+
+        companies = [e["name"] for e in result["entities"] if e["type"] == "COMPANY"]
+        self.assertEqual(companies, ["google", "HubSpot"])
+        self.assertEqual(result["topics"], ["SEO", "email marketing"])
+
+    def test_basic_entity_extraction_lists_each_company_once(self):
+        """Test that a company mentioned several times becomes one entity."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        article = {"title": "Google Ads vs Meta", "summary": "Google and Meta cut Google prices"}
+
+        result = kg._basic_entity_extraction(article)
+
+        self.assertEqual([e["name"] for e in result["entities"]], ["Google", "Meta"])
+
+    def test_extract_entities_decodes_fenced_json(self):
+        """Test that the first JSON object is decoded and trailing text ignored."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.llm_client = Mock()
+        kg.llm_client.summarize.return_value = (
+            '```json\n{"entities": [{"name": "Google", "type": "COMPANY"}]}\n``` {see above}'
+        )
+
+        result = kg.extract_entities_and_relationships({"title": "SEO", "summary": ""})
+
+        self.assertEqual(result, {"entities": [{"name": "Google", "type": "COMPANY"}]})
+
+    def test_extract_entities_falls_back_on_invalid_json(self):
+        """Test that malformed JSON falls back to keyword extraction."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.llm_client = Mock()
+        kg.llm_client.summarize.return_value = '{"entities": [oops'
+
+        result = kg.extract_entities_and_relationships({"title": "SEO", "summary": ""})
+
+        self.assertEqual(result["topics"], ["SEO"])
+
+    def test_extract_entities_falls_back_on_wrong_shape(self):
+        """Test that JSON whose fields are not lists falls back to keyword extraction."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.llm_client = Mock()
+        kg.llm_client.summarize.return_value = '```json\n{"entities": "Google", "topics": []}\n```'
+
+        result = kg.extract_entities_and_relationships({"title": "SEO", "summary": ""})
+
+        self.assertEqual(result["topics"], ["SEO"])
+
+    def test_extraction_of_unchanged_article_is_cached(self):
+        """Test that extracting the same article twice calls the LLM once."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            kg = KnowledgeGraph.__new__(KnowledgeGraph)
+            kg.llm_client = DeepSeekClient(
+                api_key="test-key", response_cache=ResponseCache(cache_dir=cache_dir)
+            )
+            kg.llm_client.client = Mock()
+            response = kg.llm_client.client.chat.completions.create.return_value
+            response.choices = [Mock()]
+            response.choices[0].message.content = '{"entities": [{"name": "Google", "type": "COMPANY"}]}'
+            article = {"title": "SEO", "summary": "Google ranking update"}
+
+            first = kg.extract_entities_and_relationships(article)
+            second = kg.extract_entities_and_relationships(article)
+
+        self.assertEqual(first, second)
+        kg.llm_client.client.chat.completions.create.assert_called_once()
+
+    def test_extract_many_overlaps_requests_and_keeps_order(self):
+        """Test that articles are extracted concurrently, falling back per article."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.llm_client = DeepSeekClient(api_key="test-key")
+        kg.llm_client.response_cache = None
+        in_flight, peak = 0, 0
+
+        async def create(model, messages, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if "Broken" in messages[1]["content"]:
+                raise RuntimeError("API error")
+            response = Mock()
+            response.choices = [Mock()]
+            response.choices[0].message.content = '{"topics": ["from LLM"]}'
+            return response
+
+        aclient = MagicMock()
+        aclient.__aenter__ = AsyncMock(return_value=aclient)
+        aclient.__aexit__ = AsyncMock(return_value=False)
+        aclient.chat.completions.create = AsyncMock(side_effect=create)
+        articles = [
+            {"title": "Ads", "summary": ""},
+            {"title": "Broken SEO", "summary": ""},
+            {"title": "Email", "summary": ""},
+        ]
+
+        with patch.object(kg.llm_client, "_async_client", return_value=aclient):
+            results = kg.extract_entities_and_relationships_many(articles)
+
+        self.assertEqual([r["topics"] for r in results], [["from LLM"], ["SEO"], ["from LLM"]])
+        self.assertEqual(peak, 3)
+
+
+class TestNeo4jDriver(unittest.TestCase):
+    """Test cases for the shared Neo4j driver registry."""
+
+    def tearDown(self):
+        """Clean up after tests."""
+        close_drivers()
+
+    @patch('storage.neo4j_driver.GraphDatabase.driver')
+    def test_driver_is_shared_per_credentials(self, mock_driver):
+        """Test that the same URI and credentials reuse one driver."""
+        mock_driver.side_effect = lambda *args, **kwargs: Mock()
+
+        first = get_driver("bolt://localhost:7687", "neo4j", "secret")
+        second = get_driver("bolt://localhost:7687", "neo4j", "secret")
+        other = get_driver("bolt://localhost:7687", "admin", "secret")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(mock_driver.call_count, 2)
+
+    def test_run_unwind_chunks_rows(self):
+        """Test that rows are sent in batch_size chunks, each routed to the writers."""
+        driver = Mock()
+        db = querying(driver)
+        rows = [{"i": i} for i in range(5)]
+
+        run_unwind(driver, "UNWIND $rows AS row RETURN row", rows, batch_size=2)
+
+        sent = [call.args[1]["rows"] for call in db.run.call_args_list]
+        self.assertEqual(sent, [rows[0:2], rows[2:4], rows[4:5]])
+        for call in driver.execute_query.call_args_list:
+            self.assertEqual(call.kwargs["database_"], NEO4J_DATABASE)
+            self.assertEqual(call.kwargs["routing_"], RoutingControl.WRITE)
+
+    def test_run_read_transforms_records_as_they_stream(self):
+        """Test that each record is converted while the cursor is consumed."""
+        driver = Mock()
+        querying(driver).run.return_value = iter([{"topic": "SEO"}, {"topic": "PPC"}])
+        transform = Mock(side_effect=lambda record: record["topic"])
+
+        topics = run_read(driver, "MATCH (t:Topic) RETURN t.name AS topic", transform=transform)
+
+        self.assertEqual(topics, ["SEO", "PPC"])
+        self.assertEqual(transform.call_count, 2)
+
+    def test_reads_are_routed_to_readers(self):
+        """Test that query methods run through execute_query with read routing."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.driver = MagicMock()
+        querying(kg.driver).run.return_value = [{"topic": "SEO", "frequency": 3}]
+
+        topics = kg.get_trending_topics(days=7)
+
+        self.assertEqual(topics, [{"topic": "SEO", "frequency": 3}])
+        kwargs = kg.driver.execute_query.call_args.kwargs
+        self.assertEqual(kwargs["database_"], NEO4J_DATABASE)
+        self.assertEqual(kwargs["routing_"], RoutingControl.READ)
+        kg.driver.session.assert_not_called()
+
+    @patch('storage.knowledge_graph.datetime')
+    def test_trending_topics_count_tagged_articles_in_window(self, mock_datetime):
+        """Test that trending topics expand TAGGED edges from a string time bound."""
+        mock_datetime.now.return_value = datetime(2024, 1, 31, 12, 0, 0, tzinfo=timezone.utc)
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.driver = MagicMock()
+        db = querying(kg.driver)
+        db.run.return_value = []
+
+        kg.get_trending_topics(days=30)
+
+        query, params = db.run.call_args[0]
+        self.assertIn("[:TAGGED]->(t:Topic)", query)
+        self.assertNotIn("UNWIND", query)
+        self.assertEqual(params, {"since": "2024-01-01T12:00:00", "limit": 20})
+
+    def test_related_articles_exclude_the_start_node_and_limit_before_projecting(self):
+        """Test that related articles are ranked in one pattern and limited before RETURN."""
+        kg = KnowledgeGraph.__new__(KnowledgeGraph)
+        kg.driver = MagicMock()
+        db = querying(kg.driver)
+        db.run.return_value = [{"title": "Ads", "link": "https://example.com/ads", "summary": "", "shared_entities": 2}]
+
+        related = kg.get_related_articles("SEO", limit=3)
+
+        self.assertEqual(related[0]["shared_entities"], 2)
+        query, params = db.run.call_args[0]
+        self.assertIn("-[:MENTIONS]->(entity:Entity)<-[:MENTIONS]-(other:Article)", query)
+        self.assertIn("WHERE other <> article", query)
+        self.assertLess(query.index("LIMIT $limit"), query.index("RETURN"))
+        self.assertEqual(params, {"title": "SEO", "limit": 3})
+
+
+def one_hot_embedding(text: str):
+    """1536-dim embedding with a single non-zero entry chosen by text length."""
+    vector = [0.0] * 1536
+    vector[len(text) % 1536] = 1.0
+    return vector
+
+
+def one_hot_embeddings(texts, batch_size=None):
+    return [one_hot_embedding(text) for text in texts]
+
+
+class TestVectorStore(unittest.TestCase):
+    """Test cases for the VectorStore class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index_path = Path(self.tmp_dir.name)
+        self.docs = [
+            {"title": "SEO", "summary_processed": "SEO basics"},
+            {"title": "Email", "summary_processed": "Email marketing guide"},
+        ]
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.tmp_dir.cleanup()
+
+    @patch.object(VectorStore, 'get_embedding', side_effect=one_hot_embedding)
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_saved_vectors_are_memory_mapped(self, mock_embeddings, mock_embedding):
+        """Test that a reloaded index is memory-mapped and still searchable."""
+        VectorStore(index_path=self.index_path, mmap=True).add_documents(self.docs)
+
+        vs = VectorStore(index_path=self.index_path, mmap=True)
+
+        self.assertIsInstance(vs.vectors, np.memmap)
+        self.assertEqual(vs.search("SEO basics", top_k=1)[0]["title"], "SEO")
+
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_saved_index_is_memory_mapped(self, mock_embeddings):
+        """Test that the search index is read with mmap only when enabled."""
+        VectorStore(index_path=self.index_path).add_documents(self.docs)
+
+        with patch('storage.vector_store.faiss.read_index', wraps=faiss.read_index) as mock_read:
+            VectorStore(index_path=self.index_path, mmap=True).index
+            VectorStore(index_path=self.index_path, mmap=False).index
+
+        flags = [call.args[1] for call in mock_read.call_args_list]
+        self.assertEqual(flags, [faiss.IO_FLAG_MMAP, 0])
+
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_saved_index_is_loaded_on_first_use(self, mock_embeddings):
+        """Test that constructing a store does not read it from disk."""
+        VectorStore(index_path=self.index_path).add_documents(self.docs)
+
+        with patch('storage.vector_store.np.load', wraps=np.load) as mock_load:
+            vs = VectorStore(index_path=self.index_path)
+            mock_load.assert_not_called()
+
+            self.assertEqual(len(vs.metadata), 2)
+            self.assertEqual(vs.index.ntotal, 2)
+        mock_load.assert_called_once()
+
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_add_documents_to_memory_mapped_index(self, mock_embeddings):
+        """Test that documents can be added on top of a memory-mapped index."""
+        VectorStore(index_path=self.index_path, mmap=True).add_documents(self.docs[:1])
+
+        vs = VectorStore(index_path=self.index_path, mmap=True)
+        vs.add_documents(self.docs[1:])
+
+        reloaded = VectorStore(index_path=self.index_path, mmap=False)
+        self.assertEqual(len(reloaded.vectors), 2)
+        self.assertEqual(reloaded.vectors.dtype, np.float16)
+        self.assertEqual(mock_embeddings.call_count, 2)
+        self.assertEqual([d["title"] for d in reloaded.metadata], ["SEO", "Email"])
+
+    @patch.object(VectorStore, 'get_embedding', side_effect=one_hot_embedding)
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_added_documents_are_searchable_without_reload(self, mock_embeddings, mock_embedding):
+        """Test that each add extends the search index incrementally."""
+        vs = VectorStore(index_path=self.index_path)
+        vs.add_documents(self.docs[:1])
+        vs.add_documents(self.docs[1:])
+
+        self.assertEqual(vs.index.ntotal, 2)
+        self.assertEqual(vs.search("Email marketing guide", top_k=1)[0]["title"], "Email")
+
+    @patch.object(VectorStore, 'get_embedding', side_effect=one_hot_embedding)
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_search_breadth_can_be_set_per_call(self, mock_embeddings, mock_embedding):
+        """Test that ef_search is passed to the HNSW search without changing the index."""
+        vs = VectorStore(index_path=self.index_path)
+        vs.add_documents(self.docs)
+
+        with patch('storage.vector_store.faiss.SearchParametersHNSW',
+                   wraps=faiss.SearchParametersHNSW) as mock_params:
+            self.assertEqual(vs.search("SEO basics", top_k=1, ef_search=16)[0]["title"], "SEO")
+            vs.search("SEO basics", top_k=1)
+
+        mock_params.assert_called_once_with(efSearch=16)
+        self.assertEqual(vs.index.hnsw.efSearch, 64)
+
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_saved_index_is_reused_and_rebuilt_when_stale(self, mock_embeddings):
+        """Test that the HNSW index is loaded from disk unless it misses vectors."""
+        VectorStore(index_path=self.index_path).add_documents(self.docs)
+
+        with patch.object(VectorStore, '_new_index', wraps=VectorStore._new_index) as mock_new_index:
+            vs = VectorStore(index_path=self.index_path)
+            self.assertEqual(vs.index.ntotal, 2)
+        mock_new_index.assert_called_once()  # only the empty placeholder
+
+        Path(self.index_path, "index.faiss").unlink()
+        self.assertEqual(VectorStore(index_path=self.index_path).index.ntotal, 2)
+
+    @patch.multiple('storage.vector_store', IVF_NLIST=2, IVF_NPROBE=2, PQ_NBITS=4, IVF_MIN_TRAIN=64)
+    def test_quantized_index_is_trained_once_store_is_large_enough(self):
+        """Test that a quantized store switches to IVF-PQ at IVF_MIN_TRAIN vectors."""
+        rng = np.random.default_rng(0)
+        embeddings = {f"doc {i}": rng.standard_normal(1536).tolist() for i in range(80)}
+        docs = [{"title": text, "summary_processed": text} for text in embeddings]
+
+        embed_batch = lambda texts, batch_size: [embeddings[text] for text in texts]
+
+        with patch.object(VectorStore, 'get_embeddings', side_effect=embed_batch), \
+                patch.object(VectorStore, 'get_embedding', side_effect=embeddings.get):
+            vs = VectorStore(index_path=self.index_path, quantized=True)
+            vs.add_documents(docs[:40])
+            self.assertNotIsInstance(vs.index, faiss.IndexIVFPQ)
+
+            vs.add_documents(docs[40:])
+            self.assertIsInstance(vs.index, faiss.IndexIVFPQ)
+            self.assertEqual(vs.index.ntotal, 80)
+            self.assertEqual(vs.search("doc 50", top_k=1)[0]["title"], "doc 50")
+
+        reloaded = VectorStore(index_path=self.index_path, quantized=True)
+        self.assertIsInstance(reloaded.index, faiss.IndexIVFPQ)
+        exact = VectorStore(index_path=self.index_path, quantized=False)
+        self.assertNotIsInstance(exact.index, faiss.IndexIVFPQ)
+        self.assertEqual(exact.index.ntotal, 80)
+
+    @patch.multiple('storage.vector_store', IVF_NLIST=4, IVF_NPROBE=2, PQ_NBITS=4, IVF_MIN_TRAIN=64)
+    def test_quantized_index_recall_matches_exact_search(self):
+        """Test that IVF-PQ finds the same top 10 as a flat search on a topic-clustered corpus."""
+        rng = np.random.default_rng(0)
+        topics = rng.standard_normal((16, 1536))
+        embeddings = {
+            f"topic {t} doc {i}": (topics[t] + 0.3 * rng.standard_normal(1536)).tolist()
+            for t in range(16) for i in range(10)
+        }
+        queries = {
+            f"topic {t}": (topics[t] + 0.3 * rng.standard_normal(1536)).tolist() for t in range(16)
+        }
+        docs = [{"title": text, "summary_processed": text} for text in embeddings]
+
+        embed_batch = lambda texts, batch_size=None: [{**embeddings, **queries}[text] for text in texts]
+
+        with patch.object(VectorStore, 'get_embeddings', side_effect=embed_batch):
+            vs = VectorStore(index_path=self.index_path, quantized=True)
+            vs.add_documents(docs)
+            self.assertIsInstance(vs.index, faiss.IndexIVFPQ)
+            results = vs.search_batch(list(queries), top_k=10)
+
+        flat = faiss.IndexFlatIP(1536)
+        flat.add(vs.vectors.astype(np.float32))
+        _, exact = flat.search(np.array(list(queries.values()), dtype=np.float32), 10)
+        expected = [{vs.metadata[i]["title"] for i in row} for row in exact]
+        found = [{hit["title"] for hit in hits} for hits in results]
+
+        recall = np.mean([len(f & e) / 10 for f, e in zip(found, expected)])
+        self.assertGreaterEqual(recall, 0.9)
+
+    @patch.multiple('storage.vector_store', SQ_MIN_TRAIN=32)
+    def test_quantized_hnsw_stores_8bit_codes_once_store_is_large_enough(self):
+        """Test that a quantized store moves its HNSW graph to 8-bit codes at SQ_MIN_TRAIN vectors."""
+        rng = np.random.default_rng(0)
+        embeddings = {f"doc {i}": rng.standard_normal(1536).tolist() for i in range(48)}
+        docs = [{"title": text, "summary_processed": text} for text in embeddings]
+
+        embed_batch = lambda texts, batch_size: [embeddings[text] for text in texts]
+
+        with patch.object(VectorStore, 'get_embeddings', side_effect=embed_batch), \
+                patch.object(VectorStore, 'get_embedding', side_effect=embeddings.get):
+            vs = VectorStore(index_path=self.index_path, quantized=True)
+            vs.add_documents(docs[:16])
+            self.assertEqual(VectorStore._index_kind(vs.index), "fp16")
+
+            vs.add_documents(docs[16:])
+            self.assertEqual(VectorStore._index_kind(vs.index), "sq8")
+            self.assertEqual(vs.index.ntotal, 48)
+            self.assertEqual(vs.search("doc 40", top_k=1)[0]["title"], "doc 40")
+
+        with patch.object(VectorStore, '_build_index') as mock_build:
+            reloaded = VectorStore(index_path=self.index_path, quantized=True)
+            self.assertEqual(VectorStore._index_kind(reloaded.index), "sq8")
+        mock_build.assert_not_called()
+        exact = VectorStore(index_path=self.index_path, quantized=False)
+        self.assertEqual(VectorStore._index_kind(exact.index), "fp16")
+
+    @patch.object(VectorStore, 'get_embedding', side_effect=one_hot_embedding)
+    @patch.object(VectorStore, 'get_embeddings')
+    def test_vectors_are_normalized_for_inner_product(self, mock_embeddings, mock_embedding):
+        """Test that unnormalized embeddings are ranked by cosine similarity."""
+        short, long = one_hot_embedding("SEO basics"), one_hot_embedding("Email marketing guide")
+        # A long vector pointing away from the query would win on raw inner product
+        mock_embeddings.return_value = [
+            [x * 0.5 for x in short], [10 * x + y for x, y in zip(long, short)]
+        ]
+        vs = VectorStore(index_path=self.index_path)
+        vs.add_documents(self.docs)
+
+        self.assertEqual(vs.index.metric_type, faiss.METRIC_INNER_PRODUCT)
+        self.assertAlmostEqual(float(np.linalg.norm(vs.vectors[1].astype(np.float32))), 1.0, places=3)
+        self.assertEqual(vs.search("SEO basics", top_k=1)[0]["title"], "SEO")
+
+        faiss.write_index(faiss.IndexFlatL2(1536), str(Path(self.index_path, "index.faiss")))
+        reloaded = VectorStore(index_path=self.index_path)
+        self.assertEqual(reloaded.index.metric_type, faiss.METRIC_INNER_PRODUCT)
+        self.assertEqual(reloaded.index.ntotal, 2)
+
+    @patch.object(VectorStore, '_save')
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_vector_buffer_grows_geometrically(self, mock_embeddings, mock_save):
+        """Test that repeated adds reuse spare capacity instead of copying."""
+        vs = VectorStore(index_path=self.index_path)
+        buffers = set()
+        for i in range(8):
+            vs.add_documents([{"title": str(i), "summary_processed": "x" * (i + 1)}])
+            buffers.add(id(vs._buffer))
+
+        self.assertEqual(len(vs.vectors), 8)
+        self.assertLessEqual(len(buffers), 4)  # capacities 1, 2, 4, 8
+        self.assertEqual(int(np.argmax(vs.vectors[7])), 8)
+
+    @patch.object(VectorStore, 'get_embedding', side_effect=one_hot_embedding)
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_repeated_texts_are_embedded_once(self, mock_embeddings, mock_embedding):
+        """Test that query embeddings are cached and duplicate summaries deduplicated."""
+        vs = VectorStore(index_path=self.index_path)
+        vs.add_documents(self.docs + [{"title": "SEO again", "summary_processed": "SEO basics"}])
+
+        self.assertEqual(mock_embeddings.call_args[0][0], ["SEO basics", "Email marketing guide"])
+        self.assertEqual(len(vs.metadata), 3)
+
+        vs.search("SEO basics")
+        vs.search("SEO basics")
+        mock_embedding.assert_called_once_with("SEO basics")
+
+    @patch.object(VectorStore, 'get_embedding', side_effect=one_hot_embedding)
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_search_batch_embeds_and_searches_queries_together(self, mock_embeddings, mock_embedding):
+        """Test that uncached queries are embedded in one request and searched in one call."""
+        vs = VectorStore(index_path=self.index_path)
+        vs.add_documents(self.docs)
+        vs.search("SEO basics")
+
+        with patch.object(vs.index, 'search', wraps=vs.index.search) as mock_search:
+            results = vs.search_batch(["Email marketing guide", "SEO basics", "Email marketing guide"], top_k=1)
+
+        self.assertEqual([r[0]["title"] for r in results], ["Email", "SEO", "Email"])
+        mock_search.assert_called_once()
+        self.assertEqual(mock_embeddings.call_args[0][0], ["Email marketing guide"])
+        mock_embedding.assert_called_once_with("SEO basics")
+
+    @patch.object(VectorStore, 'get_embeddings', side_effect=one_hot_embeddings)
+    def test_pickled_metadata_is_migrated_to_json(self, mock_embeddings):
+        """Test that a store saved with metadata.pkl loads and is rewritten as JSON."""
+        VectorStore(index_path=self.index_path).add_documents(self.docs[:1])
+        metadata_json = Path(self.index_path, "metadata.json")
+        with open(Path(self.index_path, "metadata.pkl"), "wb") as f:
+            pickle.dump([self.docs[0]], f)
+        metadata_json.unlink()
+
+        vs = VectorStore(index_path=self.index_path)
+        self.assertEqual(vs.metadata, [self.docs[0]])
+
+        vs.add_documents(self.docs[1:])
+        self.assertTrue(metadata_json.exists())
+        self.assertFalse(Path(self.index_path, "metadata.pkl").exists())
+        self.assertEqual(len(VectorStore(index_path=self.index_path).metadata), 2)
+
+    @patch('storage.vector_store.openai')
+    def test_get_embedding_decodes_base64(self, mock_openai):
+        """Test that embeddings are requested as base64 and decoded to float32."""
+        # The whole module is replaced: resolving openai.embeddings would
+        # build the default client, which needs OPENAI_API_KEY
+        mock_create = mock_openai.embeddings.create
+        vector = np.arange(1536, dtype=np.float32)
+        mock_create.return_value.data = [Mock(embedding=base64.b64encode(vector.tobytes()).decode())]
+
+        embedding = VectorStore(index_path=self.index_path).get_embedding("SEO basics")
+
+        self.assertEqual(mock_create.call_args.kwargs["encoding_format"], "base64")
+        self.assertEqual(embedding.dtype, np.float32)
+        np.testing.assert_array_equal(embedding, vector)
+
+    @patch.object(VectorStore, 'get_embedding', side_effect=one_hot_embedding)
+    def test_get_embeddings_batches_and_falls_back(self, mock_embedding):
+        """Test that texts are embedded per batch and failed batches one by one."""
+        texts = ["a", "bb", "ccc"]
+
+        async def embed_batches(batches):
+            self.assertEqual(batches, [["a", "bb"], ["ccc"]])
+            return [one_hot_embeddings(batches[0]), Exception("Bad input")]
+
+        vs = VectorStore(index_path=self.index_path)
+        with patch.object(vs, '_aembed_batches', side_effect=embed_batches):
+            embeddings = vs.get_embeddings(texts, batch_size=2)
+
+        self.assertEqual(embeddings, one_hot_embeddings(texts))
+        mock_embedding.assert_called_once_with("ccc")
+
+    @patch('storage.vector_store.AsyncOpenAI')
+    def test_batch_embeddings_keep_input_order_and_retry(self, mock_client_class):
+        """Test that batch responses are reordered by index and the client retries."""
+        client = mock_client_class.return_value.__aenter__.return_value = MagicMock()
+        mock_client_class.return_value.__aexit__ = AsyncMock(return_value=False)
+        encode = lambda value: base64.b64encode(np.float32([value]).tobytes()).decode()
+        data = [Mock(index=1, embedding=encode(1.0)), Mock(index=0, embedding=encode(0.0))]
+        client.embeddings.create = AsyncMock(return_value=Mock(data=data))
+
+        vs = VectorStore(index_path=self.index_path)
+        results = asyncio.run(vs._aembed_batches([["a", "b"]]))
+
+        self.assertEqual([[e.tolist() for e in batch] for batch in results], [[[0.0], [1.0]]])
+        self.assertEqual(mock_client_class.call_args.kwargs["max_retries"], LLM_MAX_RETRIES)
+
+
+if __name__ == '__main__':
+    unittest.main()
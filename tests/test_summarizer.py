@@ -0,0 +1,120 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+from connectors.llm import DeepSeekClient
+from processor.summarizer import Summarizer
+from scraper.parallel_rss_fetcher import ParallelArticleProcessor
+
+
+class TestSummarizer(unittest.TestCase):
+    """Test cases for the Summarizer class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        with patch('processor.summarizer.DeepSeekClient'):
+            self.summarizer = Summarizer()
+        self.llm_client = self.summarizer.llm_client
+
+    def test_summarize_batch_groups_texts(self):
+        """Test that texts are sent batch_size per request and mapped back in order."""
+        self.llm_client.achat_batch = AsyncMock(return_value=[
+            json.dumps({"summaries": ["one", "two"]}),
+            "```json\n" + json.dumps({"summaries": ["three"]}) + "\n```",
+        ])
+
+        results = self.summarizer.summarize_batch(["a", "b", "c"], batch_size=2)
+
+        self.assertEqual(results, ["one", "two", "three"])
+        batch = self.llm_client.achat_batch.call_args[0][0]
+        self.assertEqual(len(batch), 2)
+
+    def test_summarize_batch_retries_unparseable_groups(self):
+        """Test that a group with a malformed answer is summarized text by text."""
+        self.llm_client.achat_batch = AsyncMock(side_effect=[
+            [json.dumps({"summaries": ["one", "two"]}), "Error: Timeout"],
+            ["three"],
+        ])
+
+        results = self.summarizer.summarize_batch(["a", "b", "c"], batch_size=2)
+
+        self.assertEqual(results, ["one", "two", "three"])
+        self.assertEqual(self.llm_client.achat_batch.call_count, 2)
+
+    def test_truncated_group_retries_only_the_missing_texts(self):
+        """Test that a reply cut off at max_tokens keeps its complete summaries."""
+        self.llm_client.build_summarize_messages = DeepSeekClient.build_summarize_messages
+        self.llm_client.achat_batch = AsyncMock(side_effect=[
+            ['```json\n{"summaries": ["one", "two", "thr'],
+            ["three"],
+        ])
+
+        results = self.summarizer.summarize_batch(["a", "b", "c"], batch_size=3)
+
+        self.assertEqual(results, ["one", "two", "three"])
+        retried = self.llm_client.achat_batch.call_args_list[1][0][0]
+        self.assertEqual([messages[-1]["content"] for messages in retried], ["c"])
+        first_kwargs = self.llm_client.achat_batch.call_args_list[0].kwargs
+        self.assertGreaterEqual(first_kwargs["max_tokens"], 3 * 200)
+
+    def test_summarize_batch_sends_duplicate_texts_once(self):
+        """Test that repeated texts share one summary within and across calls."""
+        self.llm_client.achat_batch = AsyncMock(return_value=[
+            json.dumps({"summaries": ["one", "two"]}),
+        ])
+
+        first = self.summarizer.summarize_batch(["a", "b", "a"])
+        second = self.summarizer.summarize_batch(["b"])
+
+        self.assertEqual(first, ["one", "two", "one"])
+        self.assertEqual(second, ["two"])
+        self.llm_client.achat_batch.assert_called_once()
+
+    def test_messages_share_a_static_system_prefix(self):
+        """Test that only the user message varies between summarization requests."""
+        self.llm_client.build_summarize_messages = DeepSeekClient.build_summarize_messages
+
+        first = self.summarizer.build_messages("First article")
+        second = self.summarizer.build_messages("Second article")
+
+        self.assertEqual(first[0], second[0])
+        self.assertEqual(first[1]["content"], "First article")
+
+    def test_parse_batch_rejects_wrong_count(self):
+        """Test that an answer with the wrong number of summaries is rejected."""
+        response = json.dumps({"summaries": ["only one"]})
+        self.assertIsNone(Summarizer._parse_batch(response, 2))
+
+    def test_parse_batch_ignores_text_after_the_object(self):
+        """Test that a fenced answer followed by more braces still parses."""
+        response = '```json\n{"summaries": ["one", "two"]}\n``` {see above}'
+        self.assertEqual(Summarizer._parse_batch(response, 2), ["one", "two"])
+
+
+class TestParallelArticleProcessor(unittest.TestCase):
+    """Test cases for the ParallelArticleProcessor class."""
+
+    @patch('processor.summarizer.Summarizer')
+    def test_summarizer_is_reused_across_articles(self, mock_summarizer_class):
+        """Test that one Summarizer serves every processed article."""
+        mock_summarizer_class.return_value.summarize.return_value = "Summary"
+        processor = ParallelArticleProcessor()
+
+        for title in ["First", "Second"]:
+            processed = processor.process_article({"title": title, "summary": ""})
+            self.assertEqual(processed["summary_processed"], "Summary")
+
+        mock_summarizer_class.assert_called_once()
+
+    @patch('processor.summarizer.DeepSeekClient')
+    def test_injected_client_is_used(self, mock_client_class):
+        """Test that a client passed to the processor is handed to its Summarizer."""
+        llm_client = Mock()
+        processor = ParallelArticleProcessor(llm_client=llm_client)
+
+        self.assertIs(processor.summarizer.llm_client, llm_client)
+        mock_client_class.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
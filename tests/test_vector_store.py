@@ -1,76 +1,62 @@
-import os
+import re
 
-from dotenv import load_dotenv
-from connectors.llm import DeepSeekClient
-
-from storage.vector_store import VectorStore
+import pytest
 
 # from sentence_transformers import SentenceTransformer
 
 
+# REBEL's special tokens can be glued to the next marker ("<s><triplet>"),
+# so they are removed from the text rather than skipped as tokens
+_SPECIAL_TOKENS_RE = re.compile(r"<s>|<pad>|</s>")
+# Which field the tokens after each marker belong to
+_TRIPLET_MARKERS = {"<triplet>": "t", "<subj>": "s", "<obj>": "o"}
+
+
 def extract_triplets(text):
     triplets = []
-    relation, subject, relation, object_ = "", "", "", ""
-    text = text.strip()
+    subject, relation, object_ = [], [], []
+    fields = {"t": subject, "s": object_, "o": relation}
     current = "x"
-    for token in (
-        text.replace("<s>", "")
-        .replace("<pad>", "")
-        .replace("</s>", "")
-        .split()
-    ):
-        if token == "<triplet>":
-            current = "t"
-            if relation != "":
-                triplets.append(
-                    {
-                        "head": subject.strip(),
-                        "type": relation.strip(),
-                        "tail": object_.strip(),
-                    }
-                )
-                relation = ""
-            subject = ""
-        elif token == "<subj>":
-            current = "s"
-            if relation != "":
-                triplets.append(
-                    {
-                        "head": subject.strip(),
-                        "type": relation.strip(),
-                        "tail": object_.strip(),
-                    }
-                )
-            object_ = ""
-        elif token == "<obj>":
-            current = "o"
-            relation = ""
-        else:
-            if current == "t":
-                subject += " " + token
-            elif current == "s":
-                object_ += " " + token
-            elif current == "o":
-                relation += " " + token
-    if subject != "" and relation != "" and object_ != "":
+
+    def emit():
         triplets.append(
             {
-                "head": subject.strip(),
-                "type": relation.strip(),
-                "tail": object_.strip(),
+                "head": " ".join(subject),
+                "type": " ".join(relation),
+                "tail": " ".join(object_),
             }
         )
-    return triplets
 
+    for token in _SPECIAL_TOKENS_RE.sub("", text).split():
+        marker = _TRIPLET_MARKERS.get(token)
+        if marker is None:
+            if current in fields:
+                fields[current].append(token)
+            continue
 
-def test_vector_store():
-    load_dotenv()
-    assert os.environ.get("OPENAI_API_KEY") is not None
+        if marker == "t":
+            if relation:
+                emit()
+                relation.clear()
+            subject.clear()
+        elif marker == "s":
+            if relation:
+                emit()
+            object_.clear()
+        else:
+            relation.clear()
+        current = marker
+    if subject and relation and object_:
+        emit()
+    return triplets
 
-    vs = VectorStore()
+
+@pytest.mark.integration
+def test_vector_store(env, vector_store, llm_client):
+    assert env.get("OPENAI_API_KEY") is not None
 
     query = "What are red flags in marketing?"
-    results = vs.search(query, top_k=3)
+    results = vector_store.search(query, top_k=3)
 
     # for r in results:
     #     print(f"\n📰 {r['title']}\n📝 {r['summary_processed']}\n🔗 {r['link']}")
@@ -81,12 +67,9 @@ def test_vector_store():
     {results}
     """
 
-    llm_client = DeepSeekClient()
     summary = llm_client.summarize(
         agent_description="You are a marketing expert.",
-        task_description=task_description,
+        prompt=task_description,
     )
 
     assert summary is not None
-
-    return